@@ -52,6 +52,25 @@ class BuildVocab(Subcommand):
             ),
         )
 
+        subparser.add_argument(
+            "--max-counted-items-per-namespace",
+            type=int,
+            default=None,
+            help=(
+                "only keep about this many of the most frequent items of each namespace while "
+                "counting them, which makes the counts approximate but bounds the memory used"
+            ),
+        )
+
+        subparser.add_argument(
+            "--binary",
+            action="store_true",
+            help=(
+                "save the vocabulary in a binary format, which is memory-mapped when it is loaded "
+                "instead of being read"
+            ),
+        )
+
         subparser.set_defaults(func=build_vocab_from_args)
 
         return subparser
@@ -72,7 +91,12 @@ def build_vocab_from_args(args: argparse.Namespace):
 
     with tempfile.TemporaryDirectory() as temp_dir:
         # Serializes the vocab to 'tempdir/vocabulary'.
-        make_vocab_from_params(params, temp_dir)
+        make_vocab_from_params(
+            params,
+            temp_dir,
+            max_counted_items_per_namespace=args.max_counted_items_per_namespace,
+            binary=args.binary or None,
+        )
 
         # The CacheFile context manager gives us a temporary file to write to.
         # On a successful exit from the context, it will rename the temp file to
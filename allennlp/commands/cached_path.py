@@ -4,12 +4,14 @@ CLI to the the caching mechanism in `common.file_utils`.
 
 import argparse
 import logging
+import time
 
 from overrides import overrides
 
 from allennlp.commands.subcommand import Subcommand
 from allennlp.common.file_utils import (
     cached_path,
+    cached_path_many,
     CACHE_DIRECTORY,
     inspect_cache,
     remove_cache_entries,
@@ -58,6 +60,17 @@ class CachedPath(Subcommand):
             action="store_true",
             help="""Extract archives regardless of whether or not they already exist.""",
         )
+        subparser.add_argument(
+            "--prefetch",
+            action="store_true",
+            help="""Cache all of the resources concurrently, and print how long each of them took.""",
+        )
+        subparser.add_argument(
+            "--max-workers",
+            type=int,
+            default=8,
+            help="""The number of resources to cache at a time with --prefetch.""",
+        )
         subparser.add_argument(
             "--inspect",
             action="store_true",
@@ -74,19 +87,19 @@ class CachedPath(Subcommand):
 def _cached_path(args: argparse.Namespace):
     logger.info("Cache directory: %s", args.cache_dir)
     if args.inspect:
-        if args.extract_archive or args.force_extract or args.remove:
+        if args.extract_archive or args.force_extract or args.remove or args.prefetch:
             raise RuntimeError(
-                "cached-path cannot accept --extract-archive, --force-extract, or --remove "
-                "options when --inspect flag is used."
+                "cached-path cannot accept --extract-archive, --force-extract, --remove, "
+                "or --prefetch options when --inspect flag is used."
             )
         inspect_cache(patterns=args.resources, cache_dir=args.cache_dir)
     elif args.remove:
         from allennlp.common.util import format_size
 
-        if args.extract_archive or args.force_extract or args.inspect:
+        if args.extract_archive or args.force_extract or args.inspect or args.prefetch:
             raise RuntimeError(
-                "cached-path cannot accept --extract-archive, --force-extract, or --inspect "
-                "options when --remove flag is used."
+                "cached-path cannot accept --extract-archive, --force-extract, --inspect, "
+                "or --prefetch options when --remove flag is used."
             )
         if not args.resources:
             raise RuntimeError(
@@ -95,6 +108,17 @@ def _cached_path(args: argparse.Namespace):
             )
         reclaimed_space = remove_cache_entries(args.resources, cache_dir=args.cache_dir)
         print(f"Reclaimed {format_size(reclaimed_space)} of space")
+    elif args.prefetch:
+        start = time.perf_counter()
+        cached_path_many(
+            args.resources,
+            cache_dir=args.cache_dir,
+            extract_archive=args.extract_archive,
+            force_extract=args.force_extract,
+            max_workers=args.max_workers,
+            callback=lambda resource, path, seconds: print(f"{path} ({seconds:.2f}s)", flush=True),
+        )
+        print(f"Cached {len(set(args.resources))} resources in {time.perf_counter() - start:.2f}s")
     else:
         for resource in args.resources:
             print(
@@ -2,9 +2,11 @@
 Utilities for working with the local dataset cache.
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
 import glob
 import io
+import itertools
 import os
 import logging
 import tempfile
@@ -29,7 +31,9 @@ from typing import (
     Iterable,
     Dict,
     NamedTuple,
+    Mapping,
     MutableMapping,
+    Any,
 )
 from hashlib import sha256
 from functools import wraps
@@ -38,6 +42,8 @@ from zipfile import ZipFile, is_zipfile
 import tarfile
 import shutil
 import pickle
+import struct
+import threading
 import time
 import warnings
 
@@ -382,6 +388,78 @@ def cached_path(
     return file_path
 
 
+def cached_path_many(
+    urls_or_filenames: Iterable[Union[str, PathLike]],
+    cache_dir: Union[str, Path] = None,
+    extract_archive: bool = False,
+    force_extract: bool = False,
+    max_workers: int = 8,
+    callback: Optional[Callable[[str, str, float], None]] = None,
+) -> List[str]:
+    """
+    Calls [`cached_path()`](#cached_path) for each of the given URLs or paths, with up to
+    `max_workers` of them at a time, so that the ETag requests and downloads of many
+    remote resources overlap instead of happening one after another.
+
+    Each distinct resource is only resolved once, however often it is given. Other processes
+    that are caching the same resources at the same time wait for the downloads of this one
+    (and the other way around), because `cached_path()` holds a lock on each cache entry while
+    it downloads it.
+
+    Returns the local paths in the same order as the given resources. If any of them fails,
+    the resources that haven't been started yet are skipped, and the first error is raised.
+
+    # Parameters
+
+    urls_or_filenames : `Iterable[Union[str, PathLike]]`
+        The URLs or paths to resolve.
+
+    cache_dir : `Union[str, Path]`, optional (default = `None`)
+        The directory to cache downloads.
+
+    extract_archive : `bool`, optional (default = `False`)
+        See `cached_path()`.
+
+    force_extract : `bool`, optional (default = `False`)
+        See `cached_path()`.
+
+    max_workers : `int`, optional (default = `8`)
+        The number of resources to resolve at a time.
+
+    callback : `Callable[[str, str, float], None]`, optional (default = `None`)
+        If given, this is called with each resource, its local path, and the number of seconds
+        it took to resolve it, as soon as it is done.
+    """
+    resources = [str(url_or_filename) for url_or_filename in urls_or_filenames]
+    unique_resources = list(dict.fromkeys(resources))
+
+    def resolve(resource: str) -> str:
+        start = time.perf_counter()
+        path = cached_path(
+            resource,
+            cache_dir=cache_dir,
+            extract_archive=extract_archive,
+            force_extract=force_extract,
+        )
+        seconds = time.perf_counter() - start
+        logger.info("Resolved %s to %s in %.2f seconds", resource, path, seconds)
+        if callback is not None:
+            callback(resource, path, seconds)
+        return path
+
+    paths: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_resources)))) as pool:
+        futures = {pool.submit(resolve, resource): resource for resource in unique_resources}
+        try:
+            for future in as_completed(futures):
+                paths[futures[future]] = future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return [paths[resource] for resource in resources]
+
+
 def is_url_or_existing_file(url_or_filename: Union[str, Path, None]) -> bool:
     """
     Given something that might be a URL (or might be a local path),
@@ -532,18 +610,206 @@ def _http_etag(url: str) -> Optional[str]:
     return response.headers.get("ETag")
 
 
-def _http_get(url: str, temp_file: IO) -> None:
-    with _session_with_backoff() as session:
-        req = session.get(url, stream=True)
-        req.raise_for_status()
-        content_length = req.headers.get("Content-Length")
-        total = int(content_length) if content_length is not None else None
-        progress = Tqdm.tqdm(unit="B", total=total, desc="downloading")
-        for chunk in req.iter_content(chunk_size=1024):
-            if chunk:  # filter out keep-alive new chunks
-                progress.update(len(chunk))
-                temp_file.write(chunk)
-        progress.close()
+# Files served over HTTP are downloaded in chunks of this many bytes, `_RANGED_DOWNLOAD_WORKERS`
+# chunks at a time, when the server supports range requests. Finished chunks are recorded, so an
+# interrupted download resumes where it stopped the next time.
+_RANGED_DOWNLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+_RANGED_DOWNLOAD_WORKERS = 8
+# How many times we try to download each chunk.
+_RANGED_DOWNLOAD_ATTEMPTS = 3
+# The suffixes of the file that a ranged download is written to, and of the file that records which
+# of its chunks are finished.
+_PARTIAL_SUFFIX = ".partial"
+_PROGRESS_SUFFIX = ".partial-progress"
+
+
+class _ResourceChangedError(OSError):
+    """
+    Raised when a resource changes while we download it in chunks.
+    """
+
+
+def _ranged_download_size(response: requests.Response) -> Optional[int]:
+    """
+    Returns the size of the file that the given response to a request for its first chunk is
+    part of, or `None` if the response is not a part of a file of known size.
+    """
+    content_range = response.headers.get("Content-Range", "")
+    if response.status_code != 206 or not content_range.startswith("bytes 0-"):
+        return None
+    # The size is "*" when the server doesn't know it.
+    size = content_range.rsplit("/", 1)[-1]
+    return int(size) if size.isdigit() else None
+
+
+def _range_validator(response: requests.Response) -> Optional[str]:
+    """
+    Returns the value for the `If-Range` header of requests for more chunks of the resource of the
+    given response, so that they fail if the resource changes, or `None` if there is none.
+    """
+    etag = response.headers.get("ETag")
+    # Weak ETags can't be used with `If-Range`.
+    if etag is not None and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _write_response(response: requests.Response, file: IO, progress) -> int:
+    num_bytes = 0
+    for chunk in response.iter_content(chunk_size=1024 * 1024):
+        if chunk:  # filter out keep-alive new chunks
+            file.write(chunk)
+            num_bytes += len(chunk)
+            progress.update(len(chunk))
+    return num_bytes
+
+
+def _http_get(url: str, cache_path: str) -> None:
+    """
+    Downloads a file to `cache_path`. When the server supports range requests, the file is
+    downloaded in chunks, several at a time, to a partial file next to `cache_path`, and the
+    chunks that are done are recorded in a progress file. If the download fails, calling this
+    again with the same `cache_path` only downloads the missing chunks. All chunks are requested
+    with the `ETag` (or `Last-Modified` date) of the first one in an `If-Range` header, so they
+    fail instead of mixing up the bytes of two versions of the resource if it changes. Resources
+    without either of these are downloaded all at once.
+
+    The caller has to hold the lock of `cache_path`.
+    """
+    chunk_size = _RANGED_DOWNLOAD_CHUNK_SIZE
+    partial_path = cache_path + _PARTIAL_SUFFIX
+    progress_path = cache_path + _PROGRESS_SUFFIX
+
+    size: Optional[int] = None
+    validator: Optional[str] = None
+    done: Set[int] = set()
+    if os.path.isfile(partial_path) and os.path.isfile(progress_path):
+        with open(progress_path) as progress_file:
+            # Only complete lines count, in case we were interrupted while writing one.
+            lines = progress_file.read().split("\n")[:-1]
+        # The size, the chunk size, and the validator, which may contain spaces.
+        header = lines[0].split(" ", 2) if lines else []
+        if (
+            len(header) == 3
+            and int(header[1]) == chunk_size
+            and os.path.getsize(partial_path) == int(header[0])
+        ):
+            size = int(header[0])
+            validator = header[2]
+            done = {int(line) for line in lines[1:]}
+            logger.info("resuming download of %s, %d chunks are done", url, len(done))
+
+    lock = threading.Lock()
+    if size is None:
+        with _session_with_backoff() as session:
+            response = session.get(url, headers={"Range": f"bytes=0-{chunk_size - 1}"}, stream=True)
+            if response.status_code == 416:
+                # The file is empty.
+                response = session.get(url, stream=True)
+            response.raise_for_status()
+            size = _ranged_download_size(response)
+            validator = _range_validator(response)
+            if size is None or validator is None:
+                if response.status_code == 206:
+                    # We can't download this file in chunks, so we need all of it.
+                    response.close()
+                    response = session.get(url, stream=True)
+                    response.raise_for_status()
+                content_length = response.headers.get("Content-Length")
+                total = int(content_length) if content_length is not None else None
+                progress = Tqdm.tqdm(unit="B", total=total, desc="downloading")
+                with CacheFile(cache_path) as cache_file:
+                    _write_response(response, cache_file, progress)
+                progress.close()
+                return
+
+            # The first chunk is already on its way.
+            progress = Tqdm.tqdm(unit="B", total=size, desc="downloading")
+            with open(partial_path, "wb") as partial_file:
+                partial_file.truncate(size)
+                received = _write_response(response, partial_file, progress)
+            if received != min(chunk_size, size):
+                raise OSError(f"Expected {min(chunk_size, size)} bytes from {url}, got {received}")
+            with open(progress_path, "w") as progress_file:
+                progress_file.write(f"{size} {chunk_size} {validator}\n0\n")
+            done.add(0)
+    else:
+        progress = Tqdm.tqdm(
+            unit="B",
+            total=size,
+            initial=sum(min(chunk_size, size - index * chunk_size) for index in done),
+            desc="downloading",
+        )
+
+    def download_chunk(index: int) -> None:
+        assert size is not None and validator is not None
+        start = index * chunk_size
+        end = min(start + chunk_size, size)
+        for attempt in range(_RANGED_DOWNLOAD_ATTEMPTS):
+            counter = _LockedProgress(progress, lock)
+            try:
+                with _session_with_backoff() as session:
+                    response = session.get(
+                        url,
+                        headers={"Range": f"bytes={start}-{end - 1}", "If-Range": validator},
+                        stream=True,
+                    )
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        # The server sends all of the resource when it doesn't match `If-Range`.
+                        raise _ResourceChangedError(f"{url} changed while downloading it")
+                    with open(partial_path, "r+b") as partial_file:
+                        partial_file.seek(start)
+                        received = _write_response(response, partial_file, counter)
+                if received != end - start:
+                    raise OSError(f"Expected {end - start} bytes from {url}, got {received}")
+                break
+            except (OSError, requests.exceptions.RequestException) as e:
+                counter.update(-counter.n)
+                if isinstance(e, _ResourceChangedError) or attempt == _RANGED_DOWNLOAD_ATTEMPTS - 1:
+                    raise
+                logger.warning("download of bytes %d-%d of %s failed, retrying", start, end, url)
+        with lock:
+            with open(progress_path, "a") as progress_file:
+                progress_file.write(f"{index}\n")
+
+    num_chunks = (size + chunk_size - 1) // chunk_size
+    with ThreadPoolExecutor(max_workers=_RANGED_DOWNLOAD_WORKERS) as executor:
+        futures = [
+            executor.submit(download_chunk, index)
+            for index in range(num_chunks)
+            if index not in done
+        ]
+        try:
+            # Raises the first error, once all of the chunks are done or failed.
+            for future in futures:
+                future.result()
+        except _ResourceChangedError:
+            # The chunks we have are of no use anymore, so the next try starts over.
+            for path in (partial_path, progress_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+    progress.close()
+
+    os.replace(partial_path, cache_path)
+    os.remove(progress_path)
+
+
+class _LockedProgress:
+    """
+    Updates a progress bar from several threads, and counts the updates of one of them.
+    """
+
+    def __init__(self, progress, lock: threading.Lock) -> None:
+        self.progress = progress
+        self.lock = lock
+        self.n = 0
+
+    def update(self, n: int) -> None:
+        self.n += n
+        with self.lock:
+            self.progress.update(n)
 
 
 def _find_latest_cached(url: str, cache_dir: Union[str, Path]) -> Optional[str]:
@@ -551,7 +817,13 @@ def _find_latest_cached(url: str, cache_dir: Union[str, Path]) -> Optional[str]:
     cache_path = os.path.join(cache_dir, filename)
     candidates: List[Tuple[str, float]] = []
     for path in glob.glob(cache_path + "*"):
-        if path.endswith(".json") or path.endswith("-extracted") or path.endswith(".lock"):
+        if (
+            path.endswith(".json")
+            or path.endswith("-extracted")
+            or path.endswith(".lock")
+            or path.endswith(_PARTIAL_SUFFIX)
+            or path.endswith(_PROGRESS_SUFFIX)
+        ):
             continue
         mtime = os.path.getmtime(path)
         candidates.append((path, mtime))
@@ -567,6 +839,99 @@ def _serialize(data):
     return np.frombuffer(buffer, dtype=np.uint8)
 
 
+# The start of a tensor in the "raw" encoding of `TensorCache`. Tensors saved by `torch.save()`
+# start with the magic bytes of a zip file (or of a pickle, for old versions of torch) instead.
+_RAW_TENSOR_MAGIC = b"\x00ANLPTEN"
+# The magic bytes, the dtype of the tensor, the dtype it is stored as, and the number of dimensions.
+_RAW_TENSOR_HEADER = struct.Struct("<8sBBxxI")
+_RAW_TENSOR_DIMENSION = struct.Struct("<q")
+# The dtypes that the raw encoding supports, in the order of their codes in the header, which
+# must never change. `bfloat16` has no numpy dtype, so it is stored as the upper half of `float32`.
+_RAW_TENSOR_DTYPES = [
+    (torch.float32, np.float32),
+    (torch.float64, np.float64),
+    (torch.float16, np.float16),
+    (torch.bfloat16, np.uint16),
+    (torch.uint8, np.uint8),
+    (torch.int8, np.int8),
+    (torch.int16, np.int16),
+    (torch.int32, np.int32),
+    (torch.int64, np.int64),
+    (torch.bool, np.bool_),
+]
+_RAW_TENSOR_DTYPE_CODES = {dtype: code for code, (dtype, _) in enumerate(_RAW_TENSOR_DTYPES)}
+
+
+def _encode_raw_tensor(tensor: Tensor, storage_dtype: Optional[torch.dtype] = None) -> bytes:
+    """
+    Encodes a tensor as a small header with its dtype and shape, followed by its elements, stored
+    as `storage_dtype` if that is given and the tensor is floating point.
+    """
+    if tensor.dtype not in _RAW_TENSOR_DTYPE_CODES:
+        raise ValueError(f"The raw encoding doesn't support tensors of type {tensor.dtype}")
+    stored = tensor.detach().cpu()
+    if storage_dtype is not None and stored.is_floating_point():
+        stored = stored.to(storage_dtype)
+    stored = stored.contiguous()
+    if stored.dtype == torch.bfloat16:
+        # Converting to float32 is exact, so the upper half of its bits are the bits of the bfloat16.
+        data = (stored.float().numpy().view(np.uint32) >> 16).astype(np.uint16)
+    else:
+        data = stored.numpy()
+    header = _RAW_TENSOR_HEADER.pack(
+        _RAW_TENSOR_MAGIC,
+        _RAW_TENSOR_DTYPE_CODES[tensor.dtype],
+        _RAW_TENSOR_DTYPE_CODES[stored.dtype],
+        tensor.dim(),
+    )
+    dimensions = b"".join(_RAW_TENSOR_DIMENSION.pack(size) for size in tensor.size())
+    return header + dimensions + data.tobytes()
+
+
+def _decode_tensor(buffer) -> Tensor:
+    """
+    Decodes a tensor from either the raw encoding or from what `torch.save()` wrote. The returned
+    tensor has its own memory, so `buffer` can go away afterwards.
+    """
+    if bytes(buffer[: len(_RAW_TENSOR_MAGIC)]) != _RAW_TENSOR_MAGIC:
+        return torch.load(io.BytesIO(buffer), map_location="cpu")
+
+    _, dtype_code, stored_dtype_code, num_dimensions = _RAW_TENSOR_HEADER.unpack_from(buffer)
+    offset = _RAW_TENSOR_HEADER.size
+    shape = []
+    for _ in range(num_dimensions):
+        (size,) = _RAW_TENSOR_DIMENSION.unpack_from(buffer, offset)
+        shape.append(size)
+        offset += _RAW_TENSOR_DIMENSION.size
+    dtype = _RAW_TENSOR_DTYPES[dtype_code][0]
+    stored_dtype, numpy_dtype = _RAW_TENSOR_DTYPES[stored_dtype_code]
+
+    # The elements are read straight from the buffer, and copied (or converted) once.
+    data = np.frombuffer(buffer, dtype=numpy_dtype, count=int(np.prod(shape)), offset=offset)
+    if stored_dtype == torch.bfloat16:
+        array = (data.astype(np.uint32) << 16).view(np.float32)
+    elif stored_dtype != dtype and dtype != torch.bfloat16:
+        array = data.astype(_RAW_TENSOR_DTYPES[dtype_code][1])
+    else:
+        array = data.copy()
+    return torch.from_numpy(array).reshape(shape).to(dtype)
+
+
+# The name of the database in a `TensorCache` that keeps track of when and how often each tensor
+# was used, for evicting tensors when the cache has a `max_size`. LMDB keeps the names of its
+# databases as keys of the main database, which holds the tensors, so this name isn't valid UTF-8,
+# which makes sure that it can't be the key of a tensor.
+_ACCESS_DB_NAME = b"\xffallennlp-tensor-cache-access"
+# The time that a tensor was last used, and how many times it was used.
+_ACCESS_RECORD = struct.Struct("<dq")
+# How many keys we keep the accesses of in memory before writing them to the cache.
+_ACCESS_FLUSH_SIZE = 1000
+# When the cache grows past its `max_size`, we evict tensors until it is this much of it.
+_EVICTION_TARGET = 0.9
+# How many keys `TensorCache.__iter__()` reads in each transaction.
+_ITERATION_CHUNK_SIZE = 1000
+
+
 class TensorCache(MutableMapping[str, Tensor], ABC):
     """
     This is a key-value store, mapping strings to tensors. The data is kept on disk,
@@ -583,6 +948,10 @@ class TensorCache(MutableMapping[str, Tensor], ABC):
         *,
         map_size: int = 1024 * 1024 * 1024 * 1024,
         read_only: bool = False,
+        encoding: str = "pickle",
+        storage_dtype: Optional[torch.dtype] = None,
+        max_size: Optional[int] = None,
+        eviction_policy: str = "lru",
     ) -> None:
         """
         Creates a `TensorCache` by either opening an existing one on disk, or creating
@@ -600,7 +969,47 @@ class TensorCache(MutableMapping[str, Tensor], ABC):
             first opened, we have to give the maximum size it can ever grow to. This is
             that number. Reasonable operating systems don't actually allocate that space
             until it is really needed.
+        encoding: `str`, optional, defaults to `"pickle"`
+            How tensors are written to the cache. `"pickle"` uses `torch.save()`. `"raw"` writes
+            a small header with the dtype and shape of the tensor, followed by its elements, which
+            are read back by copying them straight out of the cache, without unpickling anything.
+            This is a lot faster for caches with many small tensors. The raw encoding only
+            supports tensors of real and boolean types. Tensors are read back correctly no matter
+            how they were written, so the encoding of an existing cache can be changed.
+        storage_dtype: `torch.dtype`, optional
+            Only with the raw encoding, floating point tensors are stored as this type, for
+            example `torch.float16` or `torch.bfloat16` to halve the size of the cache. They
+            are converted back to their own type when they are read.
+        max_size: `int`, optional
+            If given, tensors are evicted from the cache when the space that it uses grows past
+            this many bytes, until it uses 90% of it. Unlike `map_size`, this can be different
+            every time the cache is opened. Space that is freed is reused for new tensors, but the
+            file doesn't shrink.
+
+            To choose which tensors to evict, we keep track of when and how often each tensor is
+            used. Reads don't write to the cache right away, so these statistics are written
+            together with the next change to the cache, or every 1000 keys that were read.
+            Processes that open the cache read-only don't record anything.
+        eviction_policy: `str`, optional, defaults to `"lru"`
+            Which tensors to evict first when the cache is too big: `"lru"` evicts the least
+            recently used ones, and `"lfu"` the least frequently used ones.
         """
+        if encoding not in {"pickle", "raw"}:
+            raise ValueError(f"encoding must be 'pickle' or 'raw', not '{encoding}'")
+        if storage_dtype is not None:
+            if encoding != "raw":
+                raise ValueError("storage_dtype can only be used with the raw encoding")
+            if not storage_dtype.is_floating_point:
+                raise ValueError("storage_dtype must be a floating point type")
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if eviction_policy not in {"lru", "lfu"}:
+            raise ValueError(f"eviction_policy must be 'lru' or 'lfu', not '{eviction_policy}'")
+        self.encoding = encoding
+        self.storage_dtype = storage_dtype
+        self.max_size = max_size
+        self.eviction_policy = eviction_policy
+
         filename = str(filename)
 
         cpu_count = os.cpu_count() or 1
@@ -643,6 +1052,7 @@ class TensorCache(MutableMapping[str, Tensor], ABC):
             map_size=map_size,
             max_readers=cpu_count * 2,
             max_spare_txns=cpu_count * 2,
+            max_dbs=1,
             metasync=False,
             sync=True,
             readahead=False,
@@ -651,6 +1061,14 @@ class TensorCache(MutableMapping[str, Tensor], ABC):
             lock=use_lock,
         )
 
+        # The accesses of each key since they were last written to the cache, as the time of the
+        # last access and the number of accesses, when we keep track of them.
+        self._main_db = self.lmdb_env.open_db()
+        self._access_db = None
+        self._accesses: Dict[bytes, List] = {}
+        if max_size is not None and not read_only:
+            self._access_db = self.lmdb_env.open_db(_ACCESS_DB_NAME)
+
         # We have another cache here that makes sure we return the same object for the same key. Without it,
         # you would get a different tensor, using different memory, every time you call __getitem__(), even
         # if you call it with the same key.
@@ -674,33 +1092,78 @@ class TensorCache(MutableMapping[str, Tensor], ABC):
             return result is not None
 
     def __getitem__(self, key: str):
-        try:
-            return self.cache_cache[key]
-        except KeyError:
-            encoded_key = key.encode()
-            with self.lmdb_env.begin(write=False) as txn:
-                buffer = txn.get(encoded_key)
-                if buffer is None:
-                    raise KeyError()
-                tensor = torch.load(io.BytesIO(buffer), map_location="cpu")
-            self.cache_cache[key] = tensor
-            return tensor
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Iterable[str]) -> List[Tensor]:
+        """
+        Returns the tensors of all of the given keys, reading them in one transaction.
+        Raises a `KeyError` if any of them isn't in the cache.
+        """
+        keys = list(keys)
+        tensors: List[Optional[Tensor]] = [self.cache_cache.get(key) for key in keys]
+        missing = [i for i, tensor in enumerate(tensors) if tensor is None]
+
+        if missing:
+            # With `buffers=True`, the buffers point right into the memory-mapped database, but
+            # they are only valid during the transaction, so the tensors need to be decoded in it.
+            with self.lmdb_env.begin(write=False, buffers=True) as txn:
+                for i in missing:
+                    buffer = txn.get(keys[i].encode())
+                    if buffer is None:
+                        raise KeyError(keys[i])
+                    tensors[i] = _decode_tensor(buffer)
+            for i in missing:
+                self.cache_cache[keys[i]] = tensors[i]  # type: ignore
+
+        if self._access_db is not None:
+            self._record_accesses(keys)
+            if len(self._accesses) >= _ACCESS_FLUSH_SIZE:
+                with self.lmdb_env.begin(write=True) as txn:
+                    self._write_accesses(txn)
+        return tensors  # type: ignore
 
     def __setitem__(self, key: str, tensor: torch.Tensor):
+        self.set_many([(key, tensor)])
+
+    def set_many(self, items: Union[Mapping[str, Tensor], Iterable[Tuple[str, Tensor]]]) -> None:
+        """
+        Writes all of the given tensors to the cache in one transaction, which is a lot faster
+        than writing them one at a time.
+        """
         if self.read_only:
             raise ValueError("cannot write to a read-only cache")
 
+        if isinstance(items, Mapping):
+            items = items.items()
+        items = [(key, self._encode(tensor)) for key, tensor in items]
+        with self.lmdb_env.begin(write=True) as txn:
+            for key, (_, data) in items:
+                txn.put(key.encode(), data)
+            if self._access_db is not None:
+                self._record_accesses(key for key, _ in items)
+                self._write_accesses(txn)
+                self._evict(txn)
+
+        for key, (tensor, _) in items:
+            self.cache_cache[key] = tensor
+
+    def _encode(self, tensor: Tensor) -> Tuple[Tensor, Any]:
+        """
+        Returns the tensor to keep in `cache_cache`, and the data to write to the cache.
+        """
         tensor = tensor.cpu()
-        encoded_key = key.encode()
+        if self.encoding == "raw":
+            data = _encode_raw_tensor(tensor, self.storage_dtype)
+            if self.storage_dtype is not None and tensor.is_floating_point():
+                # What we return for this key should be the same as what we read back later.
+                tensor = tensor.to(self.storage_dtype).to(tensor.dtype)
+            return tensor, data
         buffer = io.BytesIO()
         if tensor.storage().size() != np.prod(tensor.size()):
             tensor = tensor.clone()
         assert tensor.storage().size() == np.prod(tensor.size())
         torch.save(tensor.detach(), buffer, pickle_protocol=pickle.HIGHEST_PROTOCOL)
-        with self.lmdb_env.begin(write=True) as txn:
-            txn.put(encoded_key, buffer.getbuffer())
-
-        self.cache_cache[key] = tensor
+        return tensor, buffer.getbuffer()
 
     def __delitem__(self, key: str):
         if self.read_only:
@@ -709,23 +1172,118 @@ class TensorCache(MutableMapping[str, Tensor], ABC):
         encoded_key = key.encode()
         with self.lmdb_env.begin(write=True) as txn:
             txn.delete(encoded_key)
+            if self._access_db is not None:
+                self._accesses.pop(encoded_key, None)
+                txn.delete(encoded_key, db=self._access_db)
 
         try:
             del self.cache_cache[key]
         except KeyError:
             pass
 
+    def _record_accesses(self, keys: Iterable[str]) -> None:
+        now = time.time()
+        for key in keys:
+            access = self._accesses.setdefault(key.encode(), [now, 0])
+            access[0] = now
+            access[1] += 1
+
+    def _write_accesses(self, txn) -> None:
+        """
+        Adds the accesses that we have kept in memory to the ones in the cache, which other
+        processes may have added to.
+        """
+        for encoded_key, (last_access, count) in self._accesses.items():
+            if txn.get(encoded_key) is None:
+                # Another process deleted this key.
+                continue
+            record = txn.get(encoded_key, db=self._access_db)
+            if record is not None:
+                previous_access, previous_count = _ACCESS_RECORD.unpack(record)
+                last_access = max(last_access, previous_access)
+                count += previous_count
+            txn.put(encoded_key, _ACCESS_RECORD.pack(last_access, count), db=self._access_db)
+        self._accesses.clear()
+
+    def _used_size(self, txn) -> int:
+        size = 0
+        for db in (self._main_db, self._access_db):
+            stat = txn.stat(db)
+            size += stat["psize"] * (
+                stat["branch_pages"] + stat["leaf_pages"] + stat["overflow_pages"]
+            )
+        return size
+
+    def _evict(self, txn) -> None:
+        assert self.max_size is not None
+        if self._used_size(txn) <= self.max_size:
+            return
+
+        # Tensors that were written before we kept track of accesses are evicted first.
+        records: Dict[bytes, Tuple[float, int]] = {}
+        for encoded_key in txn.cursor().iternext(values=False):
+            if encoded_key != _ACCESS_DB_NAME:
+                records[encoded_key] = (0.0, 0)
+        for encoded_key, record in txn.cursor(db=self._access_db):
+            if encoded_key in records:
+                records[encoded_key] = _ACCESS_RECORD.unpack(record)
+        if self.eviction_policy == "lru":
+            order = sorted(records, key=lambda k: records[k])
+        else:
+            order = sorted(records, key=lambda k: (records[k][1], records[k][0]))
+
+        target = _EVICTION_TARGET * self.max_size
+        num_evicted = 0
+        for encoded_key in order:
+            if self._used_size(txn) <= target:
+                break
+            txn.delete(encoded_key)
+            txn.delete(encoded_key, db=self._access_db)
+            self.cache_cache.pop(encoded_key.decode(), None)
+            num_evicted += 1
+        logger.info("Evicted %d tensors from the cache", num_evicted)
+
     def __del__(self):
-        if self.lmdb_env is not None:
+        # There is no environment if the constructor failed.
+        if getattr(self, "lmdb_env", None) is not None:
+            if self._accesses:
+                with self.lmdb_env.begin(write=True) as txn:
+                    self._write_accesses(txn)
             self.lmdb_env.close()
             self.lmdb_env = None
 
     def __len__(self):
-        return self.lmdb_env.stat()["entries"]
+        with self.lmdb_env.begin(write=False) as txn:
+            num_entries = txn.stat(self._main_db)["entries"]
+            if txn.get(_ACCESS_DB_NAME) is not None:
+                num_entries -= 1
+        return num_entries
 
-    def __iter__(self):
-        # It is not hard to implement this, but we have not needed it so far.
-        raise NotImplementedError()
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterates over the keys of the cache. The keys are read a chunk at a time, so keys that
+        other processes add or remove while we iterate may or may not show up.
+        """
+        last_key: Optional[bytes] = None
+        while True:
+            with self.lmdb_env.begin(write=False) as txn:
+                cursor = txn.cursor()
+                if last_key is None:
+                    found = cursor.first()
+                else:
+                    found = cursor.set_range(last_key)
+                    if found and cursor.key() == last_key:
+                        found = cursor.next()
+                chunk: List[bytes] = []
+                while found and len(chunk) < _ITERATION_CHUNK_SIZE:
+                    chunk.append(cursor.key())
+                    found = cursor.next()
+            for encoded_key in chunk:
+                if encoded_key != _ACCESS_DB_NAME:
+                    yield encoded_key.decode()
+            if not found:
+                return
+            last_key = chunk[-1]
 
 
 class CacheFile:
@@ -1042,16 +1600,16 @@ def get_from_cache(url: str, cache_dir: Union[str, Path] = None) -> str:
         if os.path.exists(cache_path):
             logger.info("cache of %s is up-to-date", url)
         else:
-            with CacheFile(cache_path) as cache_file:
-                logger.info("%s not found in cache, downloading to %s", url, cache_path)
-
-                # GET file object
-                if url.startswith("s3://"):
-                    _s3_get(url, cache_file)
-                elif url.startswith("gs://"):
-                    _gcs_get(url, cache_file.name)
-                else:
-                    _http_get(url, cache_file)
+            logger.info("%s not found in cache, downloading to %s", url, cache_path)
+            if url.startswith("s3://") or url.startswith("gs://"):
+                with CacheFile(cache_path) as cache_file:
+                    # GET file object
+                    if url.startswith("s3://"):
+                        _s3_get(url, cache_file)
+                    else:
+                        _gcs_get(url, cache_file.name)
+            else:
+                _http_get(url, cache_path)
 
             logger.debug("creating metadata file for %s", cache_path)
             meta = _Meta(
@@ -1102,17 +1660,83 @@ def open_compressed(
     return open_fn(cached_path(filename), mode=mode, encoding=encoding, **kwargs)
 
 
-def text_lines_from_file(filename: Union[str, PathLike], strip_lines: bool = True) -> Iterator[str]:
+def _is_compressed(filename: Union[str, PathLike]) -> bool:
+    return str(filename).endswith((".gz", ".bz2"))
+
+
+def _lines_in_byte_range(filename: str, start: int, end: int) -> Iterator[bytes]:
+    """
+    Yields the lines of a file that start at a byte offset in `[start, end)`.
+    """
+    with open(filename, "rb") as f:
+        if start > 0:
+            # The line that `start` falls into belongs to the previous range, unless it starts
+            # right at `start`, in which case this only reads the newline before it.
+            f.seek(start - 1)
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line
+            position += len(line)
+
+
+def text_lines_from_file(
+    filename: Union[str, PathLike], strip_lines: bool = True, shard: int = 0, num_shards: int = 1
+) -> Iterator[str]:
+    """
+    Yields the lines of a text file, which may be compressed.
+
+    If `num_shards` is greater than 1, only the lines of the given shard are read. The shards of
+    an uncompressed file are byte ranges of about the same size, and each line belongs to the
+    range that it starts in, so every shard only reads its own part of the file. Compressed files
+    can't be read from the middle, so for those, each shard reads the whole file and keeps every
+    `num_shards`-th line.
+    """
+    if not 0 <= shard < num_shards:
+        raise ValueError(f"Shard {shard} doesn't exist when there are {num_shards} shards")
+
+    if num_shards > 1 and not _is_compressed(filename):
+        path = cached_path(filename)
+        size = os.path.getsize(path)
+        byte_lines = _lines_in_byte_range(
+            path, size * shard // num_shards, size * (shard + 1) // num_shards
+        )
+        for byte_line in byte_lines:
+            line = byte_line.decode("UTF-8", errors="replace")
+            if strip_lines:
+                yield line.strip()
+            elif line.endswith("\r\n"):
+                # The same as reading the file in text mode.
+                yield line[:-2] + "\n"
+            else:
+                yield line
+        return
+
     with open_compressed(filename, "rt", encoding="UTF-8", errors="replace") as p:
+        lines: Iterable[str] = p
+        if num_shards > 1:
+            lines = itertools.islice(lines, shard, None, num_shards)
         if strip_lines:
-            for line in p:
+            for line in lines:
                 yield line.strip()
         else:
-            yield from p
+            yield from lines
 
 
-def json_lines_from_file(filename: Union[str, PathLike]) -> Iterable[Union[list, dict]]:
-    return (json.loads(line) for line in text_lines_from_file(filename))
+def json_lines_from_file(
+    filename: Union[str, PathLike], shard: int = 0, num_shards: int = 1
+) -> Iterable[Union[list, dict]]:
+    """
+    Yields the JSON objects on the lines of a file. See `text_lines_from_file()` for `shard` and
+    `num_shards`.
+    """
+    return (
+        json.loads(line)
+        for line in text_lines_from_file(filename, shard=shard, num_shards=num_shards)
+    )
 
 
 def _get_resource_size(path: str) -> int:
@@ -137,3 +137,20 @@ def assert_equal_parameters(
         present_only_in_old.remove(name)
         assert torch.allclose(old_parameters[name], parameter)
     return present_only_in_old
+
+
+def assert_equal_tensor_dicts(tensors: Any, expected: Any) -> None:
+    """
+    Asserts that the (possibly nested) dictionaries of tensors `tensors` and `expected` have the
+    same keys, and that their tensors have the same dtypes and values. Values that aren't
+    tensors or dictionaries are compared with `==`.
+    """
+    if isinstance(expected, dict):
+        assert tensors.keys() == expected.keys()
+        for key, value in expected.items():
+            assert_equal_tensor_dicts(tensors[key], value)
+    elif isinstance(expected, torch.Tensor):
+        assert tensors.dtype == expected.dtype
+        assert torch.equal(tensors, expected)
+    else:
+        assert tensors == expected
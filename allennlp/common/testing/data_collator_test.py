@@ -0,0 +1,18 @@
+from typing import List
+
+from allennlp.data.data_loaders.data_collator import DefaultDataCollator
+from allennlp.data.data_loaders.data_loader import TensorDict
+from allennlp.data.instance import Instance
+
+
+class CountingDataCollator(DefaultDataCollator):
+    """
+    Data collator for testing purpose, which counts how many batches it makes.
+    """
+
+    def __init__(self) -> None:
+        self.num_collated = 0
+
+    def __call__(self, instances: List[Instance]) -> TensorDict:
+        self.num_collated += 1
+        return super().__call__(instances)
@@ -4,6 +4,7 @@ import pathlib
 import shutil
 import tempfile
 
+from allennlp.common import file_utils
 from allennlp.common.checks import log_pytorch_version_info
 
 TEST_DIR = tempfile.mkdtemp(prefix="allennlp_tests")
@@ -13,6 +14,8 @@ class AllenNlpTestCase:
     """
     A custom testing class that disables some of the more verbose AllenNLP
     logging and that creates and destroys a temp directory as a test fixture.
+    The default cache directory is moved into the temp directory, so that tests
+    don't leave files (like extracted model archives) in the real cache.
     """
 
     PROJECT_ROOT = (pathlib.Path(__file__).parent / ".." / ".." / "..").resolve()
@@ -37,5 +40,9 @@ class AllenNlpTestCase:
 
         os.makedirs(self.TEST_DIR, exist_ok=True)
 
+        self._cache_directory = file_utils.CACHE_DIRECTORY
+        file_utils.CACHE_DIRECTORY = str(self.TEST_DIR / "cache")
+
     def teardown_method(self):
+        file_utils.CACHE_DIRECTORY = self._cache_directory
         shutil.rmtree(self.TEST_DIR)
@@ -10,8 +10,10 @@ import json
 import logging
 import os
 import pkgutil
+import queue
 import random
 import sys
+import threading
 from contextlib import contextmanager
 from itertools import islice, zip_longest
 from pathlib import Path
@@ -194,6 +196,36 @@ def pad_sequence_to_length(
     return padded_sequence
 
 
+def pad_sequences_to_tensor(
+    sequences: Sequence[Sequence[Any]],
+    desired_length: int,
+    padding_value: Any = 0,
+    dtype: torch.dtype = torch.long,
+) -> torch.Tensor:
+    """
+    Pads (or truncates) each of the `sequences` on the right to `desired_length`, the same way as
+    [`pad_sequence_to_length()`](#pad_sequence_to_length), and returns them all in one tensor of
+    shape `(len(sequences), desired_length)`.
+
+    The values are copied into a single preallocated tensor all at once, instead of making a
+    tensor for every sequence and stacking them.
+    """
+    lengths = torch.tensor(
+        [min(len(sequence), desired_length) for sequence in sequences], dtype=torch.long
+    )
+    tensor = torch.full((len(sequences), desired_length), padding_value, dtype=dtype)
+    values = [
+        value
+        for sequence in sequences
+        for value in (sequence if len(sequence) <= desired_length else sequence[:desired_length])
+    ]
+    if values:
+        tensor[torch.arange(desired_length) < lengths.unsqueeze(1)] = torch.tensor(
+            values, dtype=dtype
+        )
+    return tensor
+
+
 def add_noise_to_dict_values(dictionary: Dict[A, float], noise_param: float) -> Dict[A, float]:
     """
     Returns a new dictionary with noise added to every key in `dictionary`.  The noise is
@@ -717,6 +749,73 @@ def cycle_iterator_function(iterator_function: Callable[[], Iterable[T]]) -> Ite
             iterator = iter(iterator_function())
 
 
+def prefetch_iterable(iterable: Iterable[T], max_prefetch: int) -> Iterator[T]:
+    """
+    Iterates over `iterable` in a background thread, which keeps up to `max_prefetch` items
+    ready in a queue. This lets the work of producing the items (like collating batches and
+    moving them to the GPU) overlap with the work of consuming them.
+
+    The background thread starts right away, not just when the first item is requested.
+    Exceptions raised by `iterable` (including ones that aren't `Exception`s, like `SystemExit`)
+    are raised again when the iteration reaches them. When the returned iterator is closed, the
+    background thread stops after the item it is working on.
+    """
+    items: queue.Queue = queue.Queue(maxsize=max_prefetch)
+    stop = threading.Event()
+    done = object()
+
+    def put(item: Any) -> bool:
+        # We don't block forever on a full queue, in case the consumer stops iterating.
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = None
+        try:
+            iterator = iter(iterable)
+            for item in iterator:
+                if not put((item, None)):
+                    break
+            else:
+                put((done, None))
+        except BaseException as e:
+            # Not just `Exception`s, since the consumer would wait forever if we didn't send
+            # anything.
+            put((None, e))
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()  # type: ignore[union-attr]
+
+    thread = threading.Thread(target=produce, daemon=True)
+
+    def consume() -> Iterator[T]:
+        thread.start()
+        try:
+            # Taken by `prefetch_iterable()` itself, see below.
+            yield None  # type: ignore[misc]
+            while True:
+                item, error = items.get()
+                if error is not None:
+                    raise error
+                if item is done:
+                    break
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    # Closing a generator that hasn't started doesn't run its `finally` block, so we start it
+    # here. That way, closing the returned iterator always stops the thread.
+    iterator = consume()
+    next(iterator)
+    return iterator
+
+
 def hash_object(o: Any) -> str:
     """Returns a 32-character hash code of arbitrary Python objects."""
     m = hashlib.blake2b()
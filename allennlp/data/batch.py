@@ -147,22 +147,19 @@ class Batch(Iterable):
                 else:
                     lengths_to_use[field_name][padding_key] = instance_field_lengths[padding_key]
 
-        # Now we actually pad the instances to tensors.
-        field_tensors: Dict[str, list] = defaultdict(list)
+        # Now we actually pad the fields to tensors, and combine the tensors of all the instances
+        # into one big tensor (or set of tensors) per field.  The `Field` classes themselves have
+        # the logic for this, and many of them can pad the fields of the whole batch at once, so
+        # we grab a dictionary of field_name -> field class from the first instance in the batch.
         if verbose:
             logger.info(f"Now actually padding instances to length: {lengths_to_use}")
-        for instance in self.instances:
-            for field, tensors in instance.as_tensor_dict(lengths_to_use).items():
-                field_tensors[field].append(tensors)
-
-        # Finally, we combine the tensors that we got for each instance into one big tensor (or set
-        # of tensors) per field.  The `Field` classes themselves have the logic for batching the
-        # tensors together, so we grab a dictionary of field_name -> field class from the first
-        # instance in the batch.
         field_classes = self.instances[0].fields
         return {
-            field_name: field_classes[field_name].batch_tensors(field_tensor_list)
-            for field_name, field_tensor_list in field_tensors.items()
+            field_name: field_classes[field_name].batch_as_tensors(
+                [instance.fields[field_name] for instance in self.instances],
+                lengths_to_use[field_name],
+            )
+            for field_name in field_classes
         }
 
     def __iter__(self) -> Iterator[Instance]:
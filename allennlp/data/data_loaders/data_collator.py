@@ -1,7 +1,9 @@
-from typing import List
+from typing import Dict, List, Tuple
 
+import torch
 from transformers.data.data_collator import DataCollatorForLanguageModeling
 from allennlp.common import Registrable
+from allennlp.common.checks import ConfigurationError
 from allennlp.data.batch import Batch
 from allennlp.data.data_loaders.data_loader import TensorDict
 from allennlp.data.instance import Instance
@@ -69,3 +71,123 @@ class LanguageModelingDataCollator(DataCollator):
         tensor_dicts[self._field_name][self._namespace]["token_ids"] = inputs
         tensor_dicts[self._field_name][self._namespace]["labels"] = labels
         return tensor_dicts
+
+
+@DataCollator.register("sequence_packing")
+class SequencePackingDataCollator(DataCollator):
+    """
+    Registered as a `DataCollator` with name "sequence_packing".
+
+    Packs the wordpieces of several instances into each row of the input to a transformer, so that
+    batches of short texts don't spend most of their computation on padding. The batch is made with
+    `allennlp_collate()` as usual, and then the following tensors are added to the output of the
+    `PretrainedTransformerIndexer` for the given field, next to `token_ids`, `mask`, and `type_ids`:
+
+    - `packed_token_ids` and `packed_type_ids`, with shape `(num_rows, num_packed_wordpieces)`, where
+    instances are put into rows longest first, into the first row that still has room for them;
+    - `packed_position_ids`, the position of each wordpiece within its own instance;
+    - `packed_segment_ids`, the position of the instance of each wordpiece within its row, or `-1`
+    for padding;
+    - `packed_indices`, with the same shape as `token_ids`, which is the index of each wordpiece
+    in the flattened packed tensors.
+
+    The `PretrainedTransformerEmbedder` (and so the `PretrainedTransformerBackbone`) runs the
+    transformer on the packed tensors when they are given, with an attention mask that only lets
+    the wordpieces of each instance attend to each other, and returns the embeddings of every
+    instance in the usual `(batch_size, num_wordpieces, embedding_size)` shape. This needs a
+    transformer that takes `position_ids` and three-dimensional attention masks, like BERT or RoBERTa.
+
+    Note that attention in each row takes time quadratic in `max_length`, so it should not be much
+    longer than needed to fit a few instances.
+
+    # Parameters
+
+    max_length : `int`
+        The maximum number of wordpieces in a packed row. Instances that are longer than this get
+        a row of their own.
+    field_name : `str`, optional (default = `"tokens"`)
+        The name of the `TextField` to pack.
+    namespace : `str`, optional (default = `"tokens"`)
+        The name of the `PretrainedTransformerIndexer` of that field.
+    """
+
+    def __init__(self, max_length: int, field_name: str = "tokens", namespace: str = "tokens"):
+        self._max_length = max_length
+        self._field_name = field_name
+        self._namespace = namespace
+
+    def __call__(self, instances: List[Instance]) -> TensorDict:
+        tensor_dicts = allennlp_collate(instances)
+        tensors = tensor_dicts[self._field_name][self._namespace]
+        if "segment_concat_mask" in tensors:
+            raise ConfigurationError(
+                "Sequences can't be packed when the PretrainedTransformerIndexer has a max_length."
+            )
+        tensors.update(self.pack(tensors["token_ids"], tensors["mask"], tensors.get("type_ids")))
+        return tensor_dicts
+
+    def _pack_rows(self, lengths: List[int]) -> List[List[int]]:
+        """
+        Puts the instances with the given lengths into rows of at most `max_length`, first fit
+        decreasing, and returns the instances in each row.
+        """
+        rows: List[List[int]] = []
+        room: List[int] = []
+        for index in sorted(range(len(lengths)), key=lambda i: -lengths[i]):
+            for row, row_room in enumerate(room):
+                if lengths[index] <= row_room:
+                    rows[row].append(index)
+                    room[row] -= lengths[index]
+                    break
+            else:
+                rows.append([index])
+                room.append(self._max_length - lengths[index])
+        return rows
+
+    def pack(
+        self, token_ids: torch.Tensor, mask: torch.Tensor, type_ids: torch.Tensor = None
+    ) -> Dict[str, torch.Tensor]:
+        """
+        Packs `token_ids` (and `type_ids`), with shape `(batch_size, num_wordpieces)`, into rows of
+        at most `max_length` wordpieces, and returns the packed tensors described above.
+        """
+        lengths = mask.sum(-1).tolist()
+        rows = self._pack_rows(lengths)
+        # Where each instance goes in the packed tensors, as (row, segment, offset).
+        starts: List[Tuple[int, int, int]] = [(0, 0, 0)] * len(lengths)
+        row_length = 0
+        for row, indices in enumerate(rows):
+            offset = 0
+            for segment, index in enumerate(indices):
+                starts[index] = (row, segment, offset)
+                offset += lengths[index]
+            row_length = max(row_length, offset)
+
+        packed_shape = (len(rows), row_length)
+        packed_token_ids = token_ids.new_zeros(packed_shape)
+        packed_type_ids = None if type_ids is None else type_ids.new_zeros(packed_shape)
+        packed_position_ids = torch.zeros(packed_shape, dtype=torch.long)
+        packed_segment_ids = torch.full(packed_shape, -1, dtype=torch.long)
+        packed_indices = torch.zeros(token_ids.shape, dtype=torch.long)
+        positions = torch.arange(token_ids.size(1))
+        for index, ((row, segment, offset), length) in enumerate(zip(starts, lengths)):
+            # We assume that the wordpieces of each instance come first, as the indexer makes them.
+            packed = slice(offset, offset + length)
+            packed_token_ids[row, packed] = token_ids[index, :length]
+            if packed_type_ids is not None:
+                packed_type_ids[row, packed] = type_ids[index, :length]  # type: ignore
+            packed_position_ids[row, packed] = positions[:length]
+            packed_segment_ids[row, packed] = segment
+            # Padding points at the first wordpiece of the instance; it's masked anyway.
+            packed_indices[index] = row * row_length + offset
+            packed_indices[index, :length] += positions[:length]
+
+        packed = {
+            "packed_token_ids": packed_token_ids,
+            "packed_position_ids": packed_position_ids,
+            "packed_segment_ids": packed_segment_ids,
+            "packed_indices": packed_indices,
+        }
+        if packed_type_ids is not None:
+            packed["packed_type_ids"] = packed_type_ids
+        return packed
@@ -1,8 +1,10 @@
-from typing import Dict, Union, Iterator
+import heapq
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
 
 import torch
 
 from allennlp.common.registrable import Registrable
+from allennlp.common.tqdm import Tqdm
 from allennlp.data.instance import Instance
 from allennlp.data.vocabulary import Vocabulary
 
@@ -28,7 +30,9 @@ class DataLoader(Registrable):
       - [`set_target_device()`](#set_target_device), which updates the device that batch
         tensors should be put it when they are generated in `__iter__()`.
 
-    Additionally, this class should also implement `__len__()` when possible.
+    Additionally, this class should also implement `__len__()` when possible, and
+    [`state_dict()`](#state_dict) and [`load_state_dict()`](#load_state_dict) when it can
+    resume an epoch without making all of its batches again.
 
     The default implementation is
     [`MultiProcessDataLoader`](../multiprocess_data_loader/#multiprocessdataloader).
@@ -50,3 +54,81 @@ class DataLoader(Registrable):
 
     def set_target_device(self, device: torch.device) -> None:
         raise NotImplementedError
+
+    def count_vocab_items(
+        self, counter: Dict[str, Dict[str, int]], max_items_per_namespace: Optional[int] = None
+    ) -> None:
+        """
+        Adds the counts of the vocabulary items in all of the instances to `counter`, like
+        `Instance.count_vocab_items()` does, to build a `Vocabulary` from. Data loaders that read
+        their instances in several processes can count them there, so that only the counts have to
+        be sent to the main process.
+
+        If `max_items_per_namespace` is given, the counts are approximate: whenever a namespace
+        has twice as many items, only this many of the most frequent ones are kept. This bounds the
+        memory used for counting huge namespaces, and the counts of the items that are kept are
+        only off when those items were rare early on.
+        """
+        count_vocab_items(
+            Tqdm.tqdm(self.iter_instances(), desc="counting vocab items"),
+            counter,
+            max_items_per_namespace,
+        )
+
+    def has_equal_batch_counts(self) -> bool:
+        """
+        Returns `True` if, in distributed training, this data loader makes the same number of
+        batches in every worker in each epoch. The trainer then doesn't need to check whether
+        the other workers have run out of batches before each batch.
+        """
+        return False
+
+    def state_dict(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the state needed to make the same batches as the current epoch again (or the
+        next epoch, if none is in progress), or `None` if this data loader can't do that. The
+        trainer saves this in its checkpoints.
+        """
+        return None
+
+    def load_state_dict(self, state_dict: Dict[str, Any], num_batches_to_skip: int = 0) -> None:
+        """
+        Restores a state returned by `state_dict()`, so that the next epoch yields the same batches
+        as the epoch in which `state_dict()` was called, except for the first `num_batches_to_skip`
+        batches, which are left out without being read or collated.
+        """
+        raise NotImplementedError
+
+
+def count_vocab_items(
+    instances: Iterable[Instance],
+    counter: Dict[str, Dict[str, int]],
+    max_items_per_namespace: Optional[int] = None,
+) -> None:
+    """
+    Adds the counts of the vocabulary items in `instances` to `counter`. See
+    `DataLoader.count_vocab_items()` for `max_items_per_namespace`.
+    """
+    for i, instance in enumerate(instances):
+        instance.count_vocab_items(counter)
+        # Looking at the size of every namespace after each instance would take too long.
+        if max_items_per_namespace is not None and i % 1000 == 999:
+            prune_vocab_counts(counter, max_items_per_namespace, 2 * max_items_per_namespace)
+    if max_items_per_namespace is not None:
+        prune_vocab_counts(counter, max_items_per_namespace)
+
+
+def prune_vocab_counts(
+    counter: Dict[str, Dict[str, int]], max_items: int, max_items_before_pruning: int = None
+) -> None:
+    """
+    Drops all but the `max_items` most frequent items of each namespace of `counter` that has more
+    than `max_items_before_pruning` items (by default, `max_items`).
+    """
+    if max_items_before_pruning is None:
+        max_items_before_pruning = max_items
+    for counts in counter.values():
+        if len(counts) > max_items_before_pruning:
+            kept = heapq.nlargest(max_items, counts.items(), key=lambda item: item[1])
+            counts.clear()
+            counts.update(kept)
@@ -0,0 +1,105 @@
+"""
+An on-disk cache of the `Instance`s produced by a `DatasetReader`, used by the
+[`MultiProcessDataLoader`](../multiprocess_data_loader/#multiprocessdataloader)
+when a `cache_directory` is given.
+"""
+from contextlib import contextmanager
+import logging
+import os
+from os import PathLike
+from typing import Any, Callable, Iterator, Union
+
+from allennlp.common.util import hash_object
+from allennlp.data.dataset_readers.dataset_reader import DatasetReader, DatasetReaderInput
+from allennlp.data.instance import Instance
+from allennlp.data.memory_mapped_instances import (
+    MemoryMappedInstances,
+    write_memory_mapped_instances,
+)
+from allennlp.version import VERSION
+
+
+logger = logging.getLogger(__name__)
+
+
+_CACHE_FORMAT_VERSION = 1
+
+
+def _data_path_fingerprint(data_path: DatasetReaderInput) -> Any:
+    if isinstance(data_path, dict):
+        return sorted((key, _data_path_fingerprint(value)) for key, value in data_path.items())
+    if isinstance(data_path, (list, tuple)):
+        return [_data_path_fingerprint(path) for path in data_path]
+    path = os.fspath(data_path)
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+    return path
+
+
+class InstanceCache:
+    """
+    Stores the `Instance`s read from a `data_path` by a `DatasetReader` in a file within
+    `cache_directory`, so that later epochs and later runs can stream them from disk
+    instead of reading and tokenizing the data again.
+
+    The cache is stored in the format of
+    [`MemoryMappedInstances`](../../memory_mapped_instances/#memorymappedinstances), so it can
+    also be used for random access. The instances are cached before they are indexed.
+    This is on purpose: some fields (like the `LabelField`) stop counting vocabulary items once
+    they are indexed, so indexed instances can't be used to build a new vocabulary.
+
+    The cache file is keyed by a fingerprint of the reader's state (which includes the
+    distributed rank), and of the data files (their paths, sizes, and modification times).
+
+    # Parameters
+
+    cache_directory : `Union[str, PathLike]`
+        The directory to put the cache files in. It will be created if it doesn't exist.
+
+    reader : `DatasetReader`
+        The reader that produces the instances. Its pickled state is part of the cache key,
+        so changing any of the reader's parameters invalidates the cache.
+
+    data_path : `DatasetReaderInput`
+        The path(s) the reader reads from.
+    """
+
+    def __init__(
+        self,
+        cache_directory: Union[str, PathLike],
+        reader: DatasetReader,
+        data_path: DatasetReaderInput,
+    ) -> None:
+        key = hash_object(
+            (
+                _CACHE_FORMAT_VERSION,
+                VERSION,
+                type(reader).__module__,
+                type(reader).__qualname__,
+                hash_object(reader),
+                _data_path_fingerprint(data_path),
+            )
+        )
+        os.makedirs(cache_directory, exist_ok=True)
+        self.path = os.path.join(cache_directory, f"{type(reader).__name__}-{key}.instances")
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def read(self) -> MemoryMappedInstances:
+        """
+        Returns the cached instances as a random-access sequence.
+        """
+        return MemoryMappedInstances(self.path)
+
+    @contextmanager
+    def writer(self) -> Iterator[Callable[[Instance], None]]:
+        """
+        A context manager giving a function that appends an instance to a new cache file.
+        The new file replaces the old one (if there is one) only once the context
+        exits without an error, so an interrupted write never leaves a partial cache behind.
+        """
+        with write_memory_mapped_instances(self.path) as write:
+            yield write
+        logger.info("Cached instances to %s", self.path)
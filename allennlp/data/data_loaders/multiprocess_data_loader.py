@@ -1,21 +1,49 @@
-from collections import deque
+from collections import defaultdict, deque
+import copy
 import logging
 from multiprocessing.process import BaseProcess
+from os import PathLike
+import queue as queue_module
 import random
+import threading
 import traceback
-from typing import List, Iterator, Optional, Iterable, Union, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Iterator,
+    Optional,
+    Iterable,
+    Sequence,
+    Union,
+    TypeVar,
+)
 
 from overrides import overrides
 import torch
+import torch.distributed as dist
 import torch.multiprocessing as mp
 
-from allennlp.common.util import lazy_groups_of, shuffle_iterable
+from allennlp.common.util import is_distributed, lazy_groups_of, shuffle_iterable
 from allennlp.common.tqdm import Tqdm
 from allennlp.data.instance import Instance
-from allennlp.data.data_loaders.data_loader import DataLoader, TensorDict
+from allennlp.data.data_loaders.data_loader import (
+    DataLoader,
+    TensorDict,
+    count_vocab_items,
+    prune_vocab_counts,
+)
 from allennlp.data.data_loaders.data_collator import DataCollator, DefaultDataCollator
+from allennlp.data.data_loaders.instance_cache import InstanceCache
+from allennlp.data.data_loaders.shared_memory_buffer import (
+    SharedMemoryBatch,
+    SharedMemoryRingBuffer,
+)
+from allennlp.data.data_loaders.tensorized_instances import TensorizedInstances
 from allennlp.data.dataset_readers import DatasetReader, WorkerInfo, DatasetReaderInput
-from allennlp.data.fields import TextField
+from allennlp.data.fields import Field, ListField, TextField
+from allennlp.data.memory_mapped_instances import MemoryMappedInstances
 from allennlp.data.samplers import BatchSampler
 from allennlp.data.vocabulary import Vocabulary
 import allennlp.nn.util as nn_util
@@ -74,6 +102,11 @@ class MultiProcessDataLoader(DataLoader):
         If specified, exactly `batches_per_epoch` batches will be generated with each call
         to `__iter__()`.
 
+        !!! Note
+            The data loader can only resume an epoch from a training checkpoint (see
+            [`state_dict()`](#state_dict)) when this is not specified and `max_instances_in_memory`
+            is `None`. Otherwise, the trainer has to make all of the batches of the epoch again.
+
     num_workers: `int`, optional (default = `0`)
         The number of workers to use to read `Instances` in parallel.
         If `num_workers = 0`, everything is done in the main process. Otherwise `num_workers`
@@ -114,6 +147,24 @@ class MultiProcessDataLoader(DataLoader):
 
         If you run into these issues, try using "spawn" instead.
 
+        This doesn't apply to thread workers (see `worker_type`).
+
+    worker_type: `str`, optional (default = `"process"`)
+        Whether the workers are separate processes (`"process"`) or threads of the main process
+        (`"thread"`).
+
+        Thread workers start instantly, and they share the memory of the main process, including
+        the vocabulary, so nothing is copied or pickled to start them or to get instances and
+        batches from them. But only one thread at a time can run Python code, so threads only help
+        when most of the work of reading happens in code that releases the GIL, like the fast
+        tokenizers of HuggingFace or decompressing files. Readers that spend most of their time in
+        Python code are faster with process workers.
+
+        Each thread reads with its own deep copy of the `reader`, since tokenizers generally can't
+        be used from several threads at once. The copies are made when the workers start for the
+        first time, and reused in later epochs. Thread workers can't be used with
+        `shared_memory_buffer_size`, which is only useful between processes.
+
     cuda_device: `Optional[Union[int, str, torch.device]]`, optional (default = `None`)
         If given, batches will automatically be put on this device.
 
@@ -127,6 +178,81 @@ class MultiProcessDataLoader(DataLoader):
 
     collate_fn : `DataCollator`, optional ( default = `DefaultDataCollator`)
 
+    cache_directory : `Union[str, PathLike]`, optional (default = `None`)
+        If given, the instances read from `data_path` are cached on disk in this directory
+        (see [`InstanceCache`](../instance_cache/#instancecache)). Once the cache has been written,
+        instances are streamed from it instead of being read and tokenized by the `reader`,
+        both in later epochs and in later runs.
+
+        The cache is keyed by the pickled state of the `reader` and the size and modification time
+        of the data files, so changing either of those invalidates it.
+
+        !!! Note
+            When `max_instances_in_memory` is given and `num_workers > 0`, instances never reach
+            the main process during an epoch, so the cache is only written by
+            [`iter_instances()`](#iter_instances) (e.g. while building a vocabulary). Once it
+            exists, batches are made from the cache in the main process.
+
+    memory_map_instances : `bool`, optional (default = `False`)
+        If `True`, the instances are not kept in memory. Instead they are accessed directly from
+        the memory-mapped cache file in `cache_directory` (which is required for this option),
+        and each instance is only decoded when it's put into a batch.
+
+        Unlike with `max_instances_in_memory`, shuffling and the `batch_sampler` still see the whole
+        dataset, and the `BucketBatchSampler` and `MaxTokensBatchSampler` can sort it by length without
+        decoding any instances. With `num_workers > 0`, the instances of each batch are decoded,
+        indexed, and collated in the workers, which all share the same memory-mapped file.
+
+        This option is mutually exclusive with `max_instances_in_memory`.
+
+    shared_memory_buffer_size : `int`, optional (default = `None`)
+        If given, each worker that makes batches (when using `max_instances_in_memory` or
+        `memory_map_instances` with `num_workers > 0`) gets a ring buffer of this many bytes in
+        shared memory. The workers write the tensors of their batches to these buffers and
+        only send small descriptors to the main process, instead of pickling the tensors.
+        This is much faster for large batches, like long sequences of transformer inputs.
+
+        The buffers are allocated once, when the workers are started. A buffer should be able to
+        hold several batches so that a worker doesn't have to wait for the main process to
+        read a batch before writing the next one. Batches that don't fit are sent the usual way.
+
+        When this is used, the batches are moved to the `cuda_device` by the main process
+        as they are copied out of the buffers.
+
+    cache_instance_tensors : `bool`, optional (default = `False`)
+        If `True`, the tensors of each instance are kept in memory after the first time the
+        instance is put into a batch (see [`TensorizedInstances`](../tensorized_instances/#tensorizedinstances)),
+        so later epochs only need to shuffle, pad, and stack them instead of making them
+        from the fields again. This uses more memory, but for small models the time saved per
+        epoch can be larger than the time spent in the model.
+
+        This option requires all instances to be kept in memory, so it can't be used with
+        `max_instances_in_memory` or `memory_map_instances`, and it only works with the
+        default `collate_fn`.
+
+    drop_tokens : `bool`, optional (default = `False`)
+        If `True`, the `TextField`s of the instances kept in memory drop their `Token` objects once
+        they are indexed, and only keep the indices of the tokens (see
+        [`TextField.drop_tokens()`](../../fields/text_field/#drop_tokens)). This can save a lot of
+        memory with large datasets.
+
+        The instances can't be used to build a vocabulary after they have been indexed, or be
+        indexed again with a different vocabulary. Like `cache_instance_tensors`, this option can't
+        be used with `max_instances_in_memory` or `memory_map_instances`.
+
+    balance_distributed_batches : `bool`, optional (default = `False`)
+        In distributed training, each worker reads its own part of the data, so the workers can end
+        up with different numbers of batches. If this is `True`, the workers agree on the smallest
+        number of batches at the start of each epoch, and each worker leaves out its batches past
+        that number. Then every worker makes the same number of batches (see
+        [`has_equal_batch_counts()`](#has_equal_batch_counts)), so the trainer doesn't have to
+        check whether the other workers are done before every batch. `__len__()` still counts
+        all of the batches of this worker.
+
+        This needs all of the batches of an epoch to be known up front, so it can't be used with
+        `max_instances_in_memory`, unless `batches_per_epoch` is given, in which case the workers
+        make the same number of batches anyway.
+
     # Best practices
 
     - **Large datasets**
@@ -208,9 +334,16 @@ class MultiProcessDataLoader(DataLoader):
         num_workers: int = 0,
         max_instances_in_memory: int = None,
         start_method: str = "fork",
+        worker_type: str = "process",
         cuda_device: Optional[Union[int, str, torch.device]] = None,
         quiet: bool = False,
         collate_fn: DataCollator = DefaultDataCollator(),
+        cache_directory: Optional[Union[str, PathLike]] = None,
+        memory_map_instances: bool = False,
+        shared_memory_buffer_size: Optional[int] = None,
+        cache_instance_tensors: bool = False,
+        drop_tokens: bool = False,
+        balance_distributed_batches: bool = False,
     ) -> None:
         # Do some parameter validation.
         if num_workers is not None and num_workers < 0:
@@ -240,6 +373,48 @@ class MultiProcessDataLoader(DataLoader):
             elif max_instances_in_memory < 1:
                 raise ValueError("max_instances_in_memory must be at least 1")
 
+        if memory_map_instances:
+            if cache_directory is None:
+                raise ValueError("memory_map_instances requires a cache_directory")
+            if max_instances_in_memory is not None:
+                raise ValueError(
+                    "memory_map_instances option is mutually exclusive with max_instances_in_memory"
+                )
+
+        if worker_type not in {"process", "thread"}:
+            raise ValueError(f"worker_type must be 'process' or 'thread', not '{worker_type}'")
+
+        if shared_memory_buffer_size is not None:
+            if shared_memory_buffer_size < 1:
+                raise ValueError("shared_memory_buffer_size must be at least 1")
+            if worker_type == "thread":
+                raise ValueError("shared_memory_buffer_size can't be used with thread workers")
+
+        if cache_instance_tensors:
+            if max_instances_in_memory is not None or memory_map_instances:
+                raise ValueError(
+                    "cache_instance_tensors requires all instances to be kept in memory, so it can't "
+                    "be used with max_instances_in_memory or memory_map_instances"
+                )
+            if not isinstance(collate_fn, DefaultDataCollator):
+                raise ValueError("cache_instance_tensors only works with the default collate_fn")
+
+        if drop_tokens and (max_instances_in_memory is not None or memory_map_instances):
+            raise ValueError(
+                "drop_tokens only applies to instances kept in memory, so it can't be used "
+                "with max_instances_in_memory or memory_map_instances"
+            )
+
+        if (
+            balance_distributed_batches
+            and max_instances_in_memory is not None
+            and batches_per_epoch is None
+        ):
+            raise ValueError(
+                "balance_distributed_batches needs all instances to be kept in memory, so it can't "
+                "be used with max_instances_in_memory unless batches_per_epoch is given"
+            )
+
         self.reader = reader
         self.data_path = data_path
         self.batch_size = batch_size
@@ -250,7 +425,13 @@ class MultiProcessDataLoader(DataLoader):
         self.num_workers = num_workers
         self.collate_fn = collate_fn
         self.max_instances_in_memory = max_instances_in_memory
+        self.memory_map_instances = memory_map_instances
+        self.shared_memory_buffer_size = shared_memory_buffer_size
+        self.cache_instance_tensors = cache_instance_tensors
+        self.drop_tokens = drop_tokens
+        self.balance_distributed_batches = balance_distributed_batches
         self.start_method = start_method
+        self.worker_type = worker_type
         self.quiet = quiet
         self.cuda_device: Optional[torch.device] = None
         if cuda_device is not None:
@@ -259,8 +440,11 @@ class MultiProcessDataLoader(DataLoader):
             else:
                 self.cuda_device = cuda_device
 
-        # Can only initialize CUDA in workers when these `start_methods` are used.
-        self._worker_cuda_safe = self.start_method in {"spawn", "forkserver"}
+        # Can only initialize CUDA in workers when these `start_methods` are used, or when the
+        # workers are threads.
+        self._worker_cuda_safe = (
+            self.start_method in {"spawn", "forkserver"} or self.worker_type == "thread"
+        )
 
         # To make sure we have some backpressure in the worker queues we try to set
         # reasonable defaults for the maximum size of these queues.
@@ -281,12 +465,35 @@ class MultiProcessDataLoader(DataLoader):
             else 2 * self.num_workers * max_instances_in_memory // (effective_batch_size or 1)
         )
 
-        # If max_instances_in_memory is not given, we'll keep a cache of all instances in this list.
-        self._instances: Optional[List[Instance]] = None
+        # If max_instances_in_memory is not given, we'll keep a cache of all instances in this list,
+        # or in the memory-mapped instance cache when memory_map_instances is True.
+        self._instances: Optional[Union[List[Instance], MemoryMappedInstances]] = None
         # Keeps track of state when `batches_per_epoch` is used.
         self._batch_generator: Optional[Iterator[TensorDict]] = None
+        # For sending batches from the workers when `shared_memory_buffer_size` is given.
+        self._shared_memory_buffers: Optional[List[SharedMemoryRingBuffer]] = None
         # For indexing instances.
         self._vocab: Optional[Vocabulary] = None
+        # The vocab that the instances in `self._instances` are indexed with, when they are kept
+        # in memory. They don't need to be indexed again until we get a different vocab.
+        self._indexed_vocab: Optional[Vocabulary] = None
+        # For making batches out of the tensors of each instance when `cache_instance_tensors` is True.
+        self._tensorized_instances: Optional[TensorizedInstances] = None
+        # The state of `random` from right before the batches of the current epoch were made,
+        # for `state_dict()`.
+        self._epoch_random_state: Optional[Any] = None
+        # The state of `random` to make the batches of the next epoch with, and how many of those
+        # batches to skip, from `load_state_dict()`.
+        self._resume_random_state: Optional[Any] = None
+        self._num_batches_to_skip = 0
+        # The copies of the reader for each thread worker, by worker ID.
+        self._thread_worker_readers: Dict[int, DatasetReader] = {}
+        # For caching instances on disk.
+        self._instance_cache: Optional[InstanceCache] = (
+            None
+            if cache_directory is None
+            else InstanceCache(cache_directory, self.reader, self.data_path)
+        )
 
         if self.max_instances_in_memory is None:
             # Load all instances right away.
@@ -295,9 +502,8 @@ class MultiProcessDataLoader(DataLoader):
     @overrides
     def index_with(self, vocab: Vocabulary) -> None:
         self._vocab = vocab
-        if self._instances:
-            for instance in self._instances:
-                instance.index_fields(vocab)
+        if self._instances and not self.memory_map_instances:
+            self._index_in_memory_instances()
 
     @overrides
     def __len__(self) -> int:
@@ -332,7 +538,10 @@ class MultiProcessDataLoader(DataLoader):
             )
 
         if self.batches_per_epoch is None:
-            yield from self._iter_batches()
+            try:
+                yield from self._iter_batches()
+            finally:
+                self._epoch_random_state = None
         else:
             if self._batch_generator is not None:
                 batch_generator = self._batch_generator
@@ -348,27 +557,64 @@ class MultiProcessDataLoader(DataLoader):
                     yield next(batch_generator)
             self._batch_generator = batch_generator
 
+    @overrides
+    def has_equal_batch_counts(self) -> bool:
+        return self.batches_per_epoch is not None or self.balance_distributed_batches
+
+    @overrides
+    def state_dict(self) -> Optional[Dict[str, Any]]:
+        """
+        The batches of an epoch can be made again when all instances are kept in memory, from the
+        state of the `random` module, which the batch sampler and shuffling use.
+        """
+        if self.max_instances_in_memory is not None or self.batches_per_epoch is not None:
+            return None
+        if self._resume_random_state is not None:
+            # We were given this state, and haven't started the epoch yet.
+            return {"random_state": self._resume_random_state}
+        if self._epoch_random_state is not None:
+            return {"random_state": self._epoch_random_state}
+        else:
+            return {"random_state": random.getstate()}
+
+    @overrides
+    def load_state_dict(self, state_dict: Dict[str, Any], num_batches_to_skip: int = 0) -> None:
+        if self.max_instances_in_memory is not None or self.batches_per_epoch is not None:
+            raise ValueError(
+                "The MultiProcessDataLoader can't resume an epoch when max_instances_in_memory "
+                "or batches_per_epoch is given."
+            )
+        self._resume_random_state = state_dict["random_state"]
+        self._num_batches_to_skip = num_batches_to_skip
+
     @overrides
     def iter_instances(self) -> Iterator[Instance]:
         if self._instances:
-            yield from self._instances
+            if self.memory_map_instances:
+                # These instances are freshly decoded, so they need their token indexers
+                # and indices again.
+                for instance in self._instances:
+                    self.reader.apply_token_indexers(instance)
+                    if self._vocab is not None:
+                        instance.index_fields(self._vocab)
+                    yield instance
+            else:
+                yield from self._instances
         else:
             if self.max_instances_in_memory is None:
                 self._instances = []
 
-            if self.num_workers <= 0:
+            if self._instance_cache is not None and self._instance_cache.exists():
+                yield from self._load_instances(
+                    self._instance_cache.read(), desc="loading cached instances"
+                )
+            elif self.num_workers <= 0:
                 # Just read all instances in main process.
-                for instance in self._maybe_tqdm(
-                    self.reader.read(self.data_path), desc="loading instances"
-                ):
-                    self.reader.apply_token_indexers(instance)
-                    if self.max_instances_in_memory is None:
-                        self._instances.append(instance)  # type: ignore
-                    if self._vocab is not None:
-                        instance.index_fields(self._vocab)
-                    yield instance
+                yield from self._load_instances(
+                    self._maybe_cache(self.reader.read(self.data_path)), desc="loading instances"
+                )
             else:
-                ctx = mp.get_context(self.start_method)
+                ctx = self._worker_context()
                 queue: mp.JoinableQueue = (
                     ctx.JoinableQueue()
                     if self._max_instance_queue_size is None
@@ -377,72 +623,316 @@ class MultiProcessDataLoader(DataLoader):
                 workers = self._start_instance_workers(queue, ctx)
 
                 try:
-                    for instance in self._maybe_tqdm(
-                        self._gather_instances(queue), desc="loading instances"
-                    ):
-                        if self.max_instances_in_memory is None:
-                            self._instances.append(instance)  # type: ignore
-                        yield instance
+                    yield from self._load_instances(
+                        self._maybe_cache(self._gather_instances(queue)), desc="loading instances"
+                    )
                 finally:
                     if hasattr(queue, "close"):  # for compat with different Python versions.
                         queue.close()  # type: ignore[attr-defined]
                     self._join_workers(workers, queue)
 
+            if self.memory_map_instances:
+                assert self._instance_cache is not None
+                self._instances = self._instance_cache.read()
+            elif self.max_instances_in_memory is None:
+                # All of the instances have been indexed with this vocab as they were loaded.
+                self._indexed_vocab = self._vocab
+                self._tensorized_instances = None
+
+    @overrides
+    def count_vocab_items(
+        self, counter: Dict[str, Dict[str, int]], max_items_per_namespace: Optional[int] = None
+    ) -> None:
+        """
+        When the instances aren't kept in memory and there are workers, each worker counts the
+        vocabulary items of the instances it reads, and only sends us its counts at the end,
+        instead of sending us every instance to count.
+        """
+        if (
+            self._instances
+            or self.num_workers <= 0
+            or (self._instance_cache is not None and self._instance_cache.exists())
+        ):
+            super().count_vocab_items(counter, max_items_per_namespace)
+            return
+
+        ctx = self._worker_context()
+        queue: mp.JoinableQueue = ctx.JoinableQueue()
+        workers: List[BaseProcess] = []
+        for worker_id in range(self.num_workers):
+            worker: BaseProcess = ctx.Process(
+                target=self._worker_target(self._count_vocab_items_worker, worker_id),
+                args=(worker_id, queue, max_items_per_namespace),
+                daemon=True,
+            )
+            worker.start()
+            workers.append(worker)
+
+        try:
+            # Each worker sends its counts like an instance.
+            for worker_counter in self._gather_instances(queue):
+                for namespace, counts in worker_counter.items():
+                    namespace_counts = counter[namespace]
+                    for item, count in counts.items():
+                        namespace_counts[item] += count
+        finally:
+            if hasattr(queue, "close"):  # for compat with different Python versions.
+                queue.close()  # type: ignore[attr-defined]
+            self._join_workers(workers, queue)
+        if max_items_per_namespace is not None:
+            prune_vocab_counts(counter, max_items_per_namespace)
+
+    def _load_instances(self, instances: Iterable[Instance], desc: str) -> Iterator[Instance]:
+        for instance in self._maybe_tqdm(instances, desc=desc):
+            self.reader.apply_token_indexers(instance)
+            if self.max_instances_in_memory is None and not self.memory_map_instances:
+                self._instances.append(instance)  # type: ignore
+            if self._vocab is not None:
+                instance.index_fields(self._vocab)
+                if self.drop_tokens:
+                    _drop_tokens(instance.fields.values())
+            yield instance
+
+    def _maybe_cache(self, instances: Iterable[Instance]) -> Iterable[Instance]:
+        if self._instance_cache is None:
+            return instances
+        return self._write_to_cache(instances)
+
+    def _write_to_cache(self, instances: Iterable[Instance]) -> Iterator[Instance]:
+        assert self._instance_cache is not None
+        # The cache only gets written if we make it all the way through `instances`.
+        with self._instance_cache.writer() as write:
+            for instance in instances:
+                write(instance)
+                yield instance
+
     @overrides
     def set_target_device(self, device: torch.device) -> None:
         self.cuda_device = device
 
     def _iter_batches(self) -> Iterator[TensorDict]:
-        if self._instances is not None or self.num_workers <= 0:
+        if self.memory_map_instances:
+            yield from self._iter_memory_mapped_batches()
+        elif self.max_instances_in_memory is None:
+            yield from self._iter_in_memory_batches()
+        elif (
+            self._instances is not None
+            or self.num_workers <= 0
+            or (self._instance_cache is not None and self._instance_cache.exists())
+        ):
             for batch in self._instances_to_batches(self.iter_instances(), move_to_device=True):
                 yield batch
         else:
-            ctx = mp.get_context(self.start_method)
+            ctx = self._worker_context()
 
             queue: mp.JoinableQueue = (
                 ctx.JoinableQueue()
                 if self._max_batch_queue_size is None
                 else ctx.JoinableQueue(maxsize=self._max_batch_queue_size)
             )
-            workers = self._start_batch_workers(queue, ctx)
+            buffers = self._get_shared_memory_buffers(ctx)
+            workers = self._start_batch_workers(queue, ctx, buffers)
 
             try:
                 # We can now start consuming from the `queue` as the batch workers
                 # produce batches.
-                done_count: int = 0
-                while done_count < self.num_workers:
-                    for batch, worker_error in iter(queue.get, (None, None)):
-                        if worker_error is not None:
-                            e, tb = worker_error
-                            raise WorkerError(e, tb)
-
-                        if not self._worker_cuda_safe and self.cuda_device is not None:
-                            # Need to move batch to target device now.
-                            batch = nn_util.move_to_device(batch, self.cuda_device)
-                        yield batch
-                        queue.task_done()
-                    done_count += 1
+                yield from self._gather_batches(queue, buffers)
             finally:
                 if hasattr(queue, "close"):  # for compat with different Python versions.
                     queue.close()  # type: ignore[attr-defined]
                 self._join_workers(workers, queue)
 
+    def _epoch_batch_indices(self, instances: Sequence[Instance]) -> List[List[int]]:
+        """
+        Splits the whole dataset into the batches of instance indices of a new epoch, leaving out
+        the batches to skip from `load_state_dict()`.
+        """
+        if self._resume_random_state is not None:
+            random.setstate(self._resume_random_state)
+            self._resume_random_state = None
+        self._epoch_random_state = random.getstate()
+        batches = self._batch_indices(instances)
+        if self.balance_distributed_batches and is_distributed():
+            batches = self._balance_batches(batches)
+        num_batches_to_skip, self._num_batches_to_skip = self._num_batches_to_skip, 0
+        return batches[num_batches_to_skip:]
+
+    def _balance_batches(self, batches: List[List[int]]) -> List[List[int]]:
+        """
+        Leaves out the batches past the smallest number of batches of any worker in distributed
+        training, so that every worker has the same number of batches.
+        """
+        num_batches = torch.tensor(len(batches), device=self.cuda_device)
+        dist.all_reduce(num_batches, dist.ReduceOp.MIN)
+        min_num_batches = int(num_batches.item())
+        if min_num_batches < len(batches):
+            logger.info(
+                "Leaving out %d of %d batches to match the other workers",
+                len(batches) - min_num_batches,
+                len(batches),
+            )
+        return batches[:min_num_batches]
+
+    def _batch_indices(self, instances: Sequence[Instance]) -> List[List[int]]:
+        """
+        Splits the whole dataset into batches of instance indices.
+        """
+        if self.batch_sampler is not None:
+            return list(self.batch_sampler.get_batch_indices(instances))
+        # Safe to assume this is not `None` when `self.batch_sampler` is `None`.
+        assert self.batch_size is not None
+        indices = list(range(len(instances)))
+        if self.shuffle:
+            random.shuffle(indices)
+        return [
+            batch
+            for batch in lazy_groups_of(indices, self.batch_size)
+            if not (self.drop_last and len(batch) < self.batch_size)
+        ]
+
+    def _index_in_memory_instances(self) -> None:
+        assert self._vocab is not None
+        if self._indexed_vocab is self._vocab:
+            return
+        for instance in self._instances:  # type: ignore
+            # `index_fields()` does nothing for instances that were indexed with another vocab.
+            instance.indexed = False
+            instance.index_fields(self._vocab)
+            if self.drop_tokens:
+                _drop_tokens(instance.fields.values())
+        self._indexed_vocab = self._vocab
+        self._tensorized_instances = None
+
+    def _iter_in_memory_batches(self) -> Iterator[TensorDict]:
+        if not self._instances:
+            deque(self.iter_instances(), maxlen=0)
+        instances = self._instances
+        assert isinstance(instances, list)
+
+        # The instances already have their token indexers, and they only need to be indexed again
+        # when the vocab has changed.
+        self._index_in_memory_instances()
+        collate: Callable[[List[int]], TensorDict]
+        if self.cache_instance_tensors:
+            if self._tensorized_instances is None:
+                self._tensorized_instances = TensorizedInstances(instances)
+            collate = self._tensorized_instances.collate
+        else:
+            collate = lambda batch_indices: self.collate_fn(  # noqa: E731
+                [instances[i] for i in batch_indices]
+            )
+
+        for batch_indices in self._epoch_batch_indices(instances):
+            batch = collate(batch_indices)
+            if self.cuda_device is not None:
+                batch = nn_util.move_to_device(batch, self.cuda_device)
+            yield batch
+
+    def _iter_memory_mapped_batches(self) -> Iterator[TensorDict]:
+        if not self._instances:
+            deque(self.iter_instances(), maxlen=0)
+        instances = self._instances
+        assert isinstance(instances, MemoryMappedInstances)
+
+        # The whole dataset is available here, but we only need the indices of the instances
+        # in each batch. They get decoded when the batch is made.
+        batches = self._epoch_batch_indices(instances)
+
+        if self.num_workers <= 0:
+            for batch_indices in batches:
+                yield self._memory_mapped_batch(batch_indices, move_to_device=True)
+        else:
+            ctx = self._worker_context()
+            queue: mp.JoinableQueue = ctx.JoinableQueue()
+            buffers = self._get_shared_memory_buffers(ctx)
+            workers = self._start_batch_workers(queue, ctx, buffers, batches)
+
+            try:
+                yield from self._gather_batches(queue, buffers)
+            finally:
+                if hasattr(queue, "close"):  # for compat with different Python versions.
+                    queue.close()  # type: ignore[attr-defined]
+                self._join_workers(workers, queue)
+
+    def _memory_mapped_batch(self, batch_indices: List[int], move_to_device: bool) -> TensorDict:
+        batch = self.collate_fn(
+            [self._index_instance(self._instances[i]) for i in batch_indices]  # type: ignore
+        )
+        if move_to_device and self.cuda_device is not None:
+            batch = nn_util.move_to_device(batch, self.cuda_device)
+        return batch
+
+    def _worker_context(self):
+        """
+        Returns the multiprocessing context that starts the workers, or something that acts
+        like one for thread workers.
+        """
+        if self.worker_type == "thread":
+            return _ThreadContext()
+        return mp.get_context(self.start_method)
+
+    def _worker_target(self, worker: Callable, worker_id: int) -> Callable:
+        """
+        Returns the method to run in a worker. Worker processes have their own copy of this data
+        loader anyway, but thread workers get a copy with a copy of the reader, so that they can
+        read at the same time. Each thread worker gets the same copy of the reader every time.
+        """
+        if self.worker_type != "thread":
+            return worker
+        if worker_id not in self._thread_worker_readers:
+            self._thread_worker_readers[worker_id] = copy.deepcopy(self.reader)
+        data_loader = copy.copy(self)
+        data_loader.reader = self._thread_worker_readers[worker_id]
+        return getattr(data_loader, worker.__name__)
+
     def _start_instance_workers(self, queue: mp.JoinableQueue, ctx) -> List[BaseProcess]:
         workers: List[BaseProcess] = []
         for worker_id in range(self.num_workers):
             worker: BaseProcess = ctx.Process(
-                target=self._instance_worker, args=(worker_id, queue), daemon=True
+                target=self._worker_target(self._instance_worker, worker_id),
+                args=(worker_id, queue),
+                daemon=True,
             )
             worker.start()
             workers.append(worker)
         return workers
 
-    def _start_batch_workers(self, queue: mp.JoinableQueue, ctx) -> List[BaseProcess]:
+    def _get_shared_memory_buffers(self, ctx) -> Optional[List[SharedMemoryRingBuffer]]:
+        if self.shared_memory_buffer_size is None:
+            return None
+        if self._shared_memory_buffers is None:
+            # The buffers are allocated once and reused by the workers of every epoch.
+            self._shared_memory_buffers = [
+                SharedMemoryRingBuffer(worker_id, self.shared_memory_buffer_size, ctx)
+                for worker_id in range(self.num_workers)
+            ]
+        for buffer in self._shared_memory_buffers:
+            buffer.reset()
+        return self._shared_memory_buffers
+
+    def _start_batch_workers(
+        self,
+        queue: mp.JoinableQueue,
+        ctx,
+        buffers: Optional[List[SharedMemoryRingBuffer]] = None,
+        batches: Optional[List[List[int]]] = None,
+    ) -> List[BaseProcess]:
         workers: List[BaseProcess] = []
         for worker_id in range(self.num_workers):
-            worker: BaseProcess = ctx.Process(
-                target=self._batch_worker, args=(worker_id, queue), daemon=True
-            )
+            buffer = None if buffers is None else buffers[worker_id]
+            if batches is None:
+                worker: BaseProcess = ctx.Process(
+                    target=self._worker_target(self._batch_worker, worker_id),
+                    args=(worker_id, queue, buffer),
+                    daemon=True,
+                )
+            else:
+                # Memory-mapped instances: each worker makes every `num_workers`-th batch.
+                worker = ctx.Process(
+                    target=self._worker_target(self._memory_mapped_batch_worker, worker_id),
+                    args=(worker_id, queue, batches[worker_id :: self.num_workers], buffer),
+                    daemon=True,
+                )
             worker.start()
             workers.append(worker)
         return workers
@@ -457,6 +947,13 @@ class MultiProcessDataLoader(DataLoader):
             except ValueError:
                 # This happens if a worker died early.
                 break
+        if isinstance(queue, _ThreadWorkerQueue):
+            # Threads can't be terminated, so we ask them to stop, which they do the next time
+            # they use the queue, in case they aren't done yet.
+            queue.stop()
+            for worker in workers:
+                worker.join()
+            return
         # If for some reason the workers don't exit properly, we go through and terminate
         # them anyway.
         for worker in workers:
@@ -473,17 +970,7 @@ class MultiProcessDataLoader(DataLoader):
                 # token_indexers because we don't want to be duplicating those by sending
                 # them across processes.
                 if not checked_for_token_indexers:
-                    for field_name, field in instance.fields.items():
-                        if isinstance(field, TextField) and field._token_indexers is not None:
-                            raise ValueError(
-                                f"Found a TextField ({field_name}) with token_indexers already "
-                                "applied, but you're using num_workers > 0 in your data loader. "
-                                "Make sure your dataset reader's text_to_instance() method doesn't "
-                                "add any token_indexers to the TextFields it creates. Instead, the token_indexers "
-                                "should be added to the instances in the apply_token_indexers() method of your "
-                                "dataset reader (which you'll have to implement if you haven't done "
-                                "so already)."
-                            )
+                    _check_no_token_indexers(instance)
                     checked_for_token_indexers = True
                 queue.put((instance, None))
         except Exception as e:
@@ -495,14 +982,68 @@ class MultiProcessDataLoader(DataLoader):
         # Wait until this process can safely exit.
         queue.join()
 
-    def _batch_worker(self, worker_id: int, queue: mp.JoinableQueue) -> None:
+    def _count_vocab_items_worker(
+        self, worker_id: int, queue: mp.JoinableQueue, max_items_per_namespace: Optional[int]
+    ) -> None:
+        try:
+            self.reader._set_worker_info(WorkerInfo(self.num_workers, worker_id))
+            counter: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+            count_vocab_items(
+                self._apply_token_indexers(self.reader.read(self.data_path)),
+                counter,
+                max_items_per_namespace,
+            )
+            # The default dicts can't be pickled.
+            queue.put(({namespace: dict(counts) for namespace, counts in counter.items()}, None))
+        except Exception as e:
+            queue.put((None, (repr(e), traceback.format_exc())))
+
+        # Indicate to the consumer that this worker is finished.
+        queue.put((None, None))
+
+        # Wait until this process can safely exit.
+        queue.join()
+
+    def _apply_token_indexers(self, instances: Iterable[Instance]) -> Iterator[Instance]:
+        for instance in instances:
+            self.reader.apply_token_indexers(instance)
+            yield instance
+
+    def _batch_worker(
+        self,
+        worker_id: int,
+        queue: mp.JoinableQueue,
+        buffer: Optional[SharedMemoryRingBuffer] = None,
+    ) -> None:
         try:
             self.reader._set_worker_info(WorkerInfo(self.num_workers, worker_id))
             instances = self.reader.read(self.data_path)
             for batch in self._instances_to_batches(
-                instances, move_to_device=self._worker_cuda_safe
+                instances, move_to_device=self._worker_cuda_safe and buffer is None
             ):
-                queue.put((batch, None))
+                queue.put((batch if buffer is None else buffer.write(batch), None))
+        except Exception as e:
+            queue.put((None, (repr(e), traceback.format_exc())))
+
+        # Indicate to the consumer (main thread) that this worker is finished.
+        queue.put((None, None))
+
+        # Wait until this process can safely exit.
+        queue.join()
+
+    def _memory_mapped_batch_worker(
+        self,
+        worker_id: int,
+        queue: mp.JoinableQueue,
+        batches: List[List[int]],
+        buffer: Optional[SharedMemoryRingBuffer] = None,
+    ) -> None:
+        try:
+            for batch_indices in batches:
+                batch = self._memory_mapped_batch(
+                    batch_indices, move_to_device=self._worker_cuda_safe and buffer is None
+                )
+                queue.put((batch if buffer is None else buffer.write(batch), None))
         except Exception as e:
             queue.put((None, (repr(e), traceback.format_exc())))
 
@@ -512,6 +1053,31 @@ class MultiProcessDataLoader(DataLoader):
         # Wait until this process can safely exit.
         queue.join()
 
+    def _gather_batches(
+        self,
+        queue: mp.JoinableQueue,
+        buffers: Optional[List[SharedMemoryRingBuffer]] = None,
+    ) -> Iterator[TensorDict]:
+        done_count: int = 0
+        while done_count < self.num_workers:
+            for batch, worker_error in iter(queue.get, (None, None)):
+                if worker_error is not None:
+                    e, tb = worker_error
+                    raise WorkerError(e, tb)
+
+                if isinstance(batch, SharedMemoryBatch):
+                    assert buffers is not None
+                    # This copies the batch straight to the target device, if there is one.
+                    batch = buffers[batch.worker_id].read(batch, self.cuda_device)
+                elif (
+                    not self._worker_cuda_safe or buffers is not None
+                ) and self.cuda_device is not None:
+                    # Need to move batch to target device now.
+                    batch = nn_util.move_to_device(batch, self.cuda_device)
+                yield batch
+                queue.task_done()
+            done_count += 1
+
     def _gather_instances(self, queue: mp.JoinableQueue) -> Iterable[Instance]:
         done_count: int = 0
         while done_count < self.num_workers:
@@ -520,9 +1086,6 @@ class MultiProcessDataLoader(DataLoader):
                     e, tb = worker_error
                     raise WorkerError(e, tb)
 
-                self.reader.apply_token_indexers(instance)
-                if self._vocab is not None:
-                    instance.index_fields(self._vocab)
                 yield instance
                 queue.task_done()
             done_count += 1
@@ -587,6 +1150,90 @@ class MultiProcessDataLoader(DataLoader):
         return Tqdm.tqdm(iterator, **tqdm_kwargs)
 
 
+def _check_no_token_indexers(instance: Instance) -> None:
+    for field_name, field in instance.fields.items():
+        if isinstance(field, TextField) and field._token_indexers is not None:
+            raise ValueError(
+                f"Found a TextField ({field_name}) with token_indexers already "
+                "applied, but you're using num_workers > 0 in your data loader. "
+                "Make sure your dataset reader's text_to_instance() method doesn't "
+                "add any token_indexers to the TextFields it creates. Instead, the token_indexers "
+                "should be added to the instances in the apply_token_indexers() method of your "
+                "dataset reader (which you'll have to implement if you haven't done "
+                "so already)."
+            )
+
+
+def _drop_tokens(fields: Iterable[Field]) -> None:
+    for field in fields:
+        if isinstance(field, TextField):
+            field.drop_tokens()
+        elif isinstance(field, ListField):
+            _drop_tokens(field.field_list)
+
+
+class _WorkerStopped(BaseException):
+    """
+    Raised in a thread worker when it uses its queue after being asked to stop. It isn't an
+    `Exception`, so that the workers don't handle it like an error of the reader.
+    """
+
+
+class _ThreadWorkerQueue(queue_module.Queue):
+    """
+    A queue for thread workers that acts like a `JoinableQueue`, and that can be stopped, which
+    makes the workers exit when they try to put something into it, or wait for it to be joined.
+    """
+
+    def __init__(self, maxsize: int = 0) -> None:
+        super().__init__(maxsize)
+        self._stopped = False
+
+    def stop(self) -> None:
+        with self.mutex:
+            self._stopped = True
+            self.not_full.notify_all()
+            self.all_tasks_done.notify_all()
+
+    def put(self, item, block: bool = True, timeout: Optional[float] = None) -> None:
+        with self.not_full:
+            while not self._stopped and 0 < self.maxsize <= self._qsize():
+                self.not_full.wait()
+            if self._stopped:
+                raise _WorkerStopped()
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def join(self) -> None:
+        with self.all_tasks_done:
+            while self.unfinished_tasks and not self._stopped:
+                self.all_tasks_done.wait()
+            if self._stopped:
+                raise _WorkerStopped()
+
+
+def _run_thread_worker(target: Callable, args: Sequence[Any]) -> None:
+    try:
+        target(*args)
+    except _WorkerStopped:
+        pass
+
+
+class _ThreadContext:
+    """
+    Starts thread workers in place of a multiprocessing context.
+    """
+
+    @staticmethod
+    def JoinableQueue(maxsize: int = 0) -> _ThreadWorkerQueue:
+        return _ThreadWorkerQueue(maxsize)
+
+    @staticmethod
+    def Process(target: Callable, args: Sequence[Any], daemon: bool) -> threading.Thread:
+        return threading.Thread(target=_run_thread_worker, args=(target, args), daemon=daemon)
+
+
 class WorkerError(Exception):
     """
     An error raised when a worker fails.
@@ -11,6 +11,7 @@ from allennlp.data.data_loaders.data_loader import DataLoader, TensorDict
 from allennlp.data.data_loaders.multiprocess_data_loader import MultiProcessDataLoader
 from allennlp.data.data_loaders.multitask_scheduler import MultiTaskScheduler
 from allennlp.data.data_loaders.multitask_epoch_sampler import MultiTaskEpochSampler
+from allennlp.data.data_loaders.shared_worker_pool import SharedWorkerPool
 from allennlp.data.dataset_readers.multitask import MultiTaskDatasetReader
 from allennlp.data.instance import Instance
 from allennlp.data.vocabulary import Vocabulary
@@ -87,6 +88,17 @@ class MultiTaskDataLoader(DataLoader):
         Used when creating one `MultiProcessDataLoader` per dataset.  If you want non-default
         behavior for this parameter in the `DataLoader` for a particular dataset, pass the
         corresponding value here, keyed by the dataset name.
+    shared_workers: `int`, optional (default = `None`)
+        If given, one pool of this many worker processes reads the instances of all datasets (see
+        [`SharedWorkerPool`](../shared_worker_pool/#sharedworkerpool)), instead of each dataset
+        having `num_workers` of its own. The workers read from whichever datasets the `scheduler`
+        takes instances from, so when the `sampler` draws more from some datasets, more of the
+        workers' time goes to those datasets. This can't be used together with `num_workers`
+        or `start_method`.
+    shared_workers_chunk_size: `int`, optional (default = `32`)
+        The number of instances that a worker of the shared pool reads at a time.
+    shared_workers_start_method: `str`, optional (default = `"fork"`)
+        The start method of the workers of the shared pool.
     shuffle: `bool`, optional (default = `True`)
         If `False`, we will not shuffle the instances that come from each underlying data loader.
         You almost certainly never want to use this except when debugging.
@@ -112,6 +124,9 @@ class MultiTaskDataLoader(DataLoader):
         start_method: Dict[str, str] = None,
         instance_queue_size: Dict[str, int] = None,
         instance_chunk_size: Dict[str, int] = None,
+        shared_workers: int = None,
+        shared_workers_chunk_size: int = 32,
+        shared_workers_start_method: str = "fork",
         shuffle: bool = True,
         cuda_device: Optional[Union[int, str, torch.device]] = None,
     ) -> None:
@@ -145,6 +160,19 @@ class MultiTaskDataLoader(DataLoader):
                 f"Mismatch between readers ({self.readers.keys()}) and data paths "
                 f"({self.data_paths.keys()})"
             )
+        self._shared_worker_pool: Optional[SharedWorkerPool] = None
+        if shared_workers is not None:
+            if self._num_workers or self._start_method:
+                raise ValueError(
+                    "num_workers and start_method can't be given when the workers are shared"
+                )
+            self._shared_worker_pool = SharedWorkerPool(
+                self.readers,
+                self.data_paths,
+                shared_workers,
+                chunk_size=shared_workers_chunk_size,
+                start_method=shared_workers_start_method,
+            )
         self._loaders = {key: self._make_data_loader(key) for key in self.readers}
 
         # This stores our current iterator with each dataset, so we don't just iterate over the
@@ -212,6 +240,13 @@ class MultiTaskDataLoader(DataLoader):
         for loader in self._loaders.values():
             yield from loader.iter_instances()
 
+    @overrides
+    def count_vocab_items(
+        self, counter: Dict[str, Dict[str, int]], max_items_per_namespace: Optional[int] = None
+    ) -> None:
+        for loader in self._loaders.values():
+            loader.count_vocab_items(counter, max_items_per_namespace)
+
     @overrides
     def index_with(self, vocab: Vocabulary) -> None:
         for loader in self._loaders.values():
@@ -246,7 +281,11 @@ class MultiTaskDataLoader(DataLoader):
 
     def _make_data_loader(self, key: str) -> MultiProcessDataLoader:
         kwargs: Dict[str, Any] = {
-            "reader": self.readers[key],
+            # With a shared pool of workers, this loader reads in the main process, taking the
+            # instances that the pool's workers read.
+            "reader": self.readers[key]
+            if self._shared_worker_pool is None
+            else self._shared_worker_pool.reader(key),
             "data_path": self.data_paths[key],
             # We don't load batches from this data loader, only instances, but we have to set
             # something for the batch size, so we set 1.
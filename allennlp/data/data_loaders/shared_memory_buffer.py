@@ -0,0 +1,218 @@
+"""
+A ring buffer in shared memory that the batch workers of the
+[`MultiProcessDataLoader`](../multiprocess_data_loader/#multiprocessdataloader) use to send
+batches to the main process without pickling their tensors.
+"""
+import logging
+from typing import Any, Callable, Iterator, NamedTuple, Optional, Tuple, Union
+
+import numpy
+import torch
+
+from allennlp.data.data_loaders.data_loader import TensorDict
+
+
+logger = logging.getLogger(__name__)
+
+
+# Tensors of these types are written to and read from the buffer through a numpy view of it.
+_NUMPY_DTYPES = {
+    torch.bool: numpy.bool_,
+    torch.uint8: numpy.uint8,
+    torch.int8: numpy.int8,
+    torch.int16: numpy.int16,
+    torch.int32: numpy.int32,
+    torch.int64: numpy.int64,
+    torch.float16: numpy.float16,
+    torch.float32: numpy.float32,
+    torch.float64: numpy.float64,
+}
+
+
+# Every tensor in the buffer starts at a multiple of this many bytes.
+_ALIGNMENT = 64
+
+
+def _aligned(num_bytes: int) -> int:
+    return (num_bytes + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class _TensorLocation(NamedTuple):
+    offset: int
+    dtype: torch.dtype
+    shape: Tuple[int, ...]
+
+
+class SharedMemoryBatch(NamedTuple):
+    """
+    What a worker sends through the queue in place of a batch that it wrote to its
+    [`SharedMemoryRingBuffer`](#sharedmemoryringbuffer).
+    """
+
+    worker_id: int
+    # The batch, with every tensor replaced by its location in the buffer.
+    structure: Any
+    # The number of bytes to release once the batch has been read. This includes the
+    # unused space at the end of the buffer if the batch had to wrap around.
+    num_bytes: int
+
+
+def _tensors(obj: Any) -> Iterator[torch.Tensor]:
+    if isinstance(obj, torch.Tensor):
+        yield obj
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from _tensors(value)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            yield from _tensors(item)
+
+
+def _map_leaves(obj: Any, leaf_type: type, function: Callable[[Any], Any]) -> Any:
+    if isinstance(obj, leaf_type):
+        return function(obj)
+    elif isinstance(obj, dict):
+        return {key: _map_leaves(value, leaf_type, function) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [_map_leaves(item, leaf_type, function) for item in obj]
+    elif isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        # This is the best way to detect a NamedTuple, it turns out.
+        return obj.__class__(*(_map_leaves(item, leaf_type, function) for item in obj))
+    elif isinstance(obj, tuple):
+        return tuple(_map_leaves(item, leaf_type, function) for item in obj)
+    else:
+        return obj
+
+
+class SharedMemoryRingBuffer:
+    """
+    A fixed block of shared memory that one worker process writes batches into and the
+    main process reads them out of, in the same order. Only a small `SharedMemoryBatch`
+    describing where the tensors are needs to go through the queue between them, so the
+    tensors aren't pickled, and no new shared memory is allocated for every batch.
+
+    The buffer is used as a ring: each batch is written right after the previous one, wrapping
+    around to the start of the buffer when it gets to the end. The worker blocks when the buffer
+    is full until the main process has read enough batches to make room.
+
+    Batches that can't be written to the buffer, because they are bigger than the whole
+    buffer or because they contain tensors that aren't on the CPU or that have a type numpy
+    doesn't support (like `torch.bfloat16`), are returned as they are by `write()`, so they
+    can be sent through the queue instead.
+
+    The buffer has to be created in the main process before the worker is started, so that
+    the worker gets access to the same shared memory. It can be reused by later workers
+    after calling [`reset()`](#reset).
+
+    # Parameters
+
+    worker_id : `int`
+        The ID of the worker that writes to this buffer.
+
+    size : `int`
+        The size of the buffer in bytes.
+
+    ctx : `multiprocessing.context.BaseContext`
+        The multiprocessing context that the worker is started with.
+    """
+
+    def __init__(self, worker_id: int, size: int, ctx) -> None:
+        self.worker_id = worker_id
+        self.size = size
+        self._buffer = torch.empty(size, dtype=torch.uint8).share_memory_()
+        # Both counts only ever go up, the difference between them is the number of bytes in use.
+        # Only the worker uses `_bytes_written`, so it doesn't need to be shared.
+        self._bytes_written = 0
+        self._bytes_released = ctx.Value("q", 0, lock=False)
+        self._space_released = ctx.Condition()
+        self._warned = False
+
+    def reset(self) -> None:
+        """
+        Marks the whole buffer as free, so that it can be used by a new worker. This must only
+        be called while no worker is using the buffer.
+        """
+        self._bytes_written = 0
+        self._bytes_released.value = 0
+
+    def write(self, batch: TensorDict) -> Union[SharedMemoryBatch, TensorDict]:
+        """
+        Copies the tensors of the `batch` into the buffer, and returns a `SharedMemoryBatch`
+        that [`read()`](#read) turns back into the batch. If the batch can't be written to
+        the buffer, it's returned unchanged.
+
+        This should only be called by the worker that the buffer belongs to.
+        """
+        num_bytes = 0
+        for tensor in _tensors(batch):
+            if tensor.device.type != "cpu" or tensor.dtype not in _NUMPY_DTYPES:
+                return batch
+            num_bytes += _aligned(tensor.numel() * tensor.element_size())
+        if num_bytes > self.size:
+            if not self._warned:
+                logger.warning(
+                    "A batch of %d bytes doesn't fit in the shared memory buffer of %d bytes, "
+                    "so it's sent through the queue instead. "
+                    "Consider increasing 'shared_memory_buffer_size'.",
+                    num_bytes,
+                    self.size,
+                )
+                self._warned = True
+            return batch
+
+        start = self._bytes_written % self.size
+        if start + num_bytes <= self.size:
+            # The space we write to was last used by the batches written one lap earlier.
+            required_bytes_released = self._bytes_written + num_bytes - self.size
+        else:
+            # The batch doesn't fit between the current position and the end of the buffer,
+            # so we skip the rest of the buffer and write it at the start, over the batches
+            # written earlier in this lap.
+            required_bytes_released = min(
+                self._bytes_written - start + num_bytes, self._bytes_written
+            )
+            num_bytes += self.size - start
+            start = 0
+        with self._space_released:
+            self._space_released.wait_for(
+                lambda: self._bytes_released.value >= required_bytes_released
+            )
+
+        offset = start
+
+        def write_tensor(tensor: torch.Tensor) -> _TensorLocation:
+            nonlocal offset
+            location = _TensorLocation(offset, tensor.dtype, tuple(tensor.shape))
+            self._view(location).copy_(tensor)
+            offset += _aligned(tensor.numel() * tensor.element_size())
+            return location
+
+        structure = _map_leaves(batch, torch.Tensor, write_tensor)
+        self._bytes_written += num_bytes
+        return SharedMemoryBatch(self.worker_id, structure, num_bytes)
+
+    def read(
+        self, shared_memory_batch: SharedMemoryBatch, device: Optional[torch.device] = None
+    ) -> TensorDict:
+        """
+        Copies the tensors of a batch written by [`write()`](#write) out of the buffer, straight
+        to the given `device` if there is one, and frees up their space in the buffer.
+
+        Batches have to be read in the order in which they were written.
+        """
+
+        def read_tensor(location: _TensorLocation) -> torch.Tensor:
+            tensor = self._view(location)
+            return tensor.clone() if device is None else tensor.to(device, copy=True)
+
+        batch = _map_leaves(shared_memory_batch.structure, _TensorLocation, read_tensor)
+        with self._space_released:
+            self._bytes_released.value += shared_memory_batch.num_bytes
+            self._space_released.notify()
+        return batch
+
+    def _view(self, location: _TensorLocation) -> torch.Tensor:
+        dtype = numpy.dtype(_NUMPY_DTYPES[location.dtype])
+        num_bytes = int(numpy.prod(location.shape, dtype=numpy.int64)) * dtype.itemsize
+        array = self._buffer.numpy()[location.offset : location.offset + num_bytes]
+        return torch.from_numpy(array.view(dtype).reshape(location.shape))
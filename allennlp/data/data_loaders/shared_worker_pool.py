@@ -0,0 +1,244 @@
+"""
+A pool of worker processes that reads the instances of several datasets, used by the
+[`MultiTaskDataLoader`](../multitask_data_loader/#multitaskdataloader) when `shared_workers`
+is given.
+"""
+from collections import deque
+import itertools
+import logging
+from multiprocessing.process import BaseProcess
+import queue
+import traceback
+import weakref
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import torch.multiprocessing as mp
+
+from allennlp.data.data_loaders.multiprocess_data_loader import (
+    WorkerError,
+    _check_no_token_indexers,
+)
+from allennlp.data.dataset_readers import DatasetReader, WorkerInfo
+from allennlp.data.instance import Instance
+
+
+logger = logging.getLogger(__name__)
+
+
+# How many requests for chunks of a dataset each worker has waiting at a time, so that it doesn't
+# have to wait for us to ask for the next chunk.
+_REQUESTS_PER_WORKER = 2
+
+
+class SharedWorkerPool:
+    """
+    A fixed number of worker processes that read instances from any of the given datasets, on
+    demand. Each worker reads its own share of every dataset, like the instance workers of a
+    `MultiProcessDataLoader` do (see [`WorkerInfo`](../../dataset_readers/dataset_reader/#workerinfo)),
+    but a worker only reads from a dataset when we ask it for instances from that dataset, and
+    only a couple of chunks ahead of what we have used. So all of the workers work on whichever
+    datasets are being used the most, instead of each dataset having workers of its own that sit
+    idle when it isn't being used.
+
+    The workers are started the first time instances are needed, and stay around until the
+    pool is garbage collected or `close()` is called.
+
+    # Parameters
+
+    readers : `Dict[str, DatasetReader]`
+        The dataset reader of each dataset.
+    data_paths : `Dict[str, DatasetReaderInput]`
+        The path that each reader reads from, with the same keys as `readers`.
+    num_workers : `int`
+        The number of worker processes.
+    chunk_size : `int`, optional (default = `32`)
+        The number of instances that a worker reads from a dataset for each request. Smaller chunks
+        follow changes in demand more closely, larger ones have less overhead.
+    start_method : `str`, optional (default = `"fork"`)
+        The [start method](https://docs.python.org/3.7/library/multiprocessing.html#contexts-and-start-methods)
+        used to start the workers.
+    """
+
+    def __init__(
+        self,
+        readers: Dict[str, DatasetReader],
+        data_paths: Dict[str, Any],
+        num_workers: int,
+        chunk_size: int = 32,
+        start_method: str = "fork",
+    ) -> None:
+        if num_workers < 1:
+            raise ValueError("A shared worker pool needs at least one worker")
+        self.readers = readers
+        self.data_paths = data_paths
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        self.start_method = start_method
+
+        self._workers: List[BaseProcess] = []
+        self._requests: List[Any] = []
+        self._results: Any = None
+        self._finalizer: Optional[weakref.finalize] = None
+        self._pass_ids = itertools.count()
+        # The chunks that arrived from each worker for each pass over a dataset that is going on,
+        # keyed by the pass and the worker.
+        self._chunks: Dict[Tuple[int, int], Deque[Tuple[List[Instance], bool]]] = {}
+
+    def read(self, key: str) -> Iterator[Instance]:
+        """
+        Iterates over all of the instances of the dataset with the given key once, taking a chunk
+        from each worker in turn.
+        """
+        self._start()
+        pass_id = next(self._pass_ids)
+        for worker_id in range(self.num_workers):
+            self._chunks[(pass_id, worker_id)] = deque()
+            for _ in range(_REQUESTS_PER_WORKER):
+                self._requests[worker_id].put((key, pass_id, False))
+
+        try:
+            active_workers = list(range(self.num_workers))
+            while active_workers:
+                for worker_id in list(active_workers):
+                    instances, done = self._next_chunk(pass_id, worker_id)
+                    if done:
+                        active_workers.remove(worker_id)
+                    else:
+                        self._requests[worker_id].put((key, pass_id, False))
+                    yield from instances
+        finally:
+            for worker_id in range(self.num_workers):
+                del self._chunks[(pass_id, worker_id)]
+                if self._requests:
+                    # Let the worker forget about this pass, in case we stopped early.
+                    self._requests[worker_id].put((key, pass_id, True))
+
+    def reader(self, key: str) -> DatasetReader:
+        """
+        Returns a dataset reader that reads the dataset with the given key through this pool,
+        whatever path it is given.
+        """
+        return _SharedWorkerPoolReader(self, key)
+
+    def close(self) -> None:
+        """
+        Stops the workers.
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+            self._workers = []
+            self._requests = []
+            self._results = None
+
+    def _start(self) -> None:
+        if self._workers:
+            return
+        ctx = mp.get_context(self.start_method)
+        self._results = ctx.Queue()
+        for worker_id in range(self.num_workers):
+            requests = ctx.Queue()
+            worker = ctx.Process(
+                target=_worker,
+                args=(
+                    worker_id,
+                    self.num_workers,
+                    self.readers,
+                    self.data_paths,
+                    self.chunk_size,
+                    requests,
+                    self._results,
+                ),
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+            self._requests.append(requests)
+        self._finalizer = weakref.finalize(self, _stop_workers, self._workers, self._requests)
+
+    def _next_chunk(self, pass_id: int, worker_id: int) -> Tuple[List[Instance], bool]:
+        chunks = self._chunks[(pass_id, worker_id)]
+        while not chunks:
+            try:
+                result = self._results.get(timeout=1.0)
+            except queue.Empty:
+                for worker in self._workers:
+                    if not worker.is_alive():
+                        raise RuntimeError(
+                            f"A worker of the shared worker pool exited with code {worker.exitcode}"
+                        )
+                continue
+            result_pass_id, result_worker_id, instances, done, error = result
+            if (result_pass_id, result_worker_id) not in self._chunks:
+                # This is from a pass that was stopped early.
+                continue
+            if error is not None:
+                e, tb = error
+                raise WorkerError(e, tb)
+            self._chunks[(result_pass_id, result_worker_id)].append((instances, done))
+        return chunks.popleft()
+
+
+class _SharedWorkerPoolReader(DatasetReader):
+    """
+    Reads the instances of one dataset of a `SharedWorkerPool`, and otherwise acts like the
+    reader of that dataset.
+    """
+
+    def __init__(self, pool: SharedWorkerPool, key: str) -> None:
+        # The workers of the pool already read their own share of the dataset.
+        super().__init__(manual_distributed_sharding=True, manual_multiprocess_sharding=True)
+        self.pool = pool
+        self.key = key
+
+    def _read(self, file_path) -> Iterable[Instance]:
+        return self.pool.read(self.key)
+
+    def text_to_instance(self, *args, **kwargs) -> Instance:
+        return self.pool.readers[self.key].text_to_instance(*args, **kwargs)
+
+    def apply_token_indexers(self, instance: Instance) -> None:
+        self.pool.readers[self.key].apply_token_indexers(instance)
+
+
+def _worker(
+    worker_id: int,
+    num_workers: int,
+    readers: Dict[str, DatasetReader],
+    data_paths: Dict[str, Any],
+    chunk_size: int,
+    requests,
+    results,
+) -> None:
+    # The instances that are left in each pass over a dataset, or `None` when the pass is over.
+    passes: Dict[int, Optional[Iterator[Instance]]] = {}
+    for reader in readers.values():
+        reader._set_worker_info(WorkerInfo(num_workers, worker_id))
+
+    for key, pass_id, end_of_pass in iter(requests.get, None):
+        if end_of_pass:
+            passes.pop(pass_id, None)
+            continue
+        try:
+            if pass_id not in passes:
+                passes[pass_id] = iter(readers[key].read(data_paths[key]))
+            instances = passes[pass_id]
+            chunk = [] if instances is None else list(itertools.islice(instances, chunk_size))
+            if chunk:
+                _check_no_token_indexers(chunk[0])
+            done = len(chunk) < chunk_size
+            if done:
+                passes[pass_id] = None
+            results.put((pass_id, worker_id, chunk, done, None))
+        except Exception as e:
+            passes[pass_id] = None
+            results.put((pass_id, worker_id, None, True, (repr(e), traceback.format_exc())))
+
+
+def _stop_workers(workers: List[BaseProcess], requests: List[Any]) -> None:
+    for worker_requests in requests:
+        worker_requests.put(None)
+    for worker in workers:
+        worker.join(timeout=1.0)
+        if worker.is_alive():
+            worker.terminate()
@@ -84,6 +84,10 @@ class SimpleDataLoader(DataLoader):
     def set_target_device(self, device: torch.device) -> None:
         self.cuda_device = device
 
+    @overrides
+    def has_equal_batch_counts(self) -> bool:
+        return self.batches_per_epoch is not None
+
     @classmethod
     def from_dataset_reader(
         cls,
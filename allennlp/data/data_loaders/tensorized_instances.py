@@ -0,0 +1,166 @@
+"""
+A cache of the tensors of each `Instance`, used by the
+[`MultiProcessDataLoader`](../multiprocess_data_loader/#multiprocessdataloader)
+when `cache_instance_tensors` is `True`.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import torch
+
+from allennlp.data.data_loaders.data_collator import allennlp_collate
+from allennlp.data.data_loaders.data_loader import TensorDict
+from allennlp.data.fields.field import DataArray
+from allennlp.data.instance import Instance
+
+
+class _NotPaddable(Exception):
+    pass
+
+
+class _InstanceTensors(NamedTuple):
+    # The tensors of each field, only padded to the lengths of the instance itself.
+    tensors: Dict[str, DataArray]
+    # The value that each tensor is padded with, in the same structure as `tensors`. This is
+    # `None` for tensors that aren't padded, and for values that aren't tensors.
+    padding_values: Dict[str, Any]
+
+
+def _pad(tensor: torch.Tensor, shape: Tuple[int, ...], padding_value: Any) -> torch.Tensor:
+    padded = tensor.new_full(shape, padding_value)
+    padded[tuple(slice(0, length) for length in tensor.shape)] = tensor
+    return padded
+
+
+def _padding_values(data: Any, longer_data: Any) -> Any:
+    """
+    Works out what value the tensors in `data` are padded with, by comparing them with the
+    same tensors padded to longer lengths.
+    """
+    if isinstance(data, torch.Tensor):
+        if not isinstance(longer_data, torch.Tensor) or data.dim() != longer_data.dim():
+            raise _NotPaddable()
+        if data.shape == longer_data.shape:
+            return None
+        # Look at the value in the corner of the padding.
+        index = tuple(
+            -1 if longer_length > length else 0
+            for length, longer_length in zip(data.shape, longer_data.shape)
+        )
+        try:
+            padding_value = longer_data[index].item()
+        except IndexError:
+            # One of the dimensions that isn't padded is empty.
+            raise _NotPaddable()
+        # Padding has to be the same everywhere for us to redo it.
+        if not torch.equal(_pad(data, tuple(longer_data.shape), padding_value), longer_data):
+            raise _NotPaddable()
+        return padding_value
+    elif isinstance(data, dict) and data is not longer_data:
+        if not isinstance(longer_data, dict) or data.keys() != longer_data.keys():
+            raise _NotPaddable()
+        return {key: _padding_values(value, longer_data[key]) for key, value in data.items()}
+    elif data is longer_data:
+        # Values that aren't tensors, like the ones from a `MetadataField`, don't get padded.
+        return None
+    else:
+        raise _NotPaddable()
+
+
+def _tensorize(instance: Instance) -> Optional[_InstanceTensors]:
+    padding_lengths = instance.get_padding_lengths()
+    tensors = instance.as_tensor_dict(padding_lengths)
+    longer_tensors = instance.as_tensor_dict(
+        {
+            field_name: {key: length + 2 for key, length in field_lengths.items()}
+            for field_name, field_lengths in padding_lengths.items()
+        }
+    )
+    try:
+        padding_values = {
+            field_name: _padding_values(field_tensors, longer_tensors[field_name])
+            for field_name, field_tensors in tensors.items()
+        }
+    except _NotPaddable:
+        return None
+    return _InstanceTensors(tensors, padding_values)
+
+
+def _pad_to_longest(data: List[Any], padding_values: List[Any]) -> List[Any]:
+    if isinstance(padding_values[0], dict):
+        keys = padding_values[0].keys()
+        if any(values.keys() != keys for values in padding_values):
+            raise _NotPaddable()
+        padded_by_key = {
+            key: _pad_to_longest(
+                [item[key] for item in data], [values[key] for values in padding_values]
+            )
+            for key in keys
+        }
+        return [{key: padded_by_key[key][i] for key in keys} for i in range(len(data))]
+    elif isinstance(data[0], torch.Tensor):
+        shape = tuple(max(lengths) for lengths in zip(*(tensor.shape for tensor in data)))
+        padded = []
+        for tensor, padding_value in zip(data, padding_values):
+            if tuple(tensor.shape) != shape:
+                if padding_value is None:
+                    raise _NotPaddable()
+                tensor = _pad(tensor, shape, padding_value)
+            padded.append(tensor)
+        return padded
+    else:
+        return data
+
+
+class TensorizedInstances:
+    """
+    Makes batches from a fixed sequence of indexed `Instance`s, the same way as `allennlp_collate()`,
+    but the tensors of each instance are only created once, the first time the instance is put
+    into a batch. After that, making a batch only takes padding those tensors to the longest ones
+    in the batch and stacking them.
+
+    We find out how each tensor is padded by padding it by two more items along every padding key
+    of its field. If that padding isn't a single value, or the tensors of an instance don't come out
+    the same way, the batches with that instance are made with `allennlp_collate()` instead.
+
+    # Parameters
+
+    instances : `Sequence[Instance]`
+        The instances. They must not change while this is used, and they must already be indexed.
+    """
+
+    def __init__(self, instances: Sequence[Instance]) -> None:
+        self._instances = instances
+        self._tensors: List[Optional[_InstanceTensors]] = [None] * len(instances)
+        self._tensorized = [False] * len(instances)
+
+    def _get(self, index: int) -> Optional[_InstanceTensors]:
+        if not self._tensorized[index]:
+            self._tensors[index] = _tensorize(self._instances[index])
+            self._tensorized[index] = True
+        return self._tensors[index]
+
+    def collate(self, indices: List[int]) -> TensorDict:
+        """
+        Makes a batch from the instances at the given indices.
+        """
+        instances_tensors = [self._get(index) for index in indices]
+        if all(instance_tensors is not None for instance_tensors in instances_tensors):
+            try:
+                return self._collate(instances_tensors, self._instances[indices[0]])  # type: ignore
+            except _NotPaddable:
+                pass
+        return allennlp_collate([self._instances[index] for index in indices])
+
+    @staticmethod
+    def _collate(instances_tensors: List[_InstanceTensors], first_instance: Instance) -> TensorDict:
+        field_names = instances_tensors[0].tensors.keys()
+        if any(tensors.tensors.keys() != field_names for tensors in instances_tensors):
+            raise _NotPaddable()
+        batch = {}
+        for field_name in field_names:
+            padded = _pad_to_longest(
+                [tensors.tensors[field_name] for tensors in instances_tensors],
+                [tensors.padding_values[field_name] for tensors in instances_tensors],
+            )
+            batch[field_name] = first_instance.fields[field_name].batch_tensors(padded)
+        return batch
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 import itertools
 from os import PathLike
-from typing import Iterable, Iterator, Optional, Union, TypeVar, Dict, List
+from typing import Iterable, Iterator, Optional, Union, TypeVar, Dict, List, Tuple
 import logging
 import warnings
 
@@ -9,6 +9,7 @@ import torch.distributed as dist
 
 from allennlp.data.instance import Instance
 from allennlp.common import util
+from allennlp.common.file_utils import text_lines_from_file
 from allennlp.common.registrable import Registrable
 
 
@@ -153,6 +154,10 @@ class DatasetReader(Registrable):
         If you call the helper method `shard_iterable()` without setting these to `True`,
         you'll get an exception.
 
+        If your `_read()` method reads the lines of a text file, you can use
+        [`shard_text_lines()`](#shard_text_lines) instead, so that each worker only reads its own
+        part of the file, instead of going through the whole file and skipping most of it.
+
     2. If the instances generated by `_read()` contain `TextField`s, those `TextField`s
         should not have any token indexers assigned. The token indexers need to be applied
         in the [`apply_token_indexers()`](#apply_token_indexers) method instead.
@@ -290,19 +295,22 @@ class DatasetReader(Registrable):
         """
         self._distributed_info = info
 
-    def shard_iterable(self, iterable: Iterable[_T]) -> Iterator[_T]:
-        """
-        Helper method that determines which items in an iterable object to skip based
-        on the current node rank (for distributed training) and worker ID (for multi-process data loading).
-        """
+    def _check_manual_sharding(self, method: str) -> None:
         if not self.manual_distributed_sharding or not self.manual_multiprocess_sharding:
             raise ValueError(
-                "self.shard_iterable() was called but self.manual_distributed_sharding and "
+                f"self.{method}() was called but self.manual_distributed_sharding and "
                 "self.manual_multiprocess_sharding was not set to True. Did you forget to call "
                 "super().__init__(manual_distributed_sharding=True, manual_multiprocess_sharding=True) "
                 "in your constructor?"
             )
 
+    def shard_iterable(self, iterable: Iterable[_T]) -> Iterator[_T]:
+        """
+        Helper method that determines which items in an iterable object to skip based
+        on the current node rank (for distributed training) and worker ID (for multi-process data loading).
+        """
+        self._check_manual_sharding("shard_iterable")
+
         sharded_slice: Iterator[_T] = iter(iterable)
 
         if util.is_distributed():
@@ -323,6 +331,41 @@ class DatasetReader(Registrable):
 
         return sharded_slice
 
+    def shard_text_lines(
+        self, file_path: Union[PathLike, str], strip_lines: bool = True
+    ) -> Iterator[str]:
+        """
+        Helper method that yields the lines of a text file for the current node rank and worker ID,
+        like `self.shard_iterable(text_lines_from_file(file_path, strip_lines))`.
+
+        Unless the file is compressed, the file is split into byte ranges instead of skipping
+        lines, so each worker only reads its own part of the file (see
+        [`text_lines_from_file()`](/api/common/file_utils/#text_lines_from_file)). When
+        `max_instances` is given, the lines are split up one by one, like `shard_iterable()`
+        does, so that the instances still come from the start of the file.
+        """
+        self._check_manual_sharding("shard_text_lines")
+        if self.max_instances is not None:
+            return self.shard_iterable(text_lines_from_file(file_path, strip_lines))
+
+        shard, num_shards = self._get_shard()
+        return text_lines_from_file(file_path, strip_lines, shard=shard, num_shards=num_shards)
+
+    def _get_shard(self) -> Tuple[int, int]:
+        """
+        Returns the index of the current worker among the workers of all nodes, and the
+        total number of workers.
+        """
+        shard = 0
+        num_shards = 1
+        if util.is_distributed():
+            shard = dist.get_rank()
+            num_shards = dist.get_world_size()
+        if self._worker_info is not None:
+            shard = shard * self._worker_info.num_workers + self._worker_info.id
+            num_shards *= self._worker_info.num_workers
+        return shard, num_shards
+
     def _multi_worker_islice(
         self,
         iterable: Iterable[_T],
@@ -61,22 +61,21 @@ class SequenceTaggingDatasetReader(DatasetReader):
         # if `file_path` is a URL, redirect to the cache
         file_path = cached_path(file_path)
 
-        with open(file_path, "r") as data_file:
-            logger.info("Reading instances from lines in file at: %s", file_path)
-            for line in self.shard_iterable(data_file):
-                line = line.strip("\n")
-
-                # skip blank lines
-                if not line:
-                    continue
-
-                tokens_and_tags = [
-                    pair.rsplit(self._word_tag_delimiter, 1)
-                    for pair in line.split(self._token_delimiter)
-                ]
-                tokens = [Token(token) for token, tag in tokens_and_tags]
-                tags = [tag for token, tag in tokens_and_tags]
-                yield self.text_to_instance(tokens, tags)
+        logger.info("Reading instances from lines in file at: %s", file_path)
+        for line in self.shard_text_lines(file_path, strip_lines=False):
+            line = line.strip("\n")
+
+            # skip blank lines
+            if not line:
+                continue
+
+            tokens_and_tags = [
+                pair.rsplit(self._word_tag_delimiter, 1)
+                for pair in line.split(self._token_delimiter)
+            ]
+            tokens = [Token(token) for token, tag in tokens_and_tags]
+            tags = [tag for token, tag in tokens_and_tags]
+            yield self.text_to_instance(tokens, tags)
 
     def text_to_instance(  # type: ignore
         self, tokens: List[Token], tags: List[str] = None
@@ -1,12 +1,16 @@
+from collections import deque
 import glob
+import heapq
+import itertools
 import logging
 import os
-from typing import Iterable
+from typing import Deque, Iterable, Iterator, List, Tuple
 
 from overrides import overrides
 
 from allennlp.common.checks import ConfigurationError
 from allennlp.common.file_utils import cached_path
+from allennlp.common.util import prefetch_iterable
 from allennlp.data.dataset_readers.dataset_reader import DatasetReader, PathOrStr
 from allennlp.data.instance import Instance
 
@@ -29,6 +33,8 @@ class ShardedDatasetReader(DatasetReader):
     instances to be filtered according to worker rank in the distributed training or multi-process
     data loading scenarios. In either case, the number of file shards should ideally be a multiple
     of the number of workers, and each file should produce roughly the same number of instances.
+    If the files have different sizes, set `balance_shards_by_size` so that each worker gets
+    about the same number of bytes to read instead of the same number of files.
 
     Registered as a `DatasetReader` with name "sharded".
 
@@ -36,13 +42,38 @@ class ShardedDatasetReader(DatasetReader):
 
     base_reader : `DatasetReader`
         Reader with a read method that accepts a single file.
+
+    prefetch_shards : `int`, optional (default = `0`)
+        If greater than zero, this many of the following files are read in background threads
+        while the instances of the current one are returned, so that opening, decompressing, and
+        parsing them overlaps with consuming the instances. This helps with compressed files
+        and slow file systems. The `_read()` method of the `base_reader` is then called from
+        several threads at once, so it must not change the state of the reader.
+
+    prefetch_buffer_size : `int`, optional (default = `1024`)
+        How many instances of each file we read ahead of time, when `prefetch_shards` is given.
+
+    balance_shards_by_size : `bool`, optional (default = `False`)
+        If `True`, the files are assigned to the workers by their size, biggest first, each one
+        going to the worker with the fewest bytes so far, instead of going round-robin through
+        them in order. Each worker still reads its own files in order.
     """
 
-    def __init__(self, base_reader: DatasetReader, **kwargs) -> None:
+    def __init__(
+        self,
+        base_reader: DatasetReader,
+        prefetch_shards: int = 0,
+        prefetch_buffer_size: int = 1024,
+        balance_shards_by_size: bool = False,
+        **kwargs,
+    ) -> None:
         super().__init__(
             manual_distributed_sharding=True, manual_multiprocess_sharding=True, **kwargs
         )
         self.reader = base_reader
+        self.prefetch_shards = prefetch_shards
+        self.prefetch_buffer_size = prefetch_buffer_size
+        self.balance_shards_by_size = balance_shards_by_size
         # We have to make the base reader think that it's the only worker so that it doesn't
         # do any of its own filtering.
         self.reader._set_worker_info(None)
@@ -82,9 +113,66 @@ class ShardedDatasetReader(DatasetReader):
         # Ensure a consistent order.
         shards.sort()
 
-        for shard in self.shard_iterable(shards):
-            logger.info(f"reading instances from {shard}")
-            # We call `self.reader._read()` here instead of `self.reader.read()` because `.read()`
-            # will prematurely call `self.reader.apply_token_indexers()`.
-            for instance in self.reader._read(shard):
-                yield instance
+        if self.balance_shards_by_size:
+            shards = self._balanced_shards(shards)
+        else:
+            shards = list(self.shard_iterable(shards))
+
+        if self.prefetch_shards > 0:
+            yield from self._read_shards_ahead(shards)
+        else:
+            for shard in shards:
+                yield from self._read_shard(shard)
+
+    def _read_shard(self, shard: str) -> Iterable[Instance]:
+        logger.info(f"reading instances from {shard}")
+        # We call `self.reader._read()` here instead of `self.reader.read()` because `.read()`
+        # will prematurely call `self.reader.apply_token_indexers()`.
+        return self.reader._read(shard)
+
+    def _balanced_shards(self, shards: List[str]) -> List[str]:
+        """
+        Returns the files that the current worker reads when files are assigned by size.
+        """
+        worker, num_workers = self._get_shard()
+        # (bytes so far, worker) for each worker, so that ties go to the lowest worker.
+        totals: List[Tuple[int, int]] = [(0, i) for i in range(num_workers)]
+        sizes = {shard: os.path.getsize(shard) for shard in shards}
+        my_shards = set()
+        for shard in sorted(shards, key=lambda shard: -sizes[shard]):
+            total, i = heapq.heappop(totals)
+            if i == worker:
+                my_shards.add(shard)
+            heapq.heappush(totals, (total + sizes[shard], i))
+        balanced: Iterator[str] = (shard for shard in shards if shard in my_shards)
+        if self.max_instances is not None:
+            # Like `shard_iterable()`.
+            balanced = itertools.islice(balanced, self.max_instances)
+        return list(balanced)
+
+    def _read_shards_ahead(self, shards: List[str]) -> Iterator[Instance]:
+        """
+        Reads the instances of the files in order, while the next `prefetch_shards` files are
+        already read in background threads (see `prefetch_iterable()`).
+        """
+        started: Deque[Iterator[Instance]] = deque()
+        remaining = iter(shards)
+
+        def start_next() -> None:
+            shard = next(remaining, None)
+            if shard is not None:
+                started.append(
+                    prefetch_iterable(self._read_shard(shard), self.prefetch_buffer_size)
+                )
+
+        try:
+            # The current file plus the ones we read ahead.
+            for _ in range(self.prefetch_shards + 1):
+                start_next()
+            while started:
+                yield from started[0]
+                started.popleft()
+                start_next()
+        finally:
+            for instances in started:
+                instances.close()  # type: ignore[attr-defined]
@@ -1,13 +1,13 @@
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 import logging
 import json
 from overrides import overrides
-from allennlp.common.file_utils import cached_path
+from allennlp.common.util import lazy_groups_of
 from allennlp.data.dataset_readers.dataset_reader import DatasetReader
 from allennlp.data.fields import LabelField, TextField, Field, ListField
 from allennlp.data.instance import Instance
 from allennlp.data.token_indexers import TokenIndexer, SingleIdTokenIndexer
-from allennlp.data.tokenizers import Tokenizer, SpacyTokenizer
+from allennlp.data.tokenizers import Token, Tokenizer, SpacyTokenizer
 from allennlp.data.tokenizers.sentence_splitter import SpacySentenceSplitter
 
 logger = logging.getLogger(__name__)
@@ -47,6 +47,10 @@ class TextClassificationJsonReader(DatasetReader):
         The key name of the source field in the JSON data file.
     label_key: `str`, optional (default=`"label"`)
         The key name of the target field in the JSON data file.
+    tokenizer_batch_size: `int`, optional (default=`1`)
+        The number of texts that we give the tokenizer at once (see `Tokenizer.batch_tokenize`).
+        Tokenizers like the `PretrainedTransformerTokenizer` and the `SpacyTokenizer` are a lot
+        faster on batches of texts.
     """
 
     def __init__(
@@ -58,6 +62,7 @@ class TextClassificationJsonReader(DatasetReader):
         skip_label_indexing: bool = False,
         text_key: str = "text",
         label_key: str = "label",
+        tokenizer_batch_size: int = 1,
         **kwargs,
     ) -> None:
         super().__init__(
@@ -70,29 +75,50 @@ class TextClassificationJsonReader(DatasetReader):
         self._token_indexers = token_indexers or {"tokens": SingleIdTokenIndexer()}
         self._text_key = text_key
         self._label_key = label_key
+        self._tokenizer_batch_size = tokenizer_batch_size
         if self._segment_sentences:
             self._sentence_segmenter = SpacySentenceSplitter()
 
     @overrides
     def _read(self, file_path):
-        with open(cached_path(file_path), "r") as data_file:
-            for line in self.shard_iterable(data_file.readlines()):
-                if not line:
-                    continue
-                items = json.loads(line)
-                text = items[self._text_key]
-                label = items.get(self._label_key)
-                if label is not None:
-                    if self._skip_label_indexing:
-                        try:
-                            label = int(label)
-                        except ValueError:
-                            raise ValueError(
-                                "Labels must be integers if skip_label_indexing is True."
-                            )
-                    else:
-                        label = str(label)
-                yield self.text_to_instance(text=text, label=label)
+        texts_and_labels = (
+            self._read_line(line)
+            for line in self.shard_text_lines(file_path, strip_lines=False)
+            if line
+        )
+        for batch in lazy_groups_of(texts_and_labels, self._tokenizer_batch_size):
+            texts, labels = zip(*batch)
+            yield from self.texts_to_instances(list(texts), list(labels))
+
+    def _read_line(self, line: str) -> Tuple[str, Union[str, int, None]]:
+        items = json.loads(line)
+        text = items[self._text_key]
+        label = items.get(self._label_key)
+        if label is not None:
+            if self._skip_label_indexing:
+                try:
+                    label = int(label)
+                except ValueError:
+                    raise ValueError("Labels must be integers if skip_label_indexing is True.")
+            else:
+                label = str(label)
+        return text, label
+
+    def texts_to_instances(
+        self, texts: List[str], labels: List[Union[str, int, None]] = None
+    ) -> List[Instance]:
+        """
+        Does the same as calling `text_to_instance` on each of the texts (and labels), but
+        tokenizes all of the texts at once with `Tokenizer.batch_tokenize`.
+        """
+        if labels is None:
+            labels = [None] * len(texts)
+        if self._segment_sentences:
+            return [self.text_to_instance(text, label) for text, label in zip(texts, labels)]
+        return [
+            self.text_to_instance(text, label, tokens)
+            for text, label, tokens in zip(texts, labels, self._tokenizer.batch_tokenize(texts))
+        ]
 
     def _truncate(self, tokens):
         """
@@ -104,7 +130,7 @@ class TextClassificationJsonReader(DatasetReader):
 
     @overrides
     def text_to_instance(
-        self, text: str, label: Union[str, int] = None
+        self, text: str, label: Union[str, int] = None, tokens: List[Token] = None
     ) -> Instance:  # type: ignore
         """
         # Parameters
@@ -113,6 +139,9 @@ class TextClassificationJsonReader(DatasetReader):
             The text to classify
         label : `str`, optional, (default = `None`).
             The label for this text.
+        tokens : `List[Token]`, optional, (default = `None`).
+            The tokens of the text, if it was tokenized already. This is ignored if we segment
+            sentences.
 
         # Returns
 
@@ -127,14 +156,14 @@ class TextClassificationJsonReader(DatasetReader):
         if self._segment_sentences:
             sentences: List[Field] = []
             sentence_splits = self._sentence_segmenter.split_sentences(text)
-            for sentence in sentence_splits:
-                word_tokens = self._tokenizer.tokenize(sentence)
+            for word_tokens in self._tokenizer.batch_tokenize(sentence_splits):
                 if self._max_sequence_length is not None:
                     word_tokens = self._truncate(word_tokens)
                 sentences.append(TextField(word_tokens))
             fields["tokens"] = ListField(sentences)
         else:
-            tokens = self._tokenizer.tokenize(text)
+            if tokens is None:
+                tokens = self._tokenizer.tokenize(text)
             if self._max_sequence_length is not None:
                 tokens = self._truncate(tokens)
             fields["tokens"] = TextField(tokens)
@@ -129,6 +129,23 @@ class Field(Generic[DataArray]):
 
         return torch.stack(tensor_list)
 
+    def batch_as_tensors(  # type: ignore
+        self, fields: List["Field"], padding_lengths: Dict[str, int]
+    ) -> DataArray:
+        """
+        Pads a list of fields of this type (one from each `Instance` in a batch) to the given
+        `padding_lengths` and merges them into one batched tensor. This is what `Batch` uses to
+        make its tensors, and it gives the same result as calling `as_tensor()` on each field and
+        passing the results to `batch_tensors()`, which is what the default implementation does.
+
+        Fields whose data is simple enough (like lists of indices) can override this to put the
+        data of the whole batch into one tensor at once, which is much faster than making a
+        tensor for each instance and stacking them.
+
+        Like `batch_tensors()`, this is called on the field of the first instance in the batch.
+        """
+        return self.batch_tensors([field.as_tensor(padding_lengths) for field in fields])
+
     def __eq__(self, other) -> bool:
         if isinstance(self, other.__class__):
             # With the way "slots" classes work, self.__slots__ only gives the slots defined
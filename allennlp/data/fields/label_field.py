@@ -1,4 +1,4 @@
-from typing import Dict, Union, Set
+from typing import Dict, List, Union, Set
 import logging
 
 from overrides import overrides
@@ -101,6 +101,12 @@ class LabelField(Field[torch.Tensor]):
         tensor = torch.tensor(self._label_id, dtype=torch.long)
         return tensor
 
+    @overrides
+    def batch_as_tensors(  # type: ignore
+        self, fields: List["LabelField"], padding_lengths: Dict[str, int]
+    ) -> torch.Tensor:
+        return torch.tensor([field._label_id for field in fields], dtype=torch.long)
+
     @overrides
     def empty_field(self):
         return LabelField(-1, self._label_namespace, skip_indexing=True)
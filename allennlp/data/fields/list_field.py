@@ -8,6 +8,12 @@ from allennlp.data.fields.sequence_field import SequenceField
 from allennlp.common.util import pad_sequence_to_length
 
 
+def _split_batch(tensors: Any, batch_size: int, num_fields: int) -> Any:
+    if isinstance(tensors, dict):
+        return {key: _split_batch(value, batch_size, num_fields) for key, value in tensors.items()}
+    return tensors.reshape(batch_size, num_fields, *tensors.shape[1:])
+
+
 class ListField(SequenceField[DataArray]):
     """
     A `ListField` is a list of other fields.  You would use this to represent, e.g., a list of
@@ -88,15 +94,43 @@ class ListField(SequenceField[DataArray]):
         padded_field_list = pad_sequence_to_length(
             self.field_list, padding_lengths["num_fields"], self.field_list[0].empty_field
         )
+        child_padding_lengths = self._child_padding_lengths(padding_lengths)
+        padded_fields = [field.as_tensor(child_padding_lengths) for field in padded_field_list]
+        return self.field_list[0].batch_tensors(padded_fields)
+
+    @overrides
+    def batch_as_tensors(  # type: ignore
+        self, fields: List["ListField"], padding_lengths: Dict[str, int]
+    ) -> DataArray:
+        first_field = self.field_list[0]
+        if type(first_field).batch_as_tensors is Field.batch_as_tensors:
+            # The fields in the list can't be batched any faster than one by one anyway.
+            return super().batch_as_tensors(fields, padding_lengths)
+
+        # We batch the padded fields of all of the lists together, and then split the result
+        # into one list of fields for each instance.
+        num_fields = padding_lengths["num_fields"]
+        padded_fields = [
+            padded_field
+            for field in fields
+            for padded_field in pad_sequence_to_length(
+                field.field_list, num_fields, field.field_list[0].empty_field
+            )
+        ]
+        tensors = first_field.batch_as_tensors(
+            padded_fields, self._child_padding_lengths(padding_lengths)
+        )
+        return _split_batch(tensors, len(fields), num_fields)
+
+    @staticmethod
+    def _child_padding_lengths(padding_lengths: Dict[str, int]) -> Dict[str, int]:
         # Here we're removing the scoping on the padding length keys that we added in
         # `get_padding_lengths`; see the note there for more detail.
-        child_padding_lengths = {
+        return {
             key.replace("list_", "", 1): value
             for key, value in padding_lengths.items()
             if key.startswith("list_")
         }
-        padded_fields = [field.as_tensor(child_padding_lengths) for field in padded_field_list]
-        return self.field_list[0].batch_tensors(padded_fields)
 
     @overrides
     def empty_field(self):
@@ -6,7 +6,7 @@ from overrides import overrides
 import torch
 
 from allennlp.common.checks import ConfigurationError
-from allennlp.common.util import pad_sequence_to_length
+from allennlp.common.util import pad_sequence_to_length, pad_sequences_to_tensor
 from allennlp.data.fields.field import Field
 from allennlp.data.fields.sequence_field import SequenceField
 from allennlp.data.vocabulary import Vocabulary
@@ -133,6 +133,18 @@ class SequenceLabelField(Field[torch.Tensor]):
         tensor = torch.LongTensor(padded_tags)
         return tensor
 
+    @overrides
+    def batch_as_tensors(  # type: ignore
+        self, fields: List["SequenceLabelField"], padding_lengths: Dict[str, int]
+    ) -> torch.Tensor:
+        if any(field._indexed_labels is None for field in fields):
+            raise ConfigurationError(
+                "You must call .index(vocabulary) on a field before calling .as_tensor()"
+            )
+        return pad_sequences_to_tensor(
+            [field._indexed_labels for field in fields], padding_lengths["num_tokens"]  # type: ignore
+        )
+
     @overrides
     def empty_field(self) -> "SequenceLabelField":
         # The empty_list here is needed for mypy
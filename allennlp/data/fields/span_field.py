@@ -1,4 +1,4 @@
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 from overrides import overrides
 import torch
@@ -59,6 +59,14 @@ class SpanField(Field[torch.Tensor]):
         tensor = torch.LongTensor([self.span_start, self.span_end])
         return tensor
 
+    @overrides
+    def batch_as_tensors(  # type: ignore
+        self, fields: List["SpanField"], padding_lengths: Dict[str, int]
+    ) -> torch.Tensor:
+        return torch.tensor(
+            [[field.span_start, field.span_end] for field in fields], dtype=torch.long
+        )
+
     @overrides
     def empty_field(self):
         return SpanField(-1, -1, self.sequence_field.empty_field())
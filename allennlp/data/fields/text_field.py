@@ -2,9 +2,10 @@
 A `TextField` represents a string of text, the kind that you might want to represent with
 standard word vectors, or pass through an LSTM.
 """
+from array import array
 from collections import defaultdict
 from copy import deepcopy
-from typing import Dict, List, Optional, Iterator
+from typing import Any, Dict, List, Optional, Iterator, Sequence
 import textwrap
 
 from overrides import overrides
@@ -26,6 +27,41 @@ from allennlp.nn import util
 TextFieldTensors = Dict[str, Dict[str, torch.Tensor]]
 
 
+class _DroppedTokens(Sequence[Token]):
+    """
+    Takes the place of the tokens of a `TextField` after [`drop_tokens()`](#drop_tokens), so that
+    we still know how many tokens there were.
+    """
+
+    __slots__ = ["_length"]
+
+    def __init__(self, length: int) -> None:
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        raise ValueError(
+            "The tokens of this TextField were dropped after it was indexed, "
+            "so only their indices are available."
+        )
+
+    def __repr__(self) -> str:
+        return f"<{self._length} dropped tokens>"
+
+
+def _compact(indices: Any) -> Any:
+    # Only flat lists of ints are stored as arrays. Other values, like lists of bools or nested
+    # lists, are used by some token indexers in ways that arrays don't support.
+    if not isinstance(indices, list) or not all(type(index) is int for index in indices):
+        return indices
+    try:
+        return array("i", indices)
+    except OverflowError:
+        return array("q", indices)
+
+
 class TextField(SequenceField[TextFieldTensors]):
     """
     This `Field` represents a list of string tokens.  Before constructing this object, you need
@@ -81,10 +117,37 @@ class TextField(SequenceField[TextFieldTensors]):
 
     @overrides
     def index(self, vocab: Vocabulary):
+        if isinstance(self.tokens, _DroppedTokens):
+            raise ConfigurationError(
+                "This TextField can't be indexed again because its tokens were dropped "
+                "after it was indexed."
+            )
         self._indexed_tokens = {}
         for indexer_name, indexer in self.token_indexers.items():
             self._indexed_tokens[indexer_name] = indexer.tokens_to_indices(self.tokens, vocab)
 
+    def drop_tokens(self) -> None:
+        """
+        Turns this field into an "indexed-only" field, which keeps only the indices of its tokens
+        and not the `Token` objects themselves. The lists of indices are also stored in compact
+        arrays where possible. This can save a lot of memory when many instances are kept in memory,
+        since indexed fields don't need their tokens to be turned into tensors.
+
+        The field must be indexed first. Afterwards it still knows its length, but its tokens can't
+        be accessed anymore, so it can't be indexed again (e.g. with a different vocabulary), or
+        be used to count vocabulary items.
+        """
+        if self._indexed_tokens is None:
+            raise ConfigurationError(
+                "You must call .index(vocabulary) on a field before dropping its tokens."
+            )
+        if not isinstance(self.tokens, _DroppedTokens):
+            self.tokens = _DroppedTokens(len(self.tokens))  # type: ignore
+        self._indexed_tokens = {
+            indexer_name: {key: _compact(indices) for key, indices in indexed_tokens.items()}
+            for indexer_name, indexed_tokens in self._indexed_tokens.items()
+        }
+
     @overrides
     def get_padding_lengths(self) -> Dict[str, int]:
         """
@@ -116,19 +179,41 @@ class TextField(SequenceField[TextFieldTensors]):
             )
 
         tensors = {}
+        indexer_lengths = self._indexer_padding_lengths(padding_lengths)
+        for indexer_name, indexer in self.token_indexers.items():
+            tensors[indexer_name] = indexer.as_padded_tensor_dict(
+                self._indexed_tokens[indexer_name], indexer_lengths[indexer_name]
+            )
+        return tensors
+
+    @overrides
+    def batch_as_tensors(  # type: ignore
+        self, fields: List["TextField"], padding_lengths: Dict[str, int]
+    ) -> TextFieldTensors:
+        if any(field._indexed_tokens is None for field in fields):
+            raise ConfigurationError(
+                "You must call .index(vocabulary) on a field before calling .as_tensor()"
+            )
+
+        # Each token indexer pads the indexed tokens of the whole batch at once.
+        tensors = {}
+        indexer_lengths = self._indexer_padding_lengths(padding_lengths)
+        for indexer_name, indexer in self.token_indexers.items():
+            tensors[indexer_name] = indexer.batch_as_padded_tensor_dict(
+                [field._indexed_tokens[indexer_name] for field in fields],  # type: ignore
+                indexer_lengths[indexer_name],
+            )
+        return tensors
 
+    @staticmethod
+    def _indexer_padding_lengths(padding_lengths: Dict[str, int]) -> Dict[str, Dict[str, int]]:
         indexer_lengths: Dict[str, Dict[str, int]] = defaultdict(dict)
         for key, value in padding_lengths.items():
             # We want this to crash if the split fails. Should never happen, so I'm not
             # putting in a check, but if you fail on this line, open a github issue.
             indexer_name, padding_key = key.split("___")
             indexer_lengths[indexer_name][padding_key] = value
-
-        for indexer_name, indexer in self.token_indexers.items():
-            tensors[indexer_name] = indexer.as_padded_tensor_dict(
-                self._indexed_tokens[indexer_name], indexer_lengths[indexer_name]
-            )
-        return tensors
+        return indexer_lengths
 
     @overrides
     def empty_field(self):
@@ -194,9 +279,10 @@ class TextField(SequenceField[TextFieldTensors]):
         the 'transformers' lib) cannot actually be deep-copied.
         """
         if self._token_indexers is not None:
-            new = TextField(deepcopy(self.tokens), {k: v for k, v in self._token_indexers.items()})
+            new = TextField([], {k: v for k, v in self._token_indexers.items()})
         else:
-            new = TextField(deepcopy(self.tokens))
+            new = TextField([])
+        new.tokens = deepcopy(self.tokens)
         new._indexed_tokens = deepcopy(self._indexed_tokens)
         return new
 
@@ -0,0 +1,206 @@
+"""
+A binary, memory-mapped format for storing `Instance`s on disk with random access.
+"""
+from array import array
+from contextlib import contextmanager
+import io
+import mmap
+from os import PathLike
+import pickle
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union, overload
+
+import numpy
+
+from allennlp.common.file_utils import CacheFile
+from allennlp.data.instance import Instance
+from allennlp.data.token_indexers.token_indexer import TokenIndexer
+
+
+_TRAILER_SIZE = 8
+
+
+class _InstancePickler(pickle.Pickler):
+    # Token indexers can be huge (think `PretrainedTransformerIndexer`), and they are
+    # shared between all instances, so we store them only once in a separate table.
+    def __init__(self, file, token_indexers: List[TokenIndexer]) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.token_indexers = token_indexers
+
+    def persistent_id(self, obj):
+        if isinstance(obj, TokenIndexer):
+            for i, token_indexer in enumerate(self.token_indexers):
+                if token_indexer is obj:
+                    return i
+            self.token_indexers.append(obj)
+            return len(self.token_indexers) - 1
+        return None
+
+
+class _InstanceUnpickler(pickle.Unpickler):
+    def __init__(self, file, token_indexers: List[TokenIndexer]) -> None:
+        super().__init__(file)
+        self.token_indexers = token_indexers
+
+    def persistent_load(self, pid):
+        return self.token_indexers[pid]
+
+
+def _field_lengths(instance: Instance, field_names: List[str]) -> List[int]:
+    return [len(instance.fields[name]) if name in instance.fields else 0 for name in field_names]
+
+
+def _sized_field_names(instance: Instance) -> List[str]:
+    field_names = []
+    for name, field in instance.fields.items():
+        try:
+            len(field)
+        except (NotImplementedError, TypeError):
+            # `MetadataField`s only have a length if their metadata has one.
+            continue
+        field_names.append(name)
+    return field_names
+
+
+@contextmanager
+def write_memory_mapped_instances(
+    filename: Union[str, PathLike]
+) -> Iterator[Callable[[Instance], None]]:
+    """
+    A context manager giving a function that appends an instance to a new file in the format
+    read by [`MemoryMappedInstances`](#memorymappedinstances). The file is only created once
+    the context exits without an error, so an interrupted write never leaves a partial file behind.
+
+    The instances should not be indexed yet. Some fields (like the `LabelField`) stop counting
+    vocabulary items once they are indexed, so indexed instances can't be used to build a new
+    vocabulary.
+    """
+    token_indexers: List[TokenIndexer] = []
+    offsets = array("q", [0])
+    lengths = array("q")
+    field_names: Optional[List[str]] = None
+    with CacheFile(filename) as binary_file:
+
+        def write(instance: Instance) -> None:
+            nonlocal field_names
+            if field_names is None:
+                field_names = _sized_field_names(instance)
+            _InstancePickler(binary_file, token_indexers).dump(instance)
+            offsets.append(binary_file.tell())
+            lengths.extend(_field_lengths(instance, field_names))
+
+        yield write
+
+        # The offsets and lengths are written as raw arrays so that they can be
+        # memory-mapped, and the metadata at the end tells us where to find them.
+        offsets_start = binary_file.tell()
+        binary_file.write(offsets.tobytes())
+        lengths_start = binary_file.tell()
+        binary_file.write(lengths.tobytes())
+        metadata = {
+            "num_instances": len(offsets) - 1,
+            "field_names": field_names or [],
+            "offsets_start": offsets_start,
+            "lengths_start": lengths_start,
+            "token_indexers": token_indexers,
+        }
+        metadata_start = binary_file.tell()
+        pickle.dump(metadata, binary_file, protocol=pickle.HIGHEST_PROTOCOL)
+        binary_file.write(metadata_start.to_bytes(_TRAILER_SIZE, "little"))
+
+
+class MemoryMappedInstances(Sequence[Instance]):
+    """
+    A read-only sequence of `Instance`s backed by a memory-mapped file, as written by
+    [`write_memory_mapped_instances()`](#write_memory_mapped_instances).
+
+    Any instance can be accessed in constant time, but it is only decoded when it is accessed,
+    so the dataset doesn't need to fit in memory. The pages of the file are shared by all
+    processes that open it, so any number of data loading workers can use the same file
+    without copying it.
+
+    Along with the instances, the file stores the length of each instance's fields, so that
+    batch samplers can sort the whole dataset by length without decoding any instances.
+
+    Every access decodes a new copy of the instance, so changes to a returned instance
+    (like indexing it) are not kept.
+    """
+
+    def __init__(self, filename: Union[str, PathLike]) -> None:
+        self.filename = str(filename)
+        self._mmap: Optional[mmap.mmap] = None
+        self._offsets: Optional[numpy.ndarray] = None
+        self._lengths: Optional[numpy.ndarray] = None
+        self._field_names: List[str] = []
+        self._token_indexers: List[TokenIndexer] = []
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.filename, "rb") as binary_file:
+            self._mmap = mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ)
+        metadata_start = int.from_bytes(self._mmap[-_TRAILER_SIZE:], "little")
+        metadata: Dict[str, Any] = pickle.loads(self._mmap[metadata_start:-_TRAILER_SIZE])
+        num_instances = metadata["num_instances"]
+        self._field_names = metadata["field_names"]
+        self._token_indexers = metadata["token_indexers"]
+        self._offsets = numpy.frombuffer(
+            self._mmap, dtype=numpy.int64, count=num_instances + 1, offset=metadata["offsets_start"]
+        )
+        self._lengths = numpy.frombuffer(
+            self._mmap,
+            dtype=numpy.int64,
+            count=num_instances * len(self._field_names),
+            offset=metadata["lengths_start"],
+        ).reshape(num_instances, len(self._field_names))
+
+    def __getstate__(self):
+        # Memory maps can't be pickled, so processes that receive this object open the
+        # file again themselves.
+        return {"filename": self.filename}
+
+    def __setstate__(self, state):
+        self.__init__(state["filename"])  # type: ignore
+
+    def __len__(self) -> int:
+        assert self._offsets is not None
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> Instance:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Instance]:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("instance index out of range")
+        assert self._mmap is not None and self._offsets is not None
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return _InstanceUnpickler(io.BytesIO(self._mmap[start:end]), self._token_indexers).load()
+
+    def __iter__(self) -> Iterator[Instance]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def field_names(self) -> List[str]:
+        """
+        The names of the fields whose lengths are stored. These are the fields that
+        support `len()`.
+        """
+        return list(self._field_names)
+
+    def field_lengths(self, field_name: str) -> numpy.ndarray:
+        """
+        Returns the `len()` of the field called `field_name` in every instance, without
+        decoding the instances.
+        """
+        if field_name not in self._field_names:
+            raise KeyError(field_name)
+        assert self._lengths is not None
+        return self._lengths[:, self._field_names.index(field_name)]
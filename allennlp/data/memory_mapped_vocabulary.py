@@ -0,0 +1,209 @@
+"""
+A binary, memory-mapped format for storing the namespaces of a `Vocabulary` on disk.
+"""
+import mmap
+import operator
+import os
+import sys
+from os import PathLike
+from typing import Iterable, Iterator, Mapping, Optional, Sequence, Union
+import zlib
+
+import numpy
+
+from allennlp.common.file_utils import CacheFile
+
+
+_MAGIC = b"ANLPVOC1"
+# The magic bytes, the number of tokens, and the number of buckets of the hash table.
+_HEADER_SIZE = 24
+_INT64 = numpy.dtype("<i8")
+
+
+def write_memory_mapped_namespace(filename: Union[str, PathLike], tokens: Iterable[str]) -> None:
+    """
+    Writes the given tokens, in index order, to a new file in the format read by
+    [`MemoryMappedNamespace`](#memorymappednamespace). The file is only created once all of the
+    tokens are written, so an interrupted write never leaves a partial file behind.
+
+    The file holds the UTF-8 encoded tokens one after the other, the offset of each of them, and
+    an open addressing hash table from tokens to their indices, so that looking up either an index
+    or a token doesn't need to read more than a few pages of the file.
+    """
+    encoded_tokens = [token.encode("utf-8") for token in tokens]
+    offsets = numpy.zeros(len(encoded_tokens) + 1, dtype=_INT64)
+    numpy.cumsum([len(token) for token in encoded_tokens], out=offsets[1:])
+
+    # At most half of the buckets are used, so that lookups find a free bucket soon.
+    num_buckets = 1
+    while num_buckets < 2 * len(encoded_tokens):
+        num_buckets *= 2
+    mask = num_buckets - 1
+    buckets = [-1] * num_buckets
+    for index, token in enumerate(encoded_tokens):
+        bucket = zlib.crc32(token) & mask
+        while buckets[bucket] >= 0 and encoded_tokens[buckets[bucket]] != token:
+            bucket = (bucket + 1) & mask
+        # Like a dictionary, a token that shows up twice gets the index where it was seen last.
+        buckets[bucket] = index
+
+    with CacheFile(filename) as binary_file:
+        binary_file.write(_MAGIC)
+        binary_file.write(numpy.array([len(encoded_tokens), num_buckets], dtype=_INT64).tobytes())
+        binary_file.write(offsets.tobytes())
+        binary_file.write(numpy.array(buckets, dtype=_INT64).tobytes())
+        for token in encoded_tokens:
+            binary_file.write(token)
+
+
+class MemoryMappedNamespace:
+    """
+    The tokens of one namespace of a `Vocabulary`, backed by a memory-mapped file as written by
+    [`write_memory_mapped_namespace()`](#write_memory_mapped_namespace).
+
+    Only the pages of the file that lookups touch are read, and they are shared by all processes
+    that open the file, so a huge namespace loads instantly and takes no extra memory in each
+    data loading worker or predictor process. In exchange, each lookup is slower than with a
+    dictionary, and the namespace can't be changed.
+
+    `token_to_index` and `index_to_token` are read-only mappings that take the place of the
+    dictionaries of a `Vocabulary` namespace.
+
+    # Parameters
+
+    filename : `Union[str, PathLike]`
+        The file to read.
+    padding_token : `str`, optional (default = `None`)
+        If given, this token gets index 0, and the tokens in the file start at index 1, the same
+        way as with the text files written by `Vocabulary.save_to_files()`.
+    """
+
+    def __init__(self, filename: Union[str, PathLike], padding_token: Optional[str] = None) -> None:
+        self.filename = str(filename)
+        self.padding_token = padding_token
+        with open(self.filename, "rb") as binary_file:
+            self._open(mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _open(self, buffer: Union[mmap.mmap, bytes]) -> None:
+        if buffer[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{self.filename} is not a memory-mapped vocabulary namespace")
+        self._buffer = buffer
+        num_tokens, num_buckets = _int64_array(buffer, len(_MAGIC), 2)
+        self._num_tokens = num_tokens
+        self._mask = num_buckets - 1
+        self._offsets = _int64_array(buffer, _HEADER_SIZE, num_tokens + 1)
+        buckets_start = _HEADER_SIZE + _INT64.itemsize * (num_tokens + 1)
+        self._buckets = _int64_array(buffer, buckets_start, num_buckets)
+        self._tokens_start = buckets_start + _INT64.itemsize * num_buckets
+        self._start_index = 0 if self.padding_token is None else 1
+        self.token_to_index = MemoryMappedTokenToIndex(self)
+        self.index_to_token = MemoryMappedIndexToToken(self)
+
+    def __getstate__(self):
+        # Memory maps can't be pickled, so processes that receive this object open the file
+        # again themselves. If the file is gone, which happens when it was extracted from an
+        # archive into a temporary directory, we have to send its contents instead.
+        state = {"filename": self.filename, "padding_token": self.padding_token}
+        if not os.path.exists(self.filename):
+            state["contents"] = bytes(self._buffer)
+        return state
+
+    def __setstate__(self, state):
+        if "contents" in state:
+            self.filename = state["filename"]
+            self.padding_token = state["padding_token"]
+            self._open(state["contents"])
+        else:
+            self.__init__(state["filename"], state["padding_token"])  # type: ignore
+
+    def __len__(self) -> int:
+        return self._num_tokens + self._start_index
+
+    def get_index(self, token: str) -> Optional[int]:
+        """
+        Returns the index of `token`, or `None` if it isn't in the namespace.
+        """
+        if token == self.padding_token:
+            return 0
+        encoded_token = token.encode("utf-8")
+        bucket = zlib.crc32(encoded_token) & self._mask
+        while True:
+            index = self._buckets[bucket]
+            if index < 0:
+                return None
+            if self._encoded_token(index) == encoded_token:
+                return index + self._start_index
+            bucket = (bucket + 1) & self._mask
+
+    def get_token(self, index: int) -> Optional[str]:
+        """
+        Returns the token with the given index, or `None` if there is no such index.
+        """
+        if index == 0 and self.padding_token is not None:
+            return self.padding_token
+        index -= self._start_index
+        if not 0 <= index < self._num_tokens:
+            return None
+        return self._encoded_token(index).decode("utf-8")
+
+    def _encoded_token(self, index: int) -> bytes:
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._buffer[self._tokens_start + start : self._tokens_start + end]
+
+
+def _int64_array(buffer: Union[mmap.mmap, bytes], start: int, count: int) -> Sequence[int]:
+    data = memoryview(buffer)[start : start + _INT64.itemsize * count]
+    if sys.byteorder == "little":
+        # Looking up single items of a memoryview is a lot faster than with numpy.
+        return data.cast("q")
+    return numpy.frombuffer(data, _INT64).tolist()
+
+
+class MemoryMappedTokenToIndex(Mapping[str, int]):
+    """
+    A read-only mapping from the tokens of a `MemoryMappedNamespace` to their indices.
+    """
+
+    def __init__(self, namespace: MemoryMappedNamespace) -> None:
+        self.namespace = namespace
+
+    def __getitem__(self, token: str) -> int:
+        index = self.namespace.get_index(token) if isinstance(token, str) else None
+        if index is None:
+            raise KeyError(token)
+        return index
+
+    def __contains__(self, token) -> bool:
+        return isinstance(token, str) and self.namespace.get_index(token) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self.namespace)):
+            yield self.namespace.get_token(index)  # type: ignore
+
+    def __len__(self) -> int:
+        return len(self.namespace)
+
+
+class MemoryMappedIndexToToken(Mapping[int, str]):
+    """
+    A read-only mapping from the indices of a `MemoryMappedNamespace` to their tokens.
+    """
+
+    def __init__(self, namespace: MemoryMappedNamespace) -> None:
+        self.namespace = namespace
+
+    def __getitem__(self, index: int) -> str:
+        try:
+            # Like with a dictionary, numpy integers work as well.
+            token = self.namespace.get_token(operator.index(index))
+        except TypeError:
+            token = None
+        if token is None:
+            raise KeyError(index)
+        return token
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self.namespace)))
+
+    def __len__(self) -> int:
+        return len(self.namespace)
@@ -1,3 +1,4 @@
 from allennlp.data.samplers.batch_sampler import BatchSampler
 from allennlp.data.samplers.bucket_batch_sampler import BucketBatchSampler
 from allennlp.data.samplers.max_tokens_batch_sampler import MaxTokensBatchSampler
+from allennlp.data.samplers.bin_packing_batch_sampler import BinPackingBatchSampler
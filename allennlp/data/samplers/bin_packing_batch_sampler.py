@@ -0,0 +1,131 @@
+import logging
+import random
+from typing import List, Iterable, Sequence
+
+from allennlp.data.instance import Instance
+from allennlp.data.samplers.batch_sampler import BatchSampler
+from allennlp.data.samplers.bucket_batch_sampler import BucketBatchSampler, add_noise_to_value
+
+
+logger = logging.getLogger(__name__)
+
+
+@BatchSampler.register("bin_packing")
+class BinPackingBatchSampler(BucketBatchSampler):
+    """
+    A sampler which packs instances into batches such that the number of tokens in a batch, after
+    padding, does not exceed the given maximum number of tokens, like the
+    [`MaxTokensBatchSampler`](../max_tokens_batch_sampler/#maxtokensbatchsampler), while keeping
+    the padding in each batch as small as it can.
+
+    Instances are packed longest first, in a "first fit decreasing" fashion. Each instance goes into
+    the open batch that it fits into with the least extra padding, and a new batch is only started
+    when it doesn't fit into any of them. Instances of the same size are packed in a random order,
+    and the batches are shuffled, so the batches are different in each epoch without mixing
+    instances of different lengths more than needed.
+
+    How well the batches are packed is kept in `padding_efficiency` (see the
+    [`BucketBatchSampler`](../bucket_batch_sampler/#bucketbatchsampler)).
+
+    # Parameters
+
+    max_tokens : `int`
+        The maximum number of tokens to include in a batch, counting padding.
+
+    sorting_keys : `List[str]`, optional
+        The fields whose lengths are used to pack the instances. The size of an instance is the
+        largest of these lengths. If this is not given, we try to guess the longest field, the same
+        way as the `BucketBatchSampler` does.
+
+    padding_noise : `float`, optional (default = `0.0`)
+        If given, we add this much noise to the lengths of the instances before sorting them, as a
+        percentage of the length of each instance, for more randomness between epochs. This makes
+        batches mix instances of different lengths, so they need more padding. Batches that are left
+        with room for more instances because of this get filled up with shorter instances later on.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        sorting_keys: List[str] = None,
+        padding_noise: float = 0.0,
+    ):
+        super().__init__(-1, sorting_keys, padding_noise, False)
+        self.max_tokens = max_tokens
+
+    def _pack(self, indices: List[int], sizes: List[int]) -> List[List[int]]:
+        """
+        Packs the items in `indices`, in the given order, into batches whose size, computed as
+        the largest size in the batch times the number of items in it, doesn't exceed `max_tokens`.
+        """
+        batches: List[List[int]] = []
+        # The batches that still have room for more items, and the largest size in each of them.
+        open_batches: List[List[int]] = []
+        open_batch_sizes: List[int] = []
+
+        for index, size in zip(indices, sizes):
+            if size > self.max_tokens:
+                logger.warning(
+                    "Found instance of size %d, which is bigger than the expected size for a batch (%d)",
+                    size,
+                    self.max_tokens,
+                )
+                batches.append([index])
+                continue
+
+            best_batch = -1
+            best_padding = 0
+            for i, (batch, batch_size) in enumerate(zip(open_batches, open_batch_sizes)):
+                new_batch_size = max(batch_size, size)
+                if new_batch_size * (len(batch) + 1) > self.max_tokens:
+                    continue
+                padding = new_batch_size - size + (new_batch_size - batch_size) * len(batch)
+                if best_batch < 0 or padding < best_padding:
+                    best_batch = i
+                    best_padding = padding
+                    if padding == 0:
+                        break
+
+            if best_batch < 0:
+                open_batches.append([])
+                open_batch_sizes.append(size)
+                best_batch = len(open_batches) - 1
+            batch = open_batches[best_batch]
+            batch.append(index)
+            batch_size = max(open_batch_sizes[best_batch], size)
+            open_batch_sizes[best_batch] = batch_size
+
+            if batch_size * (len(batch) + 1) > self.max_tokens:
+                # Not even an instance of size one would fit into this batch anymore.
+                batches.append(batch)
+                del open_batches[best_batch]
+                del open_batch_sizes[best_batch]
+
+        batches.extend(open_batches)
+        return batches
+
+    def get_batch_indices(self, instances: Sequence[Instance]) -> Iterable[List[int]]:
+        if not self.sorting_keys:
+            logger.info("No sorting keys given; trying to guess a good one")
+            self._guess_sorting_keys(instances)
+            logger.info(f"Using {self.sorting_keys} as the sorting keys")
+        lengths = list(self._get_lengths(instances))
+        sizes = [max(length) for length in lengths]
+        # Longest first, with instances of the same size in a random order.
+        order = sorted(
+            range(len(sizes)),
+            key=lambda index: (
+                -add_noise_to_value(sizes[index], self.padding_noise),
+                random.random(),
+            ),
+        )
+
+        batches = self._pack(order, [sizes[index] for index in order])
+        self._record_padding_efficiency(batches, list(range(len(lengths))), lengths)
+        random.shuffle(batches)
+        for batch in batches:
+            yield batch
+
+    def get_num_batches(self, instances: Sequence[Instance]) -> int:
+        # There is no easy way to count the number of batches, so we need to iterate and count.
+        return sum(1 for _ in self.get_batch_indices(instances))
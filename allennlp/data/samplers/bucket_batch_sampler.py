@@ -1,11 +1,12 @@
 import logging
 import math
-from typing import List, Iterable, Tuple, Sequence, Optional
+from typing import List, Iterable, Iterator, Tuple, Sequence, Optional
 import random
 
 from allennlp.common.checks import ConfigurationError
 from allennlp.common.util import lazy_groups_of
 from allennlp.data.instance import Instance
+from allennlp.data.memory_mapped_instances import MemoryMappedInstances
 from allennlp.data.samplers.batch_sampler import BatchSampler
 
 
@@ -61,6 +62,13 @@ class BucketBatchSampler(BatchSampler):
         If `False`, the sampler won't shuffle the batches. `padding_noise` will be ignored and set
         to `0.0`.
 
+    # Attributes
+
+    padding_efficiency : `Optional[float]`
+        The fraction of the padded lengths of the `sorting_keys` fields that are real tokens, over
+        the batches made by the last call to `get_batch_indices()`, so `1.0` means that those batches
+        don't need any padding. This is also logged, so that samplers can be compared.
+
     """
 
     def __init__(
@@ -78,6 +86,7 @@ class BucketBatchSampler(BatchSampler):
         self.shuffle = shuffle
         if not shuffle:
             self.padding_noise = 0.0
+        self.padding_efficiency: Optional[float] = None
 
     def _argsort_by_padding(
         self, instances: Iterable[Instance]
@@ -92,10 +101,40 @@ class BucketBatchSampler(BatchSampler):
             self._guess_sorting_keys(instances)
             logger.info(f"Using {self.sorting_keys} as the sorting keys")
         instances_with_lengths = []
+        for lengths in self._get_lengths(instances):
+            noisy_lengths = [add_noise_to_value(length, self.padding_noise) for length in lengths]
+            instances_with_lengths.append((noisy_lengths, lengths))
+        with_indices = [(x, i) for i, x in enumerate(instances_with_lengths)]
+        with_indices.sort(key=lambda x: x[0][0])
+        return (
+            [instance_with_index[-1] for instance_with_index in with_indices],
+            [instance_with_index[0][1] for instance_with_index in with_indices],
+        )
+
+    def _get_lengths(self, instances: Iterable[Instance]) -> Iterator[List[int]]:
+        """
+        Yields the lengths of the `sorting_keys` fields of each instance.
+
+        `MemoryMappedInstances` store these lengths, so we can get them without decoding
+        any instances.
+        """
+        if isinstance(instances, MemoryMappedInstances):
+            for field_name in self.sorting_keys:  # type: ignore
+                if field_name not in instances.field_names:
+                    raise ConfigurationError(
+                        f'Sorting key "{field_name}" is not a field with a length in the instances. '
+                        f"Available fields/keys are {instances.field_names}."
+                    )
+            columns = [
+                instances.field_lengths(field_name).tolist()
+                for field_name in self.sorting_keys  # type: ignore
+            ]
+            for lengths in zip(*columns):
+                yield list(lengths)
+            return
+
         for instance in instances:
-            # Make sure instance is indexed before calling .get_padding
             lengths = []
-            noisy_lengths = []
             for field_name in self.sorting_keys:  # type: ignore
                 if field_name not in instance.fields:
                     raise ConfigurationError(
@@ -103,24 +142,38 @@ class BucketBatchSampler(BatchSampler):
                         f"Available fields/keys are {list(instance.fields.keys())}."
                     )
                 lengths.append(len(instance.fields[field_name]))
+            yield lengths
 
-                noisy_lengths.append(add_noise_to_value(lengths[-1], self.padding_noise))
-            instances_with_lengths.append((noisy_lengths, lengths, instance))
-        with_indices = [(x, i) for i, x in enumerate(instances_with_lengths)]
-        with_indices.sort(key=lambda x: x[0][0])
-        return (
-            [instance_with_index[-1] for instance_with_index in with_indices],
-            [instance_with_index[0][1] for instance_with_index in with_indices],
+    def _record_padding_efficiency(
+        self, batches: List[List[int]], indices: List[int], lengths: List[List[int]]
+    ) -> None:
+        """
+        Sets `padding_efficiency` for `batches`, given the lengths of the instances as returned by
+        `_argsort_by_padding()`.
+        """
+        lengths_by_index = dict(zip(indices, lengths))
+        real_tokens = 0
+        padded_tokens = 0
+        for batch in batches:
+            for key_lengths in zip(*(lengths_by_index[index] for index in batch)):
+                real_tokens += sum(key_lengths)
+                padded_tokens += max(key_lengths) * len(key_lengths)
+        self.padding_efficiency = real_tokens / padded_tokens if padded_tokens else 1.0
+        logger.info(
+            "%d batches with a padding efficiency of %.1f%%",
+            len(batches),
+            100 * self.padding_efficiency,
         )
 
     def get_batch_indices(self, instances: Sequence[Instance]) -> Iterable[List[int]]:
-        indices, _ = self._argsort_by_padding(instances)
+        indices, lengths = self._argsort_by_padding(instances)
         batches = []
         for group in lazy_groups_of(indices, self.batch_size):
             batch_indices = list(group)
             if self.drop_last and len(batch_indices) < self.batch_size:
                 continue
             batches.append(batch_indices)
+        self._record_padding_efficiency(batches, indices, lengths)
         if self.shuffle:
             random.shuffle(batches)
         for batch in batches:
@@ -142,15 +195,24 @@ class BucketBatchSampler(BatchSampler):
         """
         max_length = 0.0
         longest_field: Optional[str] = None
-        for i, instance in enumerate(instances):
-            for field_name, field in instance.fields.items():
-                length = len(field)
+        if isinstance(instances, MemoryMappedInstances):
+            # We know the lengths without having to decode the instances.
+            for field_name in instances.field_names:
+                lengths = instances.field_lengths(field_name)[: num_instances + 2]
+                length = max(lengths.tolist(), default=0)
                 if length > max_length:
                     max_length = length
                     longest_field = field_name
-            if i > num_instances:
-                # Only use num_instances instances to guess the sorting keys.
-                break
+        else:
+            for i, instance in enumerate(instances):
+                for field_name, field in instance.fields.items():
+                    length = len(field)
+                    if length > max_length:
+                        max_length = length
+                        longest_field = field_name
+                if i > num_instances:
+                    # Only use num_instances instances to guess the sorting keys.
+                    break
 
         if not longest_field:
             # This shouldn't ever happen (you basically have to have an empty instance list), but
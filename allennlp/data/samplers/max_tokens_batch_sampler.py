@@ -102,6 +102,7 @@ class MaxTokensBatchSampler(BucketBatchSampler):
         group_iterator = self._lazy_groups_of_max_size(indices, max_lengths)
 
         batches = [list(group) for group in group_iterator]
+        self._record_padding_efficiency(batches, indices, lengths)
         random.shuffle(batches)
         for batch in batches:
             yield batch
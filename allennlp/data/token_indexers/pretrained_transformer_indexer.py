@@ -1,7 +1,7 @@
 from typing import Dict, List, Optional, Tuple, Any
 import logging
 import torch
-from allennlp.common.util import pad_sequence_to_length
+from allennlp.common.util import pad_sequence_to_length, pad_sequences_to_tensor
 
 from overrides import overrides
 
@@ -217,32 +217,47 @@ class PretrainedTransformerIndexer(TokenIndexer):
     ) -> Dict[str, torch.Tensor]:
         tensor_dict = {}
         for key, val in tokens.items():
-            if key == "type_ids":
-                padding_value = 0
-                mktensor = torch.LongTensor
-            elif key == "mask" or key == "wordpiece_mask":
-                padding_value = False
-                mktensor = torch.BoolTensor
-            elif len(val) > 0 and isinstance(val[0], bool):
-                padding_value = False
-                mktensor = torch.BoolTensor
-            else:
-                padding_value = self._tokenizer.pad_token_id
-                if padding_value is None:
-                    padding_value = (
-                        0  # Some tokenizers don't have padding tokens and rely on the mask only.
-                    )
-                mktensor = torch.LongTensor
-
-            tensor = mktensor(
+            padding_value, dtype = self._padding_value_and_dtype(key, val)
+            tensor = torch.tensor(
                 pad_sequence_to_length(
                     val, padding_lengths[key], default_value=lambda: padding_value
-                )
+                ),
+                dtype=dtype,
             )
 
             tensor_dict[key] = tensor
         return tensor_dict
 
+    @overrides
+    def batch_as_padded_tensor_dict(
+        self, tokens_list: List[IndexedTokenList], padding_lengths: Dict[str, int]
+    ) -> Dict[str, torch.Tensor]:
+        tensor_dict = {}
+        for key in tokens_list[0]:
+            sequences = [tokens[key] for tokens in tokens_list]
+            padding_value, dtype = self._padding_value_and_dtype(
+                key, next((sequence for sequence in sequences if sequence), [])
+            )
+            tensor_dict[key] = pad_sequences_to_tensor(
+                sequences, padding_lengths[key], padding_value, dtype
+            )
+        return tensor_dict
+
+    def _padding_value_and_dtype(self, key: str, val: List[Any]) -> Tuple[Any, torch.dtype]:
+        if key == "type_ids":
+            return 0, torch.long
+        elif key == "mask" or key == "wordpiece_mask":
+            return False, torch.bool
+        elif len(val) > 0 and isinstance(val[0], bool):
+            return False, torch.bool
+        else:
+            padding_value = self._tokenizer.pad_token_id
+            if padding_value is None:
+                padding_value = (
+                    0  # Some tokenizers don't have padding tokens and rely on the mask only.
+                )
+            return padding_value, torch.long
+
     def __eq__(self, other):
         if isinstance(other, PretrainedTransformerIndexer):
             for key in self.__dict__:
@@ -2,7 +2,9 @@ from typing import Dict, List, Optional
 import itertools
 
 from overrides import overrides
+import torch
 
+from allennlp.common.util import pad_sequences_to_tensor
 from allennlp.data.vocabulary import Vocabulary
 from allennlp.data.tokenizers import Token
 from allennlp.data.token_indexers.token_indexer import TokenIndexer, IndexedTokenList
@@ -79,24 +81,36 @@ class SingleIdTokenIndexer(TokenIndexer):
     def tokens_to_indices(
         self, tokens: List[Token], vocabulary: Vocabulary
     ) -> Dict[str, List[int]]:
-        indices: List[int] = []
-
-        for token in itertools.chain(self._start_tokens, tokens, self._end_tokens):
-            text = self._get_feature_value(token)
-            if self.namespace is None:
-                # We could have a check here that `text` is an int; not sure it's worth it.
-                indices.append(text)  # type: ignore
-            else:
-                if self.lowercase_tokens:
-                    text = text.lower()
-                indices.append(vocabulary.get_token_index(text, self.namespace))
-
-        return {"tokens": indices}
+        texts = [
+            self._get_feature_value(token)
+            for token in itertools.chain(self._start_tokens, tokens, self._end_tokens)
+        ]
+        if self.namespace is None:
+            # We could have a check here that the values are ints; not sure it's worth it.
+            return {"tokens": texts}  # type: ignore
+        if self.lowercase_tokens:
+            texts = [text.lower() for text in texts]
+        return {"tokens": vocabulary.get_token_indices(texts, self.namespace)}
 
     @overrides
     def get_empty_token_list(self) -> IndexedTokenList:
         return {"tokens": []}
 
+    @overrides
+    def batch_as_padded_tensor_dict(
+        self, tokens_list: List[IndexedTokenList], padding_lengths: Dict[str, int]
+    ) -> Dict[str, torch.Tensor]:
+        tensor_dict = {}
+        for key in tokens_list[0]:
+            sequences = [tokens[key] for tokens in tokens_list]
+            if any(sequence and isinstance(sequence[0], bool) for sequence in sequences):
+                tensor_dict[key] = pad_sequences_to_tensor(
+                    sequences, padding_lengths[key], False, torch.bool
+                )
+            else:
+                tensor_dict[key] = pad_sequences_to_tensor(sequences, padding_lengths[key])
+        return tensor_dict
+
     def _get_feature_value(self, token: Token) -> str:
         text = getattr(token, self._feature_name)
         if text is None:
@@ -6,7 +6,7 @@ from overrides import overrides
 import torch
 
 from allennlp.common.checks import ConfigurationError
-from allennlp.common.util import pad_sequence_to_length
+from allennlp.common.util import pad_sequence_to_length, pad_sequences_to_tensor
 from allennlp.data.token_indexers.token_indexer import TokenIndexer, IndexedTokenList
 from allennlp.data.tokenizers import Token, CharacterTokenizer
 from allennlp.data.vocabulary import Vocabulary
@@ -80,22 +80,35 @@ class TokenCharactersIndexer(TokenIndexer):
     def tokens_to_indices(
         self, tokens: List[Token], vocabulary: Vocabulary
     ) -> Dict[str, List[List[int]]]:
-        indices: List[List[int]] = []
+        characters_per_token: List[List[Token]] = []
         for token in itertools.chain(self._start_tokens, tokens, self._end_tokens):
-            token_indices: List[int] = []
             if token.text is None:
                 raise ConfigurationError(
                     "TokenCharactersIndexer needs a tokenizer that retains text"
                 )
-            for character in self._character_tokenizer.tokenize(token.text):
-                if getattr(character, "text_id", None) is not None:
-                    # `text_id` being set on the token means that we aren't using the vocab, we just
-                    # use this id instead.
-                    index = character.text_id
-                else:
-                    index = vocabulary.get_token_index(character.text, self._namespace)
-                token_indices.append(index)
-            indices.append(token_indices)
+            characters_per_token.append(self._character_tokenizer.tokenize(token.text))
+
+        # We look up the characters of all tokens at once, and then take their indices in order.
+        # `text_id` being set on a character means that we aren't using the vocab, we just use
+        # this id instead.
+        vocab_indices = iter(
+            vocabulary.get_token_indices(
+                [
+                    character.text  # type: ignore
+                    for characters in characters_per_token
+                    for character in characters
+                    if character.text_id is None
+                ],
+                self._namespace,
+            )
+        )
+        indices: List[List[int]] = [
+            [
+                next(vocab_indices) if character.text_id is None else character.text_id
+                for character in characters
+            ]
+            for characters in characters_per_token
+        ]
         return {"token_characters": indices}
 
     @overrides
@@ -141,6 +154,23 @@ class TokenCharactersIndexer(TokenIndexer):
             )
         }
 
+    @overrides
+    def batch_as_padded_tensor_dict(
+        self, tokens_list: List[IndexedTokenList], padding_lengths: Dict[str, int]
+    ) -> Dict[str, torch.Tensor]:
+        num_tokens = padding_lengths["token_characters"]
+        num_characters = padding_lengths["num_token_characters"]
+        # We pad the characters of all of the tokens in the batch at once.
+        padded_tokens = [
+            token
+            for tokens in tokens_list
+            for token in pad_sequence_to_length(
+                tokens["token_characters"], num_tokens, default_value=lambda: []
+            )
+        ]
+        characters = pad_sequences_to_tensor(padded_tokens, num_characters)
+        return {"token_characters": characters.view(len(tokens_list), num_tokens, num_characters)}
+
     @overrides
     def get_empty_token_list(self) -> IndexedTokenList:
         return {"token_characters": []}
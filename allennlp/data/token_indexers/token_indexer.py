@@ -6,6 +6,7 @@ from allennlp.common import Registrable
 from allennlp.common.util import pad_sequence_to_length
 from allennlp.data.tokenizers import Token
 from allennlp.data.vocabulary import Vocabulary
+from allennlp.nn import util
 
 # An indexed token list represents the arguments that will be passed to a TokenEmbedder
 # corresponding to this TokenIndexer.  Each argument that the TokenEmbedder needs will have one
@@ -119,6 +120,22 @@ class TokenIndexer(Registrable):
             tensor_dict[key] = tensor
         return tensor_dict
 
+    def batch_as_padded_tensor_dict(
+        self, tokens_list: List[IndexedTokenList], padding_lengths: Dict[str, int]
+    ) -> Dict[str, torch.Tensor]:
+        """
+        Pads the indexed tokens of a whole batch to the input padding lengths and returns them
+        as a `Dict[str, torch.Tensor]` of batched tensors. This gives the same result as calling
+        `as_padded_tensor_dict()` on each list of tokens and stacking the tensors, which is what
+        the default implementation does.
+
+        `TokenIndexer`s can override this to pad the tokens of the whole batch at once, which is
+        much faster.
+        """
+        return util.batch_tensor_dicts(
+            [self.as_padded_tensor_dict(tokens, padding_lengths) for tokens in tokens_list]
+        )
+
     def __eq__(self, other) -> bool:
         if isinstance(self, other.__class__):
             return self.__dict__ == other.__dict__
@@ -11,3 +11,4 @@ from allennlp.data.tokenizers.pretrained_transformer_tokenizer import Pretrained
 from allennlp.data.tokenizers.character_tokenizer import CharacterTokenizer
 from allennlp.data.tokenizers.sentence_splitter import SentenceSplitter
 from allennlp.data.tokenizers.whitespace_tokenizer import WhitespaceTokenizer
+from allennlp.data.tokenizers.caching_tokenizer import CachingTokenizer, CachingSentenceSplitter
@@ -0,0 +1,234 @@
+from collections import OrderedDict
+import threading
+from typing import Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from overrides import overrides
+
+from allennlp.data.tokenizers.sentence_splitter import SentenceSplitter
+from allennlp.data.tokenizers.token_class import Token
+from allennlp.data.tokenizers.tokenizer import Tokenizer
+
+
+V = TypeVar("V")
+
+
+class LruCache(Generic[V]):
+    """
+    A dictionary with at most `max_size` items, which throws out the least recently used item
+    when it gets too big, and counts how often looking up an item finds it.
+
+    It is safe to use from several threads, and it can be pickled, which gives an empty cache
+    of the same size.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        if max_size < 1:
+            raise ValueError("The size of an LRU cache must be at least 1")
+        self.max_size = max_size
+        self._items: "OrderedDict[Hashable, V]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # Locks can't be pickled, and sending a full cache to every worker process would take
+        # longer than filling it again.
+        return {"max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(state["max_size"])  # type: ignore
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        Returns the item with the given key, or `None` if it isn't in the cache.
+        """
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Throws out all items, and sets the statistics back to zero.
+        """
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The fraction of lookups that found their item, or 0 if there weren't any lookups yet.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# The fields of a `Token`, in the order that its constructor takes them.
+_TokenValues = Tuple[Optional[str], ...]
+
+
+def _token_values(token: Token) -> _TokenValues:
+    return tuple(getattr(token, name) for name in Token.__slots__)
+
+
+@Tokenizer.register("caching")
+class CachingTokenizer(Tokenizer):
+    """
+    A `Tokenizer` that remembers how the given tokenizer split the most recently used texts, so
+    that texts that show up again, like duplicates in augmented training data or in prediction
+    requests, don't need to be tokenized again.
+
+    Every call gets its own copies of the tokens, so changing them doesn't change the cache.
+    The copies are cheap to make, a lot cheaper than tokenizing with spaCy or a transformer's
+    tokenizer, but there is no point in caching fast tokenizers like the `WhitespaceTokenizer`.
+
+    `hits`, `misses` and `hit_rate` tell how well the cache works. Each data loading worker has
+    its own cache, and its own statistics.
+
+    Registered as a `Tokenizer` with name "caching".
+
+    # Parameters
+
+    tokenizer : `Tokenizer`
+        The tokenizer that does the work.
+    max_size : `int`, optional (default = `10000`)
+        The number of texts to remember the tokens of.
+    """
+
+    def __init__(self, tokenizer: Tokenizer, max_size: int = 10000) -> None:
+        self.tokenizer = tokenizer
+        self.cache: LruCache[Tuple[_TokenValues, ...]] = LruCache(max_size)
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self.cache.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache.hit_rate
+
+    @overrides
+    def tokenize(self, text: str) -> List[Token]:
+        values = self.cache.get(text)
+        if values is None:
+            tokens = self.tokenizer.tokenize(text)
+            if not all(isinstance(token, Token) for token in tokens):
+                # spaCy's own tokens, which we can't copy.
+                return tokens
+            values = tuple(_token_values(token) for token in tokens)
+            self.cache.put(text, values)
+            return tokens
+        return [Token(*token_values) for token_values in values]
+
+    @overrides
+    def batch_tokenize(self, texts: List[str]) -> List[List[Token]]:
+        results: List[Optional[List[Token]]] = []
+        # The positions of the texts that aren't cached, by text.
+        missing: "OrderedDict[str, List[int]]" = OrderedDict()
+        for i, text in enumerate(texts):
+            values = self.cache.get(text) if text not in missing else None
+            if values is None:
+                missing.setdefault(text, []).append(i)
+                results.append(None)
+            else:
+                results.append([Token(*token_values) for token_values in values])
+
+        if missing:
+            for text, tokens in zip(missing, self.tokenizer.batch_tokenize(list(missing))):
+                positions = missing[text]
+                results[positions[0]] = tokens
+                if all(isinstance(token, Token) for token in tokens):
+                    values = tuple(_token_values(token) for token in tokens)
+                    self.cache.put(text, values)
+                    for i in positions[1:]:
+                        results[i] = [Token(*token_values) for token_values in values]
+                else:
+                    for i in positions[1:]:
+                        results[i] = list(tokens)
+        return results  # type: ignore
+
+    @overrides
+    def add_special_tokens(
+        self, tokens1: List[Token], tokens2: Optional[List[Token]] = None
+    ) -> List[Token]:
+        return self.tokenizer.add_special_tokens(tokens1, tokens2)
+
+    @overrides
+    def num_special_tokens_for_sequence(self) -> int:
+        return self.tokenizer.num_special_tokens_for_sequence()
+
+    @overrides
+    def num_special_tokens_for_pair(self) -> int:
+        return self.tokenizer.num_special_tokens_for_pair()
+
+
+@SentenceSplitter.register("caching")
+class CachingSentenceSplitter(SentenceSplitter):
+    """
+    A `SentenceSplitter` that remembers how the given sentence splitter split the most recently
+    used texts, like the [`CachingTokenizer`](#cachingtokenizer) does for tokenizers.
+
+    Registered as a `SentenceSplitter` with name "caching".
+
+    # Parameters
+
+    sentence_splitter : `SentenceSplitter`
+        The sentence splitter that does the work.
+    max_size : `int`, optional (default = `10000`)
+        The number of texts to remember the sentences of.
+    """
+
+    def __init__(self, sentence_splitter: SentenceSplitter, max_size: int = 10000) -> None:
+        self.sentence_splitter = sentence_splitter
+        self.cache: LruCache[Tuple[str, ...]] = LruCache(max_size)
+
+    @property
+    def hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self.cache.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache.hit_rate
+
+    @overrides
+    def split_sentences(self, text: str) -> List[str]:
+        sentences = self.cache.get(text)
+        if sentences is None:
+            sentences = tuple(self.sentence_splitter.split_sentences(text))
+            self.cache.put(text, sentences)
+        return list(sentences)
+
+    @overrides
+    def batch_split_sentences(self, texts: List[str]) -> List[List[str]]:
+        results: List[Optional[Tuple[str, ...]]] = [self.cache.get(text) for text in texts]
+        missing = list(OrderedDict.fromkeys(text for text, r in zip(texts, results) if r is None))
+        if missing:
+            split = dict(zip(missing, self.sentence_splitter.batch_split_sentences(missing)))
+            for text, sentences in split.items():
+                self.cache.put(text, tuple(sentences))
+            results = [tuple(split[text]) if r is None else r for text, r in zip(texts, results)]
+        return [list(sentences) for sentences in results]  # type: ignore
@@ -1,5 +1,6 @@
 import copy
 import dataclasses
+import itertools
 import logging
 from typing import Any, Dict, List, Optional, Tuple, Iterable
 
@@ -227,12 +228,42 @@ class PretrainedTransformerTokenizer(Tokenizer):
         """
         This method only handles a single sentence (or sequence) of text.
         """
+        encoded_tokens = self.tokenizer.encode_plus(text=text, **self._encoding_kwargs())
+        return self._encoded_tokens_to_tokens(
+            text,
+            encoded_tokens["input_ids"],
+            encoded_tokens["token_type_ids"],
+            encoded_tokens["special_tokens_mask"],
+            encoded_tokens.get("offset_mapping"),
+        )
+
+    @overrides
+    def batch_tokenize(self, texts: List[str]) -> List[List[Token]]:
+        """
+        Tokenizes all of the texts with one call to the HuggingFace tokenizer, which fast
+        tokenizers run in parallel. Each text is handled like in `tokenize()`.
+        """
+        if not texts:
+            return []
+        encoded_batch = self.tokenizer.batch_encode_plus(texts, **self._encoding_kwargs())
+        offsets_batch = encoded_batch.get("offset_mapping") or [None] * len(texts)
+        return [
+            self._encoded_tokens_to_tokens(*encoded_tokens)
+            for encoded_tokens in zip(
+                texts,
+                encoded_batch["input_ids"],
+                encoded_batch["token_type_ids"],
+                encoded_batch["special_tokens_mask"],
+                offsets_batch,
+            )
+        ]
+
+    def _encoding_kwargs(self) -> Dict[str, Any]:
         max_length = self._max_length
         if max_length is not None and not self._add_special_tokens:
             max_length += self.num_special_tokens_for_sequence()
 
-        encoded_tokens = self.tokenizer.encode_plus(
-            text=text,
+        return dict(
             add_special_tokens=True,
             max_length=max_length,
             truncation=True if max_length is not None else False,
@@ -242,21 +273,26 @@ class PretrainedTransformerTokenizer(Tokenizer):
             return_token_type_ids=True,
             return_special_tokens_mask=True,
         )
+
+    def _encoded_tokens_to_tokens(
+        self,
+        text: str,
+        token_ids: List[int],
+        token_type_ids: List[int],
+        special_tokens_mask: List[int],
+        token_offsets: Optional[List[Optional[Tuple[int, int]]]],
+    ) -> List[Token]:
         # token_ids contains a final list with ids for both regular and special tokens
-        token_ids, token_type_ids, special_tokens_mask, token_offsets = (
-            encoded_tokens["input_ids"],
-            encoded_tokens["token_type_ids"],
-            encoded_tokens["special_tokens_mask"],
-            encoded_tokens.get("offset_mapping"),
-        )
 
         # If we don't have token offsets, try to calculate them ourselves.
         if token_offsets is None:
             token_offsets = self._estimate_character_indices(text, token_ids)
 
+        token_texts = self.tokenizer.convert_ids_to_tokens(token_ids, skip_special_tokens=False)
+
         tokens = []
-        for token_id, token_type_id, special_token_mask, offsets in zip(
-            token_ids, token_type_ids, special_tokens_mask, token_offsets
+        for token_text, token_id, token_type_id, special_token_mask, offsets in zip(
+            token_texts, token_ids, token_type_ids, special_tokens_mask, token_offsets
         ):
             # In `special_tokens_mask`, 1s indicate special tokens and 0s indicate regular tokens.
             # NOTE: in transformers v3.4.0 (and probably older versions) the docstring
@@ -273,7 +309,7 @@ class PretrainedTransformerTokenizer(Tokenizer):
 
             tokens.append(
                 Token(
-                    text=self.tokenizer.convert_ids_to_tokens(token_id, skip_special_tokens=False),
+                    text=token_text,
                     text_id=token_id,
                     type_id=token_type_id,
                     idx=start,
@@ -348,27 +384,49 @@ class PretrainedTransformerTokenizer(Tokenizer):
     def _intra_word_tokenize(
         self, string_tokens: List[str]
     ) -> Tuple[List[Token], List[Optional[Tuple[int, int]]]]:
-        tokens: List[Token] = []
-        offsets: List[Optional[Tuple[int, int]]] = []
-        for token_string in string_tokens:
-            wordpieces = self.tokenizer.encode_plus(
-                token_string,
+        return self._batch_intra_word_tokenize([string_tokens])[0]
+
+    def _batch_intra_word_tokenize(
+        self, batch_string_tokens: List[List[str]]
+    ) -> List[Tuple[List[Token], List[Optional[Tuple[int, int]]]]]:
+        # We tokenize all of the words of all of the sequences with one call.
+        words = [
+            token_string for string_tokens in batch_string_tokens for token_string in string_tokens
+        ]
+        if words:
+            wp_ids_per_word = self.tokenizer.batch_encode_plus(
+                words,
                 add_special_tokens=False,
                 return_tensors=None,
                 return_offsets_mapping=False,
                 return_attention_mask=False,
-            )
-            wp_ids = wordpieces["input_ids"]
-
-            if len(wp_ids) > 0:
-                offsets.append((len(tokens), len(tokens) + len(wp_ids) - 1))
-                tokens.extend(
-                    Token(text=wp_text, text_id=wp_id)
-                    for wp_id, wp_text in zip(wp_ids, self.tokenizer.convert_ids_to_tokens(wp_ids))
-                )
-            else:
-                offsets.append(None)
-        return tokens, offsets
+                return_token_type_ids=False,
+            )["input_ids"]
+        else:
+            wp_ids_per_word = []
+        all_wp_ids = [wp_id for wp_ids in wp_ids_per_word for wp_id in wp_ids]
+        all_wp_texts = self.tokenizer.convert_ids_to_tokens(all_wp_ids)
+
+        results = []
+        wp_ids_iterator = iter(wp_ids_per_word)
+        wp_index = 0
+        for string_tokens in batch_string_tokens:
+            tokens: List[Token] = []
+            offsets: List[Optional[Tuple[int, int]]] = []
+            for wp_ids in itertools.islice(wp_ids_iterator, len(string_tokens)):
+                if len(wp_ids) > 0:
+                    offsets.append((len(tokens), len(tokens) + len(wp_ids) - 1))
+                    tokens.extend(
+                        Token(text=wp_text, text_id=wp_id)
+                        for wp_id, wp_text in zip(
+                            wp_ids, all_wp_texts[wp_index : wp_index + len(wp_ids)]
+                        )
+                    )
+                    wp_index += len(wp_ids)
+                else:
+                    offsets.append(None)
+            results.append((tokens, offsets))
+        return results
 
     @staticmethod
     def _increment_offsets(
@@ -389,10 +447,21 @@ class PretrainedTransformerTokenizer(Tokenizer):
 
         This function inserts special tokens.
         """
-        tokens, offsets = self._intra_word_tokenize(string_tokens)
-        tokens = self.add_special_tokens(tokens)
-        offsets = self._increment_offsets(offsets, len(self.single_sequence_start_tokens))
-        return tokens, offsets
+        return self.batch_intra_word_tokenize([string_tokens])[0]
+
+    def batch_intra_word_tokenize(
+        self, batch_string_tokens: List[List[str]]
+    ) -> List[Tuple[List[Token], List[Optional[Tuple[int, int]]]]]:
+        """
+        Does the same as `intra_word_tokenize` for each of the given sequences of words, but
+        tokenizes all of their words with one call to the HuggingFace tokenizer.
+        """
+        results = []
+        for tokens, offsets in self._batch_intra_word_tokenize(batch_string_tokens):
+            tokens = self.add_special_tokens(tokens)
+            offsets = self._increment_offsets(offsets, len(self.single_sequence_start_tokens))
+            results.append((tokens, offsets))
+        return results
 
     def intra_word_tokenize_sentence_pair(
         self, string_tokens_a: List[str], string_tokens_b: List[str]
@@ -404,8 +473,9 @@ class PretrainedTransformerTokenizer(Tokenizer):
 
         This function inserts special tokens.
         """
-        tokens_a, offsets_a = self._intra_word_tokenize(string_tokens_a)
-        tokens_b, offsets_b = self._intra_word_tokenize(string_tokens_b)
+        (tokens_a, offsets_a), (tokens_b, offsets_b) = self._batch_intra_word_tokenize(
+            [string_tokens_a, string_tokens_b]
+        )
         offsets_b = self._increment_offsets(
             offsets_b,
             (
@@ -5,6 +5,7 @@ out-of-vocabulary token.
 
 import codecs
 import copy
+import itertools
 import logging
 import os
 import re
@@ -17,6 +18,11 @@ from allennlp.common.file_utils import cached_path, FileLock
 from allennlp.common.checks import ConfigurationError
 from allennlp.common.tqdm import Tqdm
 from allennlp.common.util import namespace_match
+from allennlp.data.memory_mapped_vocabulary import (
+    MemoryMappedNamespace,
+    MemoryMappedTokenToIndex,
+    write_memory_mapped_namespace,
+)
 
 if TYPE_CHECKING:
     from allennlp.data import instance as adi  # noqa
@@ -27,6 +33,7 @@ DEFAULT_NON_PADDED_NAMESPACES = ("*tags", "*labels")
 DEFAULT_PADDING_TOKEN = "@@PADDING@@"
 DEFAULT_OOV_TOKEN = "@@UNKNOWN@@"
 NAMESPACE_PADDING_FILE = "non_padded_namespaces.txt"
+MEMORY_MAPPED_NAMESPACE_SUFFIX = ".bin"
 _NEW_LINE_REGEX = re.compile(r"\n|\r\n")
 
 
@@ -292,6 +299,7 @@ class Vocabulary(Registrable):
         min_pretrained_embeddings: Dict[str, int] = None,
         padding_token: Optional[str] = DEFAULT_PADDING_TOKEN,
         oov_token: Optional[str] = DEFAULT_OOV_TOKEN,
+        counter: Dict[str, Dict[str, int]] = None,
     ) -> "Vocabulary":
         """
         Constructs a vocabulary given a collection of `Instances` and some parameters.
@@ -299,15 +307,18 @@ class Vocabulary(Registrable):
         and the other parameters, to :func:`__init__`.  See that method for a description
         of what the other parameters do.
 
-        The `instances` parameter does not get an entry in a typical AllenNLP configuration file,
-        but the other parameters do (if you want non-default parameters).
+        If `counter` is given, the counts in it are added to the counts from the instances. This
+        is how vocabulary items that were already counted elsewhere (for example, by
+        [`DataLoader.count_vocab_items()`](../data_loaders/data_loader/#count_vocab_items))
+        get into the vocabulary.
+
+        The `instances` and `counter` parameters do not get an entry in a typical AllenNLP
+        configuration file, but the other parameters do (if you want non-default parameters).
         """
         logger.info("Fitting token dictionary from dataset.")
         padding_token = padding_token if padding_token is not None else DEFAULT_PADDING_TOKEN
         oov_token = oov_token if oov_token is not None else DEFAULT_OOV_TOKEN
-        namespace_token_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
-        for instance in Tqdm.tqdm(instances, desc="building vocab"):
-            instance.count_vocab_items(namespace_token_counts)
+        namespace_token_counts = _count_vocab_items(instances, counter)
 
         return cls(
             counter=namespace_token_counts,
@@ -333,6 +344,9 @@ class Vocabulary(Registrable):
         Loads a `Vocabulary` that was serialized either using `save_to_files` or inside
         a model archive file.
 
+        Namespaces that were saved in the binary format (see `save_to_files`) are memory-mapped
+        instead of being read into memory.
+
         # Parameters
 
         directory : `str`
@@ -374,13 +388,21 @@ class Vocabulary(Registrable):
                     continue
                 if namespace_filename.startswith("."):
                     continue
-                namespace = namespace_filename.replace(".txt", "")
+                if namespace_filename.endswith(MEMORY_MAPPED_NAMESPACE_SUFFIX):
+                    namespace = namespace_filename[: -len(MEMORY_MAPPED_NAMESPACE_SUFFIX)]
+                else:
+                    namespace = namespace_filename.replace(".txt", "")
                 if any(namespace_match(pattern, namespace) for pattern in non_padded_namespaces):
                     is_padded = False
                 else:
                     is_padded = True
                 filename = os.path.join(directory, namespace_filename)
-                vocab.set_from_file(filename, is_padded, namespace=namespace, oov_token=oov_token)
+                if namespace_filename.endswith(MEMORY_MAPPED_NAMESPACE_SUFFIX):
+                    vocab.set_from_memory_mapped_file(filename, is_padded, namespace=namespace)
+                else:
+                    vocab.set_from_file(
+                        filename, is_padded, namespace=namespace, oov_token=oov_token
+                    )
 
         return vocab
 
@@ -398,19 +420,19 @@ class Vocabulary(Registrable):
         only_include_pretrained_words: bool = False,
         tokens_to_add: Dict[str, List[str]] = None,
         min_pretrained_embeddings: Dict[str, int] = None,
+        counter: Dict[str, Dict[str, int]] = None,
     ) -> "Vocabulary":
         """
-        Extends an already generated vocabulary using a collection of instances.
+        Extends an already generated vocabulary using a collection of instances, and the counts in
+        `counter`, if it is given (see `from_instances()`).
 
-        The `instances` parameter does not get an entry in a typical AllenNLP configuration file,
-        but the other parameters do (if you want non-default parameters).  See `__init__` for a
-        description of what the other parameters mean.
+        The `instances` and `counter` parameters do not get an entry in a typical AllenNLP
+        configuration file, but the other parameters do (if you want non-default parameters).
+        See `__init__` for a description of what the other parameters mean.
         """
         vocab = cls.from_files(directory, padding_token, oov_token)
         logger.info("Fitting token dictionary from dataset.")
-        namespace_token_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
-        for instance in Tqdm.tqdm(instances):
-            instance.count_vocab_items(namespace_token_counts)
+        namespace_token_counts = _count_vocab_items(instances, counter)
         vocab._extend(
             counter=namespace_token_counts,
             min_count=min_count,
@@ -450,6 +472,7 @@ class Vocabulary(Registrable):
                 (tokenizer.convert_ids_to_tokens(idx), idx) for idx in range(tokenizer.vocab_size)
             )
 
+        self._make_namespace_mutable(namespace)
         for word, idx in vocab_items:
             self._token_to_index[namespace][word] = idx
             self._index_to_token[namespace][idx] = word
@@ -510,6 +533,24 @@ class Vocabulary(Registrable):
         if is_padded:
             assert self._oov_token in self._token_to_index[namespace], "OOV token not found!"
 
+    def set_from_memory_mapped_file(
+        self, filename: str, is_padded: bool = True, namespace: str = "tokens"
+    ) -> None:
+        """
+        Like `set_from_file`, but for a file in the binary format written by `save_to_files`
+        (see [`MemoryMappedNamespace`](../memory_mapped_vocabulary/#memorymappednamespace)).
+        The file is memory-mapped instead of being read, so that all processes that load it share
+        its memory. The namespace is read-only until a token is added to it, which copies it into
+        memory.
+
+        The OOV token of a padded namespace is the one that it was saved with.
+        """
+        memory_mapped_namespace = MemoryMappedNamespace(
+            filename, self._padding_token if is_padded else None
+        )
+        self._token_to_index[namespace] = memory_mapped_namespace.token_to_index
+        self._index_to_token[namespace] = memory_mapped_namespace.index_to_token
+
     def extend_from_instances(self, instances: Iterable["adi.Instance"]) -> None:
         logger.info("Fitting token dictionary from dataset.")
         namespace_token_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
@@ -656,7 +697,7 @@ class Vocabulary(Registrable):
         )
         self._index_to_token.update(state["_index_to_token"])
 
-    def save_to_files(self, directory: str) -> None:
+    def save_to_files(self, directory: str, binary: Optional[bool] = None) -> None:
         """
         Persist this Vocabulary to files so it can be reloaded later.
         Each namespace corresponds to one file.
@@ -665,6 +706,14 @@ class Vocabulary(Registrable):
 
         directory : `str`
             The directory where we save the serialized vocabulary.
+        binary : `bool`, optional (default = `None`)
+            If `True`, the namespaces are saved in a binary format that `from_files` memory-maps
+            instead of reading them (see
+            [`MemoryMappedNamespace`](../memory_mapped_vocabulary/#memorymappednamespace)), which
+            makes loading namespaces with millions of tokens much faster, and lets all of the
+            processes that load them share their memory. If `False`, they are saved as text files
+            with one token per line. By default, namespaces that were loaded from binary files are
+            saved in the binary format again, and all others as text.
         """
         os.makedirs(directory, exist_ok=True)
         if os.listdir(directory):
@@ -681,11 +730,23 @@ class Vocabulary(Registrable):
 
             for namespace, mapping in self._index_to_token.items():
                 # Each namespace gets written to its own file, in index order.
+                num_tokens = len(mapping)
+                start_index = 1 if mapping[0] == self._padding_token else 0
+                if binary is None:
+                    namespace_is_binary = isinstance(
+                        self._token_to_index[namespace], MemoryMappedTokenToIndex
+                    )
+                else:
+                    namespace_is_binary = binary
+                if namespace_is_binary:
+                    write_memory_mapped_namespace(
+                        os.path.join(directory, namespace + MEMORY_MAPPED_NAMESPACE_SUFFIX),
+                        (mapping[i] for i in range(start_index, num_tokens)),
+                    )
+                    continue
                 with codecs.open(
                     os.path.join(directory, namespace + ".txt"), "w", "utf-8"
                 ) as token_file:
-                    num_tokens = len(mapping)
-                    start_index = 1 if mapping[0] == self._padding_token else 0
                     for i in range(start_index, num_tokens):
                         print(mapping[i].replace("\n", "@@NEWLINE@@"), file=token_file)
 
@@ -706,6 +767,7 @@ class Vocabulary(Registrable):
                 "  Got %s (with type %s)" % (repr(token), type(token))
             )
         if token not in self._token_to_index[namespace]:
+            self._make_namespace_mutable(namespace)
             index = len(self._token_to_index[namespace])
             self._token_to_index[namespace][token] = index
             self._index_to_token[namespace][index] = token
@@ -713,6 +775,12 @@ class Vocabulary(Registrable):
         else:
             return self._token_to_index[namespace][token]
 
+    def _make_namespace_mutable(self, namespace: str) -> None:
+        # Memory-mapped namespaces are read-only, so we copy them into memory to change them.
+        if isinstance(self._token_to_index[namespace], MemoryMappedTokenToIndex):
+            self._token_to_index[namespace] = dict(self._token_to_index[namespace])
+            self._index_to_token[namespace] = dict(self._index_to_token[namespace])
+
     def add_tokens_to_namespace(self, tokens: List[str], namespace: str = "tokens") -> List[int]:
         """
         Adds `tokens` to the index, if they are not already present.  Either way, we return the
@@ -740,6 +808,19 @@ class Vocabulary(Registrable):
                     f"does not contain the default OOV token ('{self._oov_token}')"
                 )
 
+    def get_token_indices(self, tokens: Iterable[str], namespace: str = "tokens") -> List[int]:
+        """
+        Returns the indices of all of the given tokens, like calling `get_token_index` on each of
+        them, but much faster for many tokens, since the OOV index of the namespace is only
+        looked up once.
+        """
+        token_to_index = self._token_to_index[namespace]
+        oov_index = token_to_index.get(self._oov_token)
+        if oov_index is None:
+            # Without an OOV token, unknown tokens are an error, which `get_token_index` reports.
+            return [self.get_token_index(token, namespace) for token in tokens]
+        return list(map(token_to_index.get, tokens, itertools.repeat(oov_index)))
+
     def get_token_from_index(self, index: int, namespace: str = "tokens") -> str:
         return self._index_to_token[namespace][index]
 
@@ -805,6 +886,17 @@ class Vocabulary(Registrable):
             )
 
 
+def _count_vocab_items(
+    instances: Iterable["adi.Instance"], counter: Optional[Dict[str, Dict[str, int]]]
+) -> Dict[str, Dict[str, int]]:
+    namespace_token_counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for namespace, counts in (counter or {}).items():
+        namespace_token_counts[namespace].update(counts)
+    for instance in Tqdm.tqdm(instances, desc="building vocab"):
+        instance.count_vocab_items(namespace_token_counts)
+    return namespace_token_counts
+
+
 # We can't decorate `Vocabulary` with `Vocabulary.register()`, because `Vocabulary` hasn't been
 # defined yet.  So we put these down here.
 Vocabulary.register("from_pretrained_transformer", constructor="from_pretrained_transformer")(
@@ -178,6 +178,7 @@ def load_archive(
     cuda_device: int = -1,
     overrides: Union[str, Dict[str, Any]] = "",
     weights_file: str = None,
+    cache_extraction: bool = True,
 ) -> Archive:
     """
     Instantiates an Archive from an archived `tar.gz` file.
@@ -193,6 +194,12 @@ def load_archive(
         JSON overrides to apply to the unarchived `Params` object.
     weights_file : `str`, optional (default = `None`)
         The weights file to use.  If unspecified, weights.th in the archive_file will be used.
+    cache_extraction : `bool`, optional (default = `True`)
+        If `True`, the archive is extracted into the cache directory, next to downloaded files,
+        and later calls (from any process) use the extracted files instead of extracting the
+        archive again, until the archive changes. If `False`, or if the cache directory can't
+        be written to, the archive is extracted to a temporary directory that is removed again
+        once the model is loaded.
     """
     # redirect to the cache, if necessary
     resolved_archive_file = cached_path(archive_file)
@@ -209,8 +216,12 @@ def load_archive(
         if os.path.isdir(resolved_archive_file):
             serialization_dir = resolved_archive_file
         else:
-            with extracted_archive(resolved_archive_file, cleanup=False) as tempdir:
-                serialization_dir = tempdir
+            cached_dir = _extract_to_cache(resolved_archive_file) if cache_extraction else None
+            if cached_dir is not None:
+                serialization_dir = cached_dir
+            else:
+                with extracted_archive(resolved_archive_file, cleanup=False) as tempdir:
+                    serialization_dir = tempdir
 
         if weights_file:
             weights_path = weights_file
@@ -284,6 +295,29 @@ def get_weights_path(serialization_dir):
     return weights_path
 
 
+def _extract_to_cache(resolved_archive_file: str) -> Optional[str]:
+    """
+    Extracts the archive into the cache directory, unless it was extracted there already, and
+    returns the extracted directory, or `None` if the archive can't be extracted there.
+
+    The extracted directory is named after the path of the archive and its modification time
+    (and downloaded archives are named after their ETag), so it is extracted again when the
+    archive changes. Processes that extract the same archive at the same time wait for each
+    other, so it is only extracted once.
+    """
+    try:
+        extraction_dir = cached_path(resolved_archive_file, extract_archive=True)
+    except OSError as e:
+        logger.warning(f"unable to extract archive file {resolved_archive_file} to the cache: {e}")
+        return None
+    if not os.path.isdir(extraction_dir):
+        # Not an archive that `cached_path()` recognizes. Trying to extract it to a temporary
+        # directory gives a better error message.
+        return None
+    logger.info(f"using archive file {resolved_archive_file} extracted to {extraction_dir}")
+    return extraction_dir
+
+
 @contextmanager
 def extracted_archive(resolved_archive_file, cleanup=True):
     tempdir = None
@@ -21,6 +21,9 @@ class PretrainedTransformerBackbone(Backbone):
     implement the underlying encoding logic (we duplicate the arguments here instead of taking an
     `Embedder` as a constructor argument just to simplify the user-facing API).
 
+    The inputs can be packed by the `SequencePackingDataCollator`, in which case the embedder runs
+    the transformer on the packed rows and `encoded_text` still has one row per instance.
+
     Registered as a `Backbone` with name "pretrained_transformer".
 
     # Parameters
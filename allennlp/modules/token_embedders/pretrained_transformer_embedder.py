@@ -137,6 +137,12 @@ class PretrainedTransformerEmbedder(TokenEmbedder):
                 "This model does not support resizing."
             )
 
+        # Models like RoBERTa count positions from after the padding index.
+        padding_idx = getattr(
+            getattr(self.transformer_model, "embeddings", None), "padding_idx", None
+        )
+        self._position_offset = 0 if padding_idx is None else padding_idx + 1
+
         self._num_added_start_tokens = len(tokenizer.single_sequence_start_tokens)
         self._num_added_end_tokens = len(tokenizer.single_sequence_end_tokens)
         self._num_added_tokens = self._num_added_start_tokens + self._num_added_end_tokens
@@ -179,6 +185,11 @@ class PretrainedTransformerEmbedder(TokenEmbedder):
         mask: torch.BoolTensor,
         type_ids: Optional[torch.LongTensor] = None,
         segment_concat_mask: Optional[torch.BoolTensor] = None,
+        packed_token_ids: Optional[torch.LongTensor] = None,
+        packed_type_ids: Optional[torch.LongTensor] = None,
+        packed_position_ids: Optional[torch.LongTensor] = None,
+        packed_segment_ids: Optional[torch.LongTensor] = None,
+        packed_indices: Optional[torch.LongTensor] = None,
     ) -> torch.Tensor:  # type: ignore
         """
         # Parameters
@@ -193,6 +204,22 @@ class PretrainedTransformerEmbedder(TokenEmbedder):
             Shape: `[batch_size, num_wordpieces if max_length is None else num_segment_concat_wordpieces]`.
         segment_concat_mask: `Optional[torch.BoolTensor]`
             Shape: `[batch_size, num_segment_concat_wordpieces]`.
+        packed_token_ids: `Optional[torch.LongTensor]`
+            Shape: `[num_rows, num_packed_wordpieces]`. The wordpieces of several instances packed
+            into each row by the `SequencePackingDataCollator`. If this is given, the transformer is
+            run on the packed tensors instead of `token_ids`, and `packed_position_ids`,
+            `packed_segment_ids`, and `packed_indices` have to be given too.
+        packed_type_ids: `Optional[torch.LongTensor]`
+            Shape: `[num_rows, num_packed_wordpieces]`.
+        packed_position_ids: `Optional[torch.LongTensor]`
+            Shape: `[num_rows, num_packed_wordpieces]`. The position of each packed wordpiece
+            within its instance.
+        packed_segment_ids: `Optional[torch.LongTensor]`
+            Shape: `[num_rows, num_packed_wordpieces]`. Which instance in the row each packed wordpiece
+            belongs to, or `-1` for padding. Wordpieces only attend to the ones of the same instance.
+        packed_indices: `Optional[torch.LongTensor]`
+            Shape: [batch_size, num_wordpieces]. The index of each wordpiece of each instance in
+            the flattened packed tensors.
 
         # Returns
 
@@ -200,18 +227,21 @@ class PretrainedTransformerEmbedder(TokenEmbedder):
             Shape: `[batch_size, num_wordpieces, embedding_size]`.
 
         """
-        # Some of the huggingface transformers don't support type ids at all and crash when you supply
-        # them. For others, you can supply a tensor of zeros, and if you don't, they act as if you did.
-        # There is no practical difference to the caller, so here we pretend that one case is the same
-        # as another case.
-        if type_ids is not None:
-            max_type_id = type_ids.max()
-            if max_type_id == 0:
-                type_ids = None
-            else:
-                if max_type_id >= self._number_of_token_type_embeddings():
-                    raise ValueError("Found type ids too large for the chosen transformer model.")
-                assert token_ids.shape == type_ids.shape
+        if packed_token_ids is not None:
+            if self._max_length is not None:
+                raise ValueError("Packed sequences can't be used together with max_length.")
+            assert packed_position_ids is not None
+            assert packed_segment_ids is not None
+            assert packed_indices is not None
+            return self._forward_packed(
+                packed_token_ids,
+                packed_position_ids,
+                packed_segment_ids,
+                packed_indices,
+                packed_type_ids,
+            )
+
+        type_ids = self._check_type_ids(token_ids, type_ids)
 
         fold_long_sequences = self._max_length is not None and token_ids.size(1) > self._max_length
         if fold_long_sequences:
@@ -233,21 +263,72 @@ class PretrainedTransformerEmbedder(TokenEmbedder):
         if type_ids is not None:
             parameters["token_type_ids"] = type_ids
 
+        embeddings = self._embed(parameters)
+
+        if fold_long_sequences:
+            embeddings = self._unfold_long_sequences(
+                embeddings, segment_concat_mask, batch_size, num_segment_concat_wordpieces
+            )
+
+        return embeddings
+
+    def _check_type_ids(
+        self, token_ids: torch.LongTensor, type_ids: Optional[torch.LongTensor]
+    ) -> Optional[torch.LongTensor]:
+        # Some of the huggingface transformers don't support type ids at all and crash when you supply
+        # them. For others, you can supply a tensor of zeros, and if you don't, they act as if you did.
+        # There is no practical difference to the caller, so here we pretend that one case is the same
+        # as another case.
+        if type_ids is not None:
+            max_type_id = type_ids.max()
+            if max_type_id == 0:
+                type_ids = None
+            else:
+                if max_type_id >= self._number_of_token_type_embeddings():
+                    raise ValueError("Found type ids too large for the chosen transformer model.")
+                assert token_ids.shape == type_ids.shape
+        return type_ids
+
+    def _embed(self, parameters: Dict[str, torch.Tensor]) -> torch.Tensor:
         transformer_output = self.transformer_model(**parameters)
         if self._scalar_mix is not None:
             # The hidden states will also include the embedding layer, which we don't
             # include in the scalar mix. Hence the `[1:]` slicing.
             hidden_states = transformer_output.hidden_states[1:]
-            embeddings = self._scalar_mix(hidden_states)
+            return self._scalar_mix(hidden_states)
         else:
-            embeddings = transformer_output.last_hidden_state
+            return transformer_output.last_hidden_state
 
-        if fold_long_sequences:
-            embeddings = self._unfold_long_sequences(
-                embeddings, segment_concat_mask, batch_size, num_segment_concat_wordpieces
-            )
+    def _forward_packed(
+        self,
+        token_ids: torch.LongTensor,
+        position_ids: torch.LongTensor,
+        segment_ids: torch.LongTensor,
+        indices: torch.LongTensor,
+        type_ids: Optional[torch.LongTensor] = None,
+    ) -> torch.Tensor:
+        """
+        Runs the transformer on sequences packed by the `SequencePackingDataCollator`, and
+        unpacks the embeddings of each instance. See `forward()` for the parameters.
+        """
+        type_ids = self._check_type_ids(token_ids, type_ids)
+        # Shape: [num_rows, num_packed_wordpieces, num_packed_wordpieces]. Each wordpiece attends
+        # to the wordpieces of its own instance.
+        attention_mask = (segment_ids.unsqueeze(1) == segment_ids.unsqueeze(2)) & (
+            segment_ids >= 0
+        ).unsqueeze(1)
+        parameters = {
+            "input_ids": token_ids,
+            "attention_mask": attention_mask.float(),
+            "position_ids": position_ids + self._position_offset,
+        }
+        if type_ids is not None:
+            parameters["token_type_ids"] = type_ids
 
-        return embeddings
+        # Shape: [num_rows, num_packed_wordpieces, embedding_size]
+        embeddings = self._embed(parameters)
+        # Shape: [batch_size, num_wordpieces, embedding_size]
+        return embeddings.reshape(-1, embeddings.size(-1))[indices]
 
     def _fold_long_sequences(
         self,
@@ -304,7 +304,8 @@ class Predictor(Registrable):
         individually be predicted by `predict_json`. In order to use this method for
         batch prediction, `_json_to_instance` should be implemented by the subclass, or
         if the instances have some dependency on each other, this method should be overridden
-        directly.
+        directly. It is also worth overriding when the dataset reader can tokenize all of the
+        inputs at once (see `Tokenizer.batch_tokenize`), which is much faster for some tokenizers.
         """
         instances = []
         for json_dict in json_dicts:
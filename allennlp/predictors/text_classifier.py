@@ -5,6 +5,7 @@ import numpy
 
 from allennlp.common.util import JsonDict
 from allennlp.data import Instance
+from allennlp.data.dataset_readers import TextClassificationJsonReader
 from allennlp.predictors.predictor import Predictor
 from allennlp.data.fields import LabelField
 from allennlp.data.tokenizers.spacy_tokenizer import SpacyTokenizer
@@ -39,6 +40,15 @@ class TextClassifierPredictor(Predictor):
             sentence = tokenizer.tokenize(sentence)
         return self._dataset_reader.text_to_instance(sentence)
 
+    @overrides
+    def _batch_json_to_instances(self, json_dicts: List[JsonDict]) -> List[Instance]:
+        if isinstance(self._dataset_reader, TextClassificationJsonReader):
+            # This reader can tokenize all of the sentences at once.
+            return self._dataset_reader.texts_to_instances(
+                [json_dict["sentence"] for json_dict in json_dicts]
+            )
+        return super()._batch_json_to_instances(json_dicts)
+
     @overrides
     def predictions_to_labeled_instances(
         self, instance: Instance, outputs: Dict[str, numpy.ndarray]
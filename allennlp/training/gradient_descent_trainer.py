@@ -5,7 +5,7 @@ import os
 import re
 import time
 import warnings
-from typing import Optional, Union, List, Dict, Tuple, Any, Type
+from typing import Optional, Union, List, Dict, Tuple, Any, Type, Iterator
 
 import torch
 from torch.cuda import amp
@@ -194,6 +194,17 @@ class GradientDescentTrainer(Trainer):
     run_sanity_checks : `bool`, optional (default = `True`)
         This parameter is deprecated. Please use `run_confidence_checks` instead.
 
+    prefetch_batches : `int`, optional (default = `0`)
+        If positive, the training batches are pulled from the `data_loader` in a background
+        thread, which keeps up to this many batches ready. The work that the data loader does in
+        the main process, like collating batches (e.g. with `num_workers=0`, or when its instances
+        are already in memory) and moving them to the `cuda_device`, then overlaps with the
+        forward and backward passes of the model.
+
+        Either way, the time spent waiting for training batches is reported as the
+        `data_wait_seconds` metric of each epoch. If this is a large part of the epoch,
+        training is input-bound.
+
     """
 
     def __init__(
@@ -221,6 +232,7 @@ class GradientDescentTrainer(Trainer):
         use_amp: bool = False,
         enable_default_callbacks: bool = True,
         run_confidence_checks: bool = True,
+        prefetch_batches: int = 0,
         **kwargs,
     ) -> None:
         super().__init__(
@@ -291,6 +303,12 @@ class GradientDescentTrainer(Trainer):
 
         self._num_gradient_accumulation_steps = num_gradient_accumulation_steps
 
+        if prefetch_batches < 0:
+            raise ConfigurationError("prefetch_batches must be non-negative")
+        self._prefetch_batches = prefetch_batches
+        # The state of the data loader at the start of the current epoch.
+        self._epoch_data_loader_state: Optional[Dict[str, Any]] = None
+
         # Enable automatic mixed precision training.
         self._scaler: Optional[amp.GradScaler] = None
         self._use_amp = use_amp
@@ -392,9 +410,33 @@ class GradientDescentTrainer(Trainer):
         self._pytorch_model.train()
 
         # Get tqdm for the training batches
-        batch_generator = iter(self.data_loader)
+        batch_generator: Iterator[TensorDict] = iter(self.data_loader)
+        # With prefetching, the data loader gets to the end of the epoch before we do, so the
+        # checkpoints of this epoch use the state it had at the start of the epoch.
+        self._epoch_data_loader_state = (
+            self.data_loader.state_dict() if isinstance(self.data_loader, DataLoader) else None
+        )
+        if self._prefetch_batches > 0:
+            batch_generator = common_util.prefetch_iterable(batch_generator, self._prefetch_batches)
+
+        # Keep track of how long we wait for batches, to tell whether training is input-bound.
+        epoch_start_time = time.time()
+        data_wait_time = 0.0
+
+        def timed(batches: Iterator[TensorDict]) -> Iterator[TensorDict]:
+            nonlocal data_wait_time
+            while True:
+                start_time = time.time()
+                try:
+                    batch = next(batches)
+                except StopIteration:
+                    return
+                finally:
+                    data_wait_time += time.time() - start_time
+                yield batch
+
         batch_group_generator = common_util.lazy_groups_of(
-            batch_generator, self._num_gradient_accumulation_steps
+            timed(batch_generator), self._num_gradient_accumulation_steps
         )
 
         logger.info("Training")
@@ -411,12 +453,19 @@ class GradientDescentTrainer(Trainer):
         # Having multiple tqdm bars in case of distributed training will be a mess. Hence only the primary's
         # progress is shown
         if self._primary:
+            # When the data loader restored its state from a checkpoint, it skips the batches we
+            # already trained on, so the progress bar has to start after them.
             batch_group_generator_tqdm = Tqdm.tqdm(
-                batch_group_generator, total=num_training_batches
+                batch_group_generator,
+                total=num_training_batches,
+                initial=self._batches_in_epoch_completed,
             )
         else:
             batch_group_generator_tqdm = batch_group_generator
 
+        # Unless the data loader makes the same number of batches in every worker, we check whether
+        # the other workers are done before every batch.
+        check_done = self._distributed and not _has_equal_batch_counts(self.data_loader)
         done_early = False
         for batch_group in batch_group_generator_tqdm:
             if done_early:
@@ -435,7 +484,7 @@ class GradientDescentTrainer(Trainer):
             batch_loss = 0.0
             batch_group_outputs = []
             for batch in batch_group:
-                if self._distributed:
+                if check_done:
                     # Check whether the other workers have stopped already (due to differing amounts of
                     # data in each). If so, we can't proceed because we would hang when we hit the
                     # barrier implicit in Model.forward. We use a IntTensor instead a BoolTensor
@@ -533,7 +582,7 @@ class GradientDescentTrainer(Trainer):
                         self, self._epochs_completed, self._batches_in_epoch_completed
                     )
 
-        if self._distributed and not done_early:
+        if check_done and not done_early:
             logger.warning(
                 f"Worker {torch.distributed.get_rank()} completed its entire epoch (training)."
             )
@@ -559,6 +608,13 @@ class GradientDescentTrainer(Trainer):
             cuda_device=self.cuda_device,
         )
 
+        metrics["data_wait_seconds"] = data_wait_time
+        logger.info(
+            "Spent %.1f seconds waiting for training data (%.1f%% of the epoch)",
+            data_wait_time,
+            100 * data_wait_time / max(time.time() - epoch_start_time, 1e-9),
+        )
+
         for (worker, memory) in cpu_memory_usage:
             metrics["worker_" + str(worker) + "_memory_MB"] = memory / (1024 * 1024)
         for (gpu_num, memory) in gpu_memory_usage:
@@ -598,9 +654,10 @@ class GradientDescentTrainer(Trainer):
             val_batch_loss = 0.0
             val_reg_loss = None if regularization_penalty is None else 0.0
             val_batch_reg_loss = None if regularization_penalty is None else 0.0
+            check_done = self._distributed and not _has_equal_batch_counts(validation_data_loader)
             done_early = False
             for batch in val_generator_tqdm:
-                if self._distributed:
+                if check_done:
                     # Check whether the other workers have stopped already (due to differing amounts of
                     # data in each). If so, we can't proceed because we would hang when we hit the
                     # barrier implicit in Model.forward. We use a IntTensor instead a BoolTensor
@@ -664,7 +721,7 @@ class GradientDescentTrainer(Trainer):
                         is_primary=self._primary,
                     )
 
-            if self._distributed and not done_early:
+            if check_done and not done_early:
                 logger.warning(
                     f"Worker {torch.distributed.get_rank()} completed its entire epoch (validation)."
                 )
@@ -722,7 +779,10 @@ class GradientDescentTrainer(Trainer):
         for key, value in self._metric_tracker.best_epoch_metrics.items():
             metrics["best_validation_" + key] = value
 
-        for epoch in range(self._num_epochs):
+        # When the data loader could restore its state from the checkpoint, we start right at the
+        # epoch of the checkpoint. Otherwise, we start from the beginning and skip the epochs and
+        # batches before it (see below).
+        for epoch in range(self._epochs_completed, self._num_epochs):
             epoch_start_time = time.time()
             train_metrics = self._train_epoch(epoch)
 
@@ -881,6 +941,7 @@ class GradientDescentTrainer(Trainer):
             "callbacks": [cb.state_dict() for cb in self._callbacks],
             "epochs_completed": self._epochs_completed,
             "batches_in_epoch_completed": self._batches_in_epoch_completed,
+            "total_batches_completed": self._total_batches_completed,
             "best_model_filename": self._best_model_filename,
         }
 
@@ -891,6 +952,14 @@ class GradientDescentTrainer(Trainer):
             training_states["momentum_scheduler"] = self._momentum_scheduler.state_dict()
         if self._moving_average is not None:
             training_states["moving_average"] = self._moving_average.state_dict()
+        # Some data loaders only implement iteration, without subclassing `DataLoader`.
+        if isinstance(self.data_loader, DataLoader):
+            if self._batches_in_epoch_completed > 0:
+                data_loader_state = self._epoch_data_loader_state
+            else:
+                data_loader_state = self.data_loader.state_dict()
+            if data_loader_state is not None:
+                training_states["data_loader"] = data_loader_state
 
         return TrainerCheckpoint(model_state, training_states)
 
@@ -939,6 +1008,20 @@ class GradientDescentTrainer(Trainer):
         self._start_after_batches_in_epoch_completed = training_state["batches_in_epoch_completed"]
         self._best_model_filename = training_state["best_model_filename"]
 
+        # Only the primary worker saves checkpoints, so in distributed training, the state of the
+        # data loader doesn't apply to the other workers.
+        if "data_loader" in training_state and not self._distributed:
+            # The data loader can skip right to the next batch, so we don't have to go through
+            # the batches before it.
+            self.data_loader.load_state_dict(
+                training_state["data_loader"],
+                num_batches_to_skip=self._start_after_batches_in_epoch_completed
+                * self._num_gradient_accumulation_steps,
+            )
+            self._epochs_completed = self._start_after_epochs_completed
+            self._batches_in_epoch_completed = self._start_after_batches_in_epoch_completed
+            self._total_batches_completed = training_state["total_batches_completed"]
+
     @classmethod
     def from_partial_objects(
         cls,
@@ -966,6 +1049,7 @@ class GradientDescentTrainer(Trainer):
         callbacks: List[Lazy[TrainerCallback]] = None,
         enable_default_callbacks: bool = True,
         run_confidence_checks: bool = True,
+        prefetch_batches: int = 0,
         **kwargs,
     ) -> Trainer:
         """
@@ -1059,6 +1143,7 @@ class GradientDescentTrainer(Trainer):
             use_amp=use_amp,
             enable_default_callbacks=enable_default_callbacks,
             run_confidence_checks=run_confidence_checks,
+            prefetch_batches=prefetch_batches,
             **kwargs,
         )
 
@@ -1070,3 +1155,9 @@ DEFAULT_CALLBACKS: Tuple[Type[TrainerCallback]] = (ConsoleLoggerCallback,)
 """
 The default callbacks used by `GradientDescentTrainer`.
 """
+
+
+def _has_equal_batch_counts(data_loader) -> bool:
+    # Some data loaders only implement iteration, without subclassing `DataLoader`, so we can't
+    # know whether they make the same number of batches in every worker.
+    return isinstance(data_loader, DataLoader) and data_loader.has_equal_batch_counts()
@@ -8,7 +8,7 @@ import shutil
 import json
 from os import PathLike
 from typing import Any, Dict, Iterable, Optional, Union, Tuple, Set, List
-from collections import Counter
+from collections import Counter, defaultdict
 
 import torch
 from torch.nn.utils import clip_grad_norm_
@@ -436,8 +436,22 @@ def description_from_metrics(metrics: Dict[str, float]) -> str:
 
 
 def make_vocab_from_params(
-    params: Params, serialization_dir: Union[str, PathLike], print_statistics: bool = False
+    params: Params,
+    serialization_dir: Union[str, PathLike],
+    print_statistics: bool = False,
+    max_counted_items_per_namespace: Optional[int] = None,
+    binary: Optional[bool] = None,
 ) -> Vocabulary:
+    """
+    Builds the vocabulary described by the `vocabulary` params, from the datasets in `params`,
+    and saves it to the `vocabulary` directory in `serialization_dir`.
+
+    When the vocabulary is built from instances, the data loaders count the vocabulary items (see
+    [`DataLoader.count_vocab_items()`](../data/data_loaders/data_loader/#count_vocab_items)),
+    so a `MultiProcessDataLoader` with workers counts them in parallel.
+    `max_counted_items_per_namespace` makes these counts approximate to save memory, as described
+    there. `binary` is passed on to `Vocabulary.save_to_files()`.
+    """
     vocab_params = params.pop("vocabulary", {})
     os.makedirs(serialization_dir, exist_ok=True)
     vocab_dir = os.path.join(serialization_dir, "vocabulary")
@@ -477,20 +491,35 @@ def make_vocab_from_params(
             test=("test" in datasets_for_vocab_creation),
         )
 
-    instances: Iterable[Instance] = (
-        instance
+    data_loaders = {
+        key: data_loader
         for key, data_loader in data_loaders.items()
         if datasets_for_vocab_creation is None or key in datasets_for_vocab_creation
+    }
+
+    instances: Iterable[Instance] = (
+        instance
+        for data_loader in data_loaders.values()
         for instance in data_loader.iter_instances()
     )
 
     if print_statistics:
         instances = list(instances)
-
-    vocab = Vocabulary.from_params(vocab_params, instances=instances)
+        vocab = Vocabulary.from_params(vocab_params, instances=instances)
+    elif vocab_params.get("type", Vocabulary.default_implementation) in {
+        "from_instances",
+        "extend",
+    }:
+        # These count the items in the instances, so the data loaders can do it for them.
+        counter: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        for data_loader in data_loaders.values():
+            data_loader.count_vocab_items(counter, max_counted_items_per_namespace)
+        vocab = Vocabulary.from_params(vocab_params, instances=(), counter=counter)
+    else:
+        vocab = Vocabulary.from_params(vocab_params, instances=instances)
 
     logger.info(f"writing the vocabulary to {vocab_dir}.")
-    vocab.save_to_files(vocab_dir)
+    vocab.save_to_files(vocab_dir, binary=binary)
     logger.info("done creating vocab")
 
     if print_statistics:
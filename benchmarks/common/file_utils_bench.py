@@ -0,0 +1,33 @@
+import tempfile
+
+import torch
+
+from allennlp.common.file_utils import TensorCache
+
+
+def _make_cache(encoding: str) -> TensorCache:
+    cache = TensorCache(tempfile.mkdtemp() + "/cache", encoding=encoding)
+    # Something like the region features of an image.
+    tensor = torch.randn(36, 2048)
+    for i in range(100):
+        cache[str(i)] = tensor
+    return cache
+
+
+pickle_cache = _make_cache("pickle")
+raw_cache = _make_cache("raw")
+
+
+def _read_all(cache: TensorCache):
+    # Every read goes to the database.
+    cache.cache_cache.clear()
+    for i in range(100):
+        cache[str(i)]
+
+
+def bench_tensor_cache_read_pickle(benchmark):
+    benchmark(_read_all, pickle_cache)
+
+
+def bench_tensor_cache_read_raw(benchmark):
+    benchmark(_read_all, raw_cache)
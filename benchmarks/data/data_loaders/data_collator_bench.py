@@ -0,0 +1,53 @@
+import random
+
+from allennlp.data import Instance, Token, Vocabulary
+from allennlp.data.batch import Batch
+from allennlp.data.data_loaders.data_collator import allennlp_collate
+from allennlp.data.fields import LabelField, ListField, SequenceLabelField, SpanField, TextField
+from allennlp.data.token_indexers import SingleIdTokenIndexer, TokenCharactersIndexer
+
+
+def _make_instances(num_instances: int = 32):
+    rng = random.Random(0)
+    token_indexers = {"tokens": SingleIdTokenIndexer(), "characters": TokenCharactersIndexer()}
+    instances = []
+    for _ in range(num_instances):
+        tokens = [Token(str(rng.randint(0, 10000))) for _ in range(rng.randint(5, 50))]
+        text = TextField(tokens, token_indexers)
+        instance = Instance(
+            {
+                "text": text,
+                "label": LabelField(str(rng.randint(0, 5))),
+                "tags": SequenceLabelField([str(len(token.text)) for token in tokens], text),
+                "spans": ListField([SpanField(i, i + 1, text) for i in range(len(tokens) - 1)]),
+            }
+        )
+        instances.append(instance)
+    vocab = Vocabulary.from_instances(instances)
+    for instance in instances:
+        instance.index_fields(vocab)
+    return instances
+
+
+instances = _make_instances()
+
+
+def _collate_one_by_one(instances):
+    # This is how `allennlp_collate` used to make batches: padding every instance to
+    # tensors separately and then stacking them.
+    batch = Batch(instances)
+    padding_lengths = batch.get_padding_lengths()
+    return {
+        name: field.batch_tensors(
+            [instance[name].as_tensor(padding_lengths.get(name, {})) for instance in instances]
+        )
+        for name, field in instances[0].fields.items()
+    }
+
+
+def bench_allennlp_collate(benchmark):
+    benchmark(allennlp_collate, instances)
+
+
+def bench_collate_one_by_one(benchmark):
+    benchmark(_collate_one_by_one, instances)
@@ -0,0 +1,23 @@
+import random
+
+from allennlp.data import Vocabulary
+
+
+def _make_vocab_and_tokens(num_tokens: int = 1000):
+    rng = random.Random(0)
+    tokens = [str(rng.randint(0, 20000)) for _ in range(num_tokens)]
+    vocab = Vocabulary()
+    # About half of the tokens are out of vocabulary.
+    vocab.add_tokens_to_namespace(tokens[: num_tokens // 2])
+    return vocab, tokens
+
+
+vocab, tokens = _make_vocab_and_tokens()
+
+
+def bench_get_token_indices(benchmark):
+    benchmark(vocab.get_token_indices, tokens)
+
+
+def bench_get_token_index(benchmark):
+    benchmark(lambda: [vocab.get_token_index(token) for token in tokens])
@@ -68,3 +68,34 @@ class TestCachedPathCommand(AllenNlpTestCase):
         main()
         captured = capsys.readouterr()
         assert "Reclaimed 0B of space" in captured.out
+
+    def test_prefetch(self, capsys):
+        sys.argv = [
+            "allennlp",
+            "cached-path",
+            "--cache-dir",
+            str(self.TEST_DIR),
+            "--prefetch",
+            "--max-workers",
+            "2",
+            "README.md",
+            "setup.py",
+            "README.md",
+        ]
+        main()
+        captured = capsys.readouterr()
+        lines = captured.out.splitlines()
+        assert sorted(line.split()[0] for line in lines[:-1]) == ["README.md", "setup.py"]
+        assert lines[-1].startswith("Cached 2 resources in ")
+
+    def test_prefetch_with_bad_options(self, capsys):
+        sys.argv = [
+            "allennlp",
+            "cached-path",
+            "--cache-dir",
+            str(self.TEST_DIR),
+            "--inspect",
+            "--prefetch",
+        ]
+        with pytest.raises(RuntimeError, match="--prefetch"):
+            main()
@@ -1,7 +1,9 @@
 from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import os
 import pathlib
 import json
+import threading
 import time
 import shutil
 
@@ -18,6 +20,7 @@ from allennlp.common.file_utils import (
     filename_to_url,
     get_from_cache,
     cached_path,
+    cached_path_many,
     _split_s3_path,
     _split_gcs_path,
     open_compressed,
@@ -28,6 +31,8 @@ from allennlp.common.file_utils import (
     remove_cache_entries,
     LocalCacheResource,
     TensorCache,
+    text_lines_from_file,
+    json_lines_from_file,
 )
 from allennlp.common import Params
 from allennlp.modules.token_embedders import ElmoTokenEmbedder
@@ -353,6 +358,57 @@ class TestFileUtils(AllenNlpTestCase):
                 compressed_lines = [line.strip() for line in f]
             assert compressed_lines == uncompressed_lines
 
+    @pytest.mark.parametrize("num_shards", [1, 2, 3, 7, 20])
+    def test_text_lines_from_file_shards(self, num_shards):
+        lines = ["first", "", "ünïcödé line", "x" * 100, "a", "b\tc", "last"]
+        path = self.TEST_DIR / "lines.txt"
+        # No newline at the end of the file.
+        path.write_text("\n".join(lines), encoding="UTF-8")
+
+        sharded = [
+            list(text_lines_from_file(path, shard=shard, num_shards=num_shards))
+            for shard in range(num_shards)
+        ]
+        assert [line for shard_lines in sharded for line in shard_lines] == lines
+
+        compressed_path = self.FIXTURES_ROOT / "embeddings/fake_embeddings.5d.txt.gz"
+        all_lines = list(text_lines_from_file(compressed_path))
+        compressed_sharded = [
+            list(text_lines_from_file(compressed_path, shard=shard, num_shards=num_shards))
+            for shard in range(num_shards)
+        ]
+        assert sorted(line for shard_lines in compressed_sharded for line in shard_lines) == sorted(
+            all_lines
+        )
+
+    def test_text_lines_from_file_shards_keep_line_endings(self):
+        path = self.TEST_DIR / "lines.txt"
+        path.write_bytes(b"one\r\ntwo\n\nthree\r\n")
+        expected = list(text_lines_from_file(path, strip_lines=False))
+        assert expected == ["one\n", "two\n", "\n", "three\n"]
+        for num_shards in range(2, 6):
+            sharded = [
+                line
+                for shard in range(num_shards)
+                for line in text_lines_from_file(
+                    path, strip_lines=False, shard=shard, num_shards=num_shards
+                )
+            ]
+            assert sharded == expected
+
+        with pytest.raises(ValueError):
+            list(text_lines_from_file(path, shard=2, num_shards=2))
+
+    def test_json_lines_from_file_shards(self):
+        path = self.TEST_DIR / "lines.jsonl"
+        path.write_text("".join(json.dumps({"index": i}) + "\n" for i in range(10)))
+        indices = [
+            item["index"]  # type: ignore
+            for shard in range(3)
+            for item in json_lines_from_file(path, shard=shard, num_shards=3)
+        ]
+        assert indices == list(range(10))
+
     def test_meta_backwards_compatible(self):
         url = "http://fake.datastore.com/glove.txt.gz"
         etag = "some-fake-etag"
@@ -440,6 +496,187 @@ class TestFileUtils(AllenNlpTestCase):
         assert len(os.listdir(self.TEST_DIR)) == 0
 
 
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves `server.content` for any path, with support for range requests unless
+    `server.support_ranges` is `False`. Requests for ranges that start at one of
+    `server.failing_starts` fail. `server.etag` and `server.last_modified` are sent when
+    they are given, and used to check `If-Range` headers.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_headers(self, status: int, headers: dict) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        for name in ("etag", "last_modified"):
+            value = getattr(self.server, name)
+            if value is not None:
+                self.send_header(name.replace("_", "-").title(), value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        headers = {"Content-Length": str(len(self.server.content))}
+        if self.server.support_ranges:
+            headers["Accept-Ranges"] = "bytes"
+        self._send_headers(200, headers)
+
+    def do_GET(self):
+        content = self.server.content
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if (
+            range_header is None
+            or not self.server.support_ranges
+            or (
+                if_range is not None
+                and if_range not in (self.server.etag, self.server.last_modified)
+            )
+        ):
+            self._send_headers(200, {"Content-Length": str(len(content))})
+            self.wfile.write(content)
+            return
+        start, end = (int(n) for n in range_header[len("bytes=") :].split("-"))
+        self.server.requested_starts.append(start)
+        if start in self.server.failing_starts:
+            self._send_headers(500, {"Content-Length": "0"})
+            return
+        end = min(end, len(content) - 1)
+        size = "*" if self.server.unknown_size else str(len(content))
+        self._send_headers(
+            206,
+            {
+                "Content-Length": str(end - start + 1),
+                "Content-Range": f"bytes {start}-{end}/{size}",
+            },
+        )
+        self.wfile.write(content[start : end + 1])
+
+
+class LocalHttpServerTestCase(AllenNlpTestCase):
+    def setup_method(self):
+        super().setup_method()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeRequestHandler)
+        self.server.content = bytes(range(256)) * 41  # type: ignore
+        self.server.support_ranges = True  # type: ignore
+        self.server.failing_starts = set()  # type: ignore
+        self.server.requested_starts = []  # type: ignore
+        self.server.etag = '"v1"'  # type: ignore
+        self.server.last_modified = None  # type: ignore
+        self.server.unknown_size = False  # type: ignore
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/embeddings.txt"
+
+    def teardown_method(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().teardown_method()
+
+
+class TestRangedDownload(LocalHttpServerTestCase):
+    @pytest.mark.parametrize("support_ranges", [True, False])
+    def test_download(self, monkeypatch, support_ranges):
+        monkeypatch.setattr(file_utils, "_RANGED_DOWNLOAD_CHUNK_SIZE", 1000)
+        self.server.support_ranges = support_ranges  # type: ignore
+        filename = get_from_cache(self.url, cache_dir=self.TEST_DIR)
+        with open(filename, "rb") as cached_file:
+            assert cached_file.read() == self.server.content  # type: ignore
+        if support_ranges:
+            assert sorted(self.server.requested_starts) == list(range(0, 10496, 1000))  # type: ignore
+        assert not os.path.exists(filename + file_utils._PARTIAL_SUFFIX)
+        assert not os.path.exists(filename + file_utils._PROGRESS_SUFFIX)
+
+    def test_resume_download(self, monkeypatch):
+        monkeypatch.setattr(file_utils, "_RANGED_DOWNLOAD_CHUNK_SIZE", 1000)
+        self.server.failing_starts = {3000, 7000}  # type: ignore
+        with pytest.raises(HTTPError):
+            get_from_cache(self.url, cache_dir=self.TEST_DIR)
+        # Each failing chunk was tried a few times.
+        assert self.server.requested_starts.count(3000) == file_utils._RANGED_DOWNLOAD_ATTEMPTS  # type: ignore
+
+        self.server.failing_starts = set()  # type: ignore
+        self.server.requested_starts = []  # type: ignore
+        filename = get_from_cache(self.url, cache_dir=self.TEST_DIR)
+        # Only the missing chunks were downloaded again.
+        assert sorted(self.server.requested_starts) == [3000, 7000]  # type: ignore
+        with open(filename, "rb") as cached_file:
+            assert cached_file.read() == self.server.content  # type: ignore
+
+    @pytest.mark.parametrize("validator", [None, "weak_etag", "last_modified"])
+    def test_download_with_validator(self, monkeypatch, validator):
+        monkeypatch.setattr(file_utils, "_RANGED_DOWNLOAD_CHUNK_SIZE", 1000)
+        self.server.etag = 'W/"v1"' if validator == "weak_etag" else None  # type: ignore
+        if validator == "last_modified":
+            self.server.last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"  # type: ignore
+        filename = get_from_cache(self.url, cache_dir=self.TEST_DIR)
+        with open(filename, "rb") as cached_file:
+            assert cached_file.read() == self.server.content  # type: ignore
+        if validator == "last_modified":
+            assert sorted(self.server.requested_starts) == list(range(0, 10496, 1000))  # type: ignore
+        else:
+            # Without a validator, the file is downloaded all at once.
+            assert self.server.requested_starts == [0]  # type: ignore
+
+    def test_download_of_unknown_size(self, monkeypatch):
+        monkeypatch.setattr(file_utils, "_RANGED_DOWNLOAD_CHUNK_SIZE", 1000)
+        self.server.unknown_size = True  # type: ignore
+        filename = get_from_cache(self.url, cache_dir=self.TEST_DIR)
+        with open(filename, "rb") as cached_file:
+            assert cached_file.read() == self.server.content  # type: ignore
+        assert self.server.requested_starts == [0]  # type: ignore
+
+    def test_resource_changes_during_download(self, monkeypatch):
+        monkeypatch.setattr(file_utils, "_RANGED_DOWNLOAD_CHUNK_SIZE", 1000)
+        # Without an ETag, the cache entry doesn't change with the resource.
+        self.server.etag = None  # type: ignore
+        self.server.last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"  # type: ignore
+        self.server.failing_starts = {3000}  # type: ignore
+        with pytest.raises(HTTPError):
+            get_from_cache(self.url, cache_dir=self.TEST_DIR)
+
+        self.server.content = bytes(reversed(range(256))) * 41  # type: ignore
+        self.server.last_modified = "Thu, 22 Oct 2015 07:28:00 GMT"  # type: ignore
+        self.server.failing_starts = set()  # type: ignore
+        with pytest.raises(OSError, match="changed"):
+            get_from_cache(self.url, cache_dir=self.TEST_DIR)
+
+        # The next try starts over.
+        filename = get_from_cache(self.url, cache_dir=self.TEST_DIR)
+        with open(filename, "rb") as cached_file:
+            assert cached_file.read() == self.server.content  # type: ignore
+
+
+class TestCachedPathMany(LocalHttpServerTestCase):
+    def test_cached_path_many(self):
+        urls = [f"{self.url}?shard={i}" for i in range(4)]
+        local_file = str(self.FIXTURES_ROOT / "data" / "sequence_tagging.tsv")
+        resolved = []
+        paths = cached_path_many(
+            [urls[0], local_file, *urls[1:], urls[0]],
+            cache_dir=self.TEST_DIR,
+            max_workers=3,
+            callback=lambda resource, path, seconds: resolved.append(resource),
+        )
+        assert paths[1] == local_file
+        assert paths[0] == paths[-1]
+        assert paths[2:5] == [get_from_cache(url, cache_dir=self.TEST_DIR) for url in urls[1:]]
+        # Each URL was only downloaded once, and reported once.
+        assert self.server.requested_starts == [0] * 4  # type: ignore
+        assert sorted(resolved) == sorted([local_file, *urls])
+        for path in paths[:1] + paths[2:]:
+            with open(path, "rb") as cached_file:
+                assert cached_file.read() == self.server.content  # type: ignore
+
+    def test_cached_path_many_raises_errors(self):
+        self.server.failing_starts = {0}  # type: ignore
+        with pytest.raises(HTTPError):
+            cached_path_many([self.url], cache_dir=self.TEST_DIR)
+        with pytest.raises(FileNotFoundError):
+            cached_path_many([str(self.TEST_DIR / "missing.txt")], cache_dir=self.TEST_DIR)
+
+
 class TestCachedPathWithArchive(AllenNlpTestCase):
     def setup_method(self):
         super().setup_method()
@@ -579,6 +816,101 @@ class TestTensorCace(AllenNlpTestCase):
             cache = TensorCache(self.TEST_DIR / "cache")
             assert cache.read_only
 
+    @pytest.mark.parametrize("storage_dtype", [None, torch.float16, torch.bfloat16])
+    def test_raw_encoding(self, storage_dtype):
+        cache = TensorCache(self.TEST_DIR / "cache", encoding="raw", storage_dtype=storage_dtype)
+        tensors = {
+            "float": torch.randn(3, 4),
+            "double": torch.randn(2, dtype=torch.float64),
+            "bfloat16": torch.randn(5).to(torch.bfloat16),
+            "long": torch.arange(10),
+            "bool": torch.tensor([True, False]),
+            "scalar": torch.tensor(3.5),
+            "empty": torch.zeros(0, 5),
+            "not contiguous": torch.randn(4, 6)[:, 1:3],
+        }
+        for key, tensor in tensors.items():
+            cache[key] = tensor
+        written = {key: cache[key] for key in tensors}
+
+        # Read everything back from the database.
+        cache.cache_cache.clear()
+        for key, tensor in tensors.items():
+            read = cache[key]
+            assert read.dtype == tensor.dtype
+            assert read.shape == tensor.shape
+            # What we get right after writing is the same as what we read back later.
+            assert torch.equal(read, written[key])
+            if storage_dtype is None or not tensor.is_floating_point():
+                assert torch.equal(read, tensor)
+            else:
+                assert torch.allclose(read.float(), tensor.float(), rtol=1e-2, atol=1e-2)
+
+    def test_encodings_can_be_mixed(self):
+        cache = TensorCache(self.TEST_DIR / "cache")
+        cache["pickled"] = torch.tensor([1.0, 2.0])
+        cache.encoding = "raw"
+        cache["raw"] = torch.tensor([3.0, 4.0])
+        cache.cache_cache.clear()
+        assert cache["pickled"].tolist() == [1.0, 2.0]
+        assert cache["raw"].tolist() == [3.0, 4.0]
+
+    def test_storage_dtype_needs_raw_encoding(self):
+        with pytest.raises(ValueError, match="raw encoding"):
+            TensorCache(self.TEST_DIR / "cache", storage_dtype=torch.float16)
+
+    def test_get_and_set_many(self):
+        cache = TensorCache(self.TEST_DIR / "cache")
+        cache.set_many({"a": torch.tensor([1]), "b": torch.tensor([2])})
+        cache.set_many([("c", torch.tensor([3]))])
+        cache.cache_cache.clear()
+        assert [t.item() for t in cache.get_many(["c", "a", "b"])] == [3, 1, 2]
+        assert [t.item() for t in cache.get_many(iter(["b"]))] == [2]
+        with pytest.raises(KeyError, match="d"):
+            cache.get_many(["a", "d"])
+
+    @pytest.mark.parametrize("max_size", [None, 2 ** 20])
+    def test_iteration(self, monkeypatch, max_size):
+        # Keys are read three at a time.
+        monkeypatch.setattr(file_utils, "_ITERATION_CHUNK_SIZE", 3)
+        cache = TensorCache(self.TEST_DIR / "cache", max_size=max_size)
+        assert list(cache) == []
+        keys = [f"key {i}" for i in range(10)]
+        cache.set_many((key, torch.tensor([i])) for i, key in enumerate(keys))
+        assert list(cache) == sorted(keys)
+        assert len(cache) == 10
+        assert dict(cache.items())["key 4"].item() == 4
+
+    def _write(self, cache: TensorCache, key: str) -> None:
+        # Each of these takes up a few pages of the database.
+        cache[key] = torch.zeros(4096)
+
+    def test_lru_eviction(self):
+        cache = TensorCache(self.TEST_DIR / "cache", max_size=100000, eviction_policy="lru")
+        for i in range(20):
+            self._write(cache, str(i))
+            # Using "0" all the time keeps it in the cache.
+            cache["0"]
+            with cache.lmdb_env.begin() as txn:
+                assert cache._used_size(txn) <= 100000
+        assert len(cache) < 20
+        assert "0" in cache
+        assert "1" not in cache
+        assert "19" in cache
+
+    def test_lfu_eviction(self):
+        cache = TensorCache(self.TEST_DIR / "cache", max_size=100000, eviction_policy="lfu")
+        self._write(cache, "0")
+        for _ in range(5):
+            cache["0"]
+        for i in range(1, 20):
+            self._write(cache, str(i))
+        assert len(cache) < 20
+        # "0" was used the most, even though it wasn't used recently.
+        assert "0" in cache
+        assert "1" not in cache
+        assert "19" in cache
+
 
 class TestHFHubDownload(AllenNlpTestCase):
     def test_cached_download(self):
@@ -41,6 +41,17 @@ class TestCommonUtils(AllenNlpTestCase):
         assert util.pad_sequence_to_length([1, 2, 3], 5, default_value=lambda: 2) == [1, 2, 3, 2, 2]
         assert util.pad_sequence_to_length([1, 2, 3], 5, padding_on_right=False) == [0, 0, 1, 2, 3]
 
+    def test_pad_sequences_to_tensor(self):
+        tensor = util.pad_sequences_to_tensor([[1, 2, 3], [], [4, 5, 6, 7, 8]], 4)
+        assert tensor.dtype == torch.long
+        assert tensor.tolist() == [[1, 2, 3, 0], [0, 0, 0, 0], [4, 5, 6, 7]]
+
+        tensor = util.pad_sequences_to_tensor([[True], [True, True]], 3, False, torch.bool)
+        assert tensor.tolist() == [[True, False, False], [True, True, False]]
+
+        assert util.pad_sequences_to_tensor([[], []], 2, -1).tolist() == [[-1, -1], [-1, -1]]
+        assert util.pad_sequences_to_tensor([[1], [2]], 0).shape == (2, 0)
+
     def test_namespace_match(self):
         assert util.namespace_match("*tags", "tags")
         assert util.namespace_match("*tags", "passage_tags")
@@ -161,6 +172,48 @@ class TestCommonUtils(AllenNlpTestCase):
         # 1 here with itertools.cycle.
         assert cycle_iterator_function_calls == 3
 
+    def test_prefetch_iterable(self):
+        assert list(util.prefetch_iterable(range(100), 4)) == list(range(100))
+
+        def fails():
+            yield 1
+            raise ValueError("oops")
+
+        iterator = util.prefetch_iterable(fails(), 4)
+        assert next(iterator) == 1
+        with pytest.raises(ValueError, match="oops"):
+            next(iterator)
+
+        def exits():
+            yield 1
+            raise SystemExit(3)
+
+        iterator = util.prefetch_iterable(exits(), 4)
+        assert next(iterator) == 1
+        with pytest.raises(SystemExit):
+            next(iterator)
+
+    def test_prefetch_iterable_stops_when_closed(self):
+        closed = False
+
+        def numbers():
+            nonlocal closed
+            try:
+                yield from range(1000)
+            finally:
+                closed = True
+
+        iterator = util.prefetch_iterable(numbers(), 2)
+        assert [next(iterator) for _ in range(3)] == [0, 1, 2]
+        iterator.close()
+        assert closed
+
+        # The thread starts right away, and also stops when nothing was taken from it.
+        closed = False
+        iterator = util.prefetch_iterable(numbers(), 2)
+        iterator.close()
+        assert closed
+
 
 @pytest.mark.parametrize(
     "size, result",
@@ -0,0 +1,43 @@
+import torch
+
+from allennlp.data.data_loaders.data_collator import SequencePackingDataCollator
+
+
+def _token_ids_and_mask(lengths):
+    mask = torch.arange(max(lengths)).unsqueeze(0) < torch.tensor(lengths).unsqueeze(1)
+    token_ids = (torch.arange(max(lengths)) + 1).repeat(len(lengths), 1)
+    token_ids = token_ids * 10 * (torch.arange(len(lengths)) + 1).unsqueeze(1)
+    return token_ids * mask, mask
+
+
+def test_sequence_packing_packs_instances_into_rows():
+    token_ids, mask = _token_ids_and_mask([3, 6, 2, 4])
+    type_ids = mask.long()
+    packed = SequencePackingDataCollator(max_length=8).pack(token_ids, mask, type_ids)
+
+    # First fit decreasing: 6 + 2 in the first row, 4 + 3 in the second one.
+    assert packed["packed_token_ids"].tolist() == [
+        [20, 40, 60, 80, 100, 120, 30, 60],
+        [40, 80, 120, 160, 10, 20, 30, 0],
+    ]
+    assert packed["packed_type_ids"].tolist() == [[1] * 8, [1] * 7 + [0]]
+    assert packed["packed_position_ids"].tolist() == [
+        [0, 1, 2, 3, 4, 5, 0, 1],
+        [0, 1, 2, 3, 0, 1, 2, 0],
+    ]
+    assert packed["packed_segment_ids"].tolist() == [
+        [0, 0, 0, 0, 0, 0, 1, 1],
+        [0, 0, 0, 0, 1, 1, 1, -1],
+    ]
+    # Unpacking gives back the original tensors.
+    unpacked = packed["packed_token_ids"].flatten()[packed["packed_indices"]]
+    assert torch.equal(unpacked * mask, token_ids)
+
+
+def test_sequence_packing_gives_long_instances_their_own_row():
+    token_ids, mask = _token_ids_and_mask([5, 2, 1])
+    packed = SequencePackingDataCollator(max_length=4).pack(token_ids, mask)
+    assert "packed_type_ids" not in packed
+    assert packed["packed_token_ids"].tolist() == [[10, 20, 30, 40, 50], [20, 40, 30, 0, 0]]
+    unpacked = packed["packed_token_ids"].flatten()[packed["packed_indices"]]
+    assert torch.equal(unpacked * mask, token_ids)
@@ -1,14 +1,20 @@
+from collections import defaultdict
+import random
+import threading
 from typing import List, Iterable, Dict
 
 import torch
 import pytest
-from allennlp.common.testing import requires_gpu
+from allennlp.common.testing import requires_gpu, run_distributed_test
+from allennlp.common.testing.data_collator_test import CountingDataCollator
 from allennlp.data.instance import Instance
 from allennlp.data.dataset_readers import DatasetReader
-from allennlp.data.data_loaders import MultiProcessDataLoader, WorkerError
-from allennlp.data.fields import Field, TextField, MetadataField, TensorField
-from allennlp.data.tokenizers import PretrainedTransformerTokenizer
-from allennlp.data.token_indexers import PretrainedTransformerIndexer
+from allennlp.data.data_loaders import MultiProcessDataLoader, WorkerError, TensorDict
+from allennlp.data.fields import Field, LabelField, TextField, MetadataField, TensorField
+from allennlp.data.memory_mapped_instances import MemoryMappedInstances
+from allennlp.data.samplers import BucketBatchSampler
+from allennlp.data.tokenizers import PretrainedTransformerTokenizer, Token
+from allennlp.data.token_indexers import PretrainedTransformerIndexer, SingleIdTokenIndexer
 from allennlp.data.vocabulary import Vocabulary
 from allennlp.data.data_loaders.data_collator import LanguageModelingDataCollator
 
@@ -109,6 +115,21 @@ def test_error_raised_when_text_fields_contain_token_indexers(max_instances_in_m
         dict(num_workers=2, start_method="spawn", batch_size=1),
         dict(max_instances_in_memory=10, num_workers=0, batch_size=1),
         dict(num_workers=0, batch_size=1),
+        dict(max_instances_in_memory=10, num_workers=2, worker_type="thread", batch_size=1),
+        dict(num_workers=2, worker_type="thread", batch_size=1),
+        dict(
+            max_instances_in_memory=10,
+            num_workers=2,
+            batch_size=4,
+            shared_memory_buffer_size=2 ** 16,
+        ),
+        dict(
+            max_instances_in_memory=10,
+            num_workers=2,
+            start_method="spawn",
+            batch_size=4,
+            shared_memory_buffer_size=2 ** 16,
+        ),
     ],
     ids=str,
 )
@@ -226,3 +247,401 @@ def test_load_to_cuda(options):
     loader.index_with(vocab)
     for batch in loader:
         assert batch["tensor"].device == torch.device("cuda:0")
+
+
+def _token_ids_by_index(batches: List[TensorDict]) -> Dict[int, List[int]]:
+    token_ids_by_index = {}
+    for batch in batches:
+        token_ids = batch["source"]["tokens"]["token_ids"]  # type: ignore
+        mask = batch["source"]["tokens"]["mask"]  # type: ignore
+        for i, index in enumerate(batch["index"]):
+            token_ids_by_index[index] = token_ids[i][mask[i]].tolist()
+    return token_ids_by_index  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(num_workers=0, batch_size=2),
+        dict(num_workers=2, batch_size=2),
+        dict(num_workers=2, batch_size=2, max_instances_in_memory=10),
+    ],
+    ids=str,
+)
+def test_instance_cache(options, tmp_path, monkeypatch):
+    loader = MultiProcessDataLoader(
+        MockDatasetReader(), "some path", cache_directory=tmp_path, **options
+    )
+    vocab = Vocabulary.from_instances(loader.iter_instances())
+    loader.index_with(vocab)
+    batches = list(loader)
+    assert len(list(tmp_path.glob("*.instances"))) == 1
+
+    # Now the instances should come from the cache, without ever calling `_read()`.
+    def _read(self, file_path: str):
+        raise RuntimeError("should have read from the cache")
+
+    monkeypatch.setattr(MockDatasetReader, "_read", _read)
+    cached_loader = MultiProcessDataLoader(
+        MockDatasetReader(), "some path", cache_directory=tmp_path, **options
+    )
+    assert len(list(cached_loader.iter_instances())) == MockDatasetReader.NUM_INSTANCES
+    cached_loader.index_with(vocab)
+    cached_batches = list(cached_loader)
+
+    assert len(cached_batches) == len(batches)
+    token_ids_by_index = _token_ids_by_index(batches)
+    assert len(token_ids_by_index) == MockDatasetReader.NUM_INSTANCES
+    assert _token_ids_by_index(cached_batches) == token_ids_by_index
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(num_workers=0, batch_size=2),
+        dict(num_workers=2, batch_size=2),
+        dict(num_workers=2, batch_size=3, shuffle=True),
+        dict(num_workers=2, batch_sampler=BucketBatchSampler(batch_size=4)),
+    ],
+    ids=str,
+)
+def test_memory_map_instances(options, tmp_path):
+    loader = MultiProcessDataLoader(
+        MockDatasetReader(),
+        "some path",
+        cache_directory=tmp_path,
+        memory_map_instances=True,
+        **options,
+    )
+    assert isinstance(loader._instances, MemoryMappedInstances)
+    assert len(loader._instances) == MockDatasetReader.NUM_INSTANCES
+
+    vocab = Vocabulary.from_instances(loader.iter_instances())
+    loader.index_with(vocab)
+
+    for _ in range(2):
+        batches = list(loader)
+        assert len(batches) == len(loader)
+        token_ids_by_index = _token_ids_by_index(batches)
+        assert sorted(token_ids_by_index) == list(range(MockDatasetReader.NUM_INSTANCES))
+
+
+def test_memory_map_instances_requires_cache_directory():
+    with pytest.raises(ValueError, match="requires a cache_directory"):
+        MultiProcessDataLoader(
+            MockDatasetReader(), "some path", batch_size=2, memory_map_instances=True
+        )
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(batch_size=8),
+        dict(batch_size=8, shuffle=True),
+        dict(batch_sampler=BucketBatchSampler(batch_size=8, sorting_keys=["source"])),
+    ],
+    ids=str,
+)
+def test_cache_instance_tensors(options):
+    loader = MultiProcessDataLoader(MockDatasetReader(), "some path", **options)
+    cached_loader = MultiProcessDataLoader(
+        MockDatasetReader(), "some path", cache_instance_tensors=True, **options
+    )
+    vocab = Vocabulary.from_instances(loader.iter_instances())
+    loader.index_with(vocab)
+    cached_loader.index_with(vocab)
+
+    for epoch in range(2):
+        torch.manual_seed(epoch)
+        random.seed(epoch)
+        batches = list(loader)
+        random.seed(epoch)
+        cached_batches = list(cached_loader)
+        assert len(cached_batches) == len(batches)
+        for batch, cached_batch in zip(batches, cached_batches):
+            assert batch["index"] == cached_batch["index"]
+            assert torch.equal(batch["tensor"], cached_batch["tensor"])
+            for field_name in ("source", "target"):
+                tensors = batch[field_name]["tokens"]
+                cached_tensors = cached_batch[field_name]["tokens"]
+                assert tensors.keys() == cached_tensors.keys()
+                for key, tensor in tensors.items():
+                    assert torch.equal(tensor, cached_tensors[key])
+
+
+def test_cache_instance_tensors_requires_instances_in_memory():
+    with pytest.raises(ValueError, match="kept in memory"):
+        MultiProcessDataLoader(
+            MockDatasetReader(),
+            "some path",
+            batch_size=2,
+            max_instances_in_memory=10,
+            cache_instance_tensors=True,
+        )
+
+
+def test_instances_only_indexed_again_with_new_vocab(monkeypatch):
+    loader = MultiProcessDataLoader(MockDatasetReader(), "some path", batch_size=10)
+    vocab = Vocabulary.from_instances(loader.iter_instances())
+    loader.index_with(vocab)
+    list(loader)
+
+    num_indexed = 0
+    index_fields = Instance.index_fields
+
+    def count_index_fields(self, vocab: Vocabulary) -> None:
+        nonlocal num_indexed
+        num_indexed += 1
+        index_fields(self, vocab)
+
+    monkeypatch.setattr(Instance, "index_fields", count_index_fields)
+
+    # Later epochs and indexing with the same vocab again don't index anything.
+    loader.index_with(vocab)
+    batches = list(loader)
+    assert num_indexed == 0
+
+    # But the instances get indexed again with a different vocab.
+    new_vocab = Vocabulary.from_instances(loader.iter_instances())
+    loader.index_with(new_vocab)
+    assert num_indexed == MockDatasetReader.NUM_INSTANCES
+    assert _token_ids_by_index(list(loader)) == _token_ids_by_index(batches)
+
+
+def test_drop_tokens():
+    loader = MultiProcessDataLoader(MockDatasetReader(), "some path", batch_size=10)
+    vocab = Vocabulary.from_instances(loader.iter_instances())
+    loader.index_with(vocab)
+    batches = list(loader)
+
+    compact_loader = MultiProcessDataLoader(
+        MockDatasetReader(), "some path", batch_size=10, drop_tokens=True
+    )
+    compact_loader.index_with(vocab)
+    for instance in compact_loader.iter_instances():
+        with pytest.raises(ValueError, match="dropped"):
+            instance["source"][0]  # type: ignore
+    assert _token_ids_by_index(list(compact_loader)) == _token_ids_by_index(batches)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(batch_size=8, shuffle=True),
+        dict(batch_sampler=BucketBatchSampler(batch_size=8, sorting_keys=["source"])),
+    ],
+    ids=str,
+)
+def test_resume_epoch_from_state_dict(options):
+    loader = MultiProcessDataLoader(MockDatasetReader(), "some path", **options)
+    vocab = Vocabulary.from_instances(loader.iter_instances())
+    loader.index_with(vocab)
+
+    batch_iterator = iter(loader)
+    batches = [next(batch_iterator) for _ in range(3)]
+    mid_epoch_state = loader.state_dict()
+    batches.extend(batch_iterator)
+    # Between epochs, the state is the one of the next epoch.
+    next_epoch_state = loader.state_dict()
+    next_epoch_batches = list(loader)
+
+    collator = CountingDataCollator()
+    resumed_loader = MultiProcessDataLoader(
+        MockDatasetReader(), "some path", collate_fn=collator, **options
+    )
+    resumed_loader.index_with(vocab)
+    random.seed(1234)
+    resumed_loader.load_state_dict(mid_epoch_state, num_batches_to_skip=3)
+    assert [batch["index"] for batch in resumed_loader] == [batch["index"] for batch in batches[3:]]
+    # The batches before the checkpoint aren't made at all.
+    assert collator.num_collated == len(batches) - 3
+
+    random.seed(1234)
+    resumed_loader.load_state_dict(next_epoch_state)
+    assert [batch["index"] for batch in resumed_loader] == [
+        batch["index"] for batch in next_epoch_batches
+    ]
+
+
+def test_state_dict_requires_instances_in_memory():
+    loader = MultiProcessDataLoader(
+        MockDatasetReader(), "some path", batch_size=2, max_instances_in_memory=10
+    )
+    assert loader.state_dict() is None
+    with pytest.raises(ValueError, match="can't resume"):
+        loader.load_state_dict({"random_state": random.getstate()}, num_batches_to_skip=2)
+
+
+class NumbersDatasetReader(DatasetReader):
+    def _read(self, file_path: str):
+        for i in range(int(file_path)):
+            yield Instance({"index": TensorField(torch.tensor([i]))})
+
+
+def _balanced_batches(global_rank: int, world_size: int, gpu_id: int, balance: bool):
+    # The readers of the two workers get 5 and 4 instances, so 3 and 2 batches.
+    loader = MultiProcessDataLoader(
+        NumbersDatasetReader(),
+        "9",
+        batch_size=2,
+        shuffle=True,
+        balance_distributed_batches=balance,
+    )
+    loader.index_with(Vocabulary())
+    assert loader.has_equal_batch_counts() == balance
+    for _ in range(3):
+        num_batches = sum(1 for _ in loader)
+        assert num_batches == (2 if balance or global_rank == 1 else 3)
+
+
+@pytest.mark.parametrize("balance", [True, False])
+def test_balance_distributed_batches(balance: bool):
+    run_distributed_test([-1, -1], _balanced_batches, balance)
+
+
+def test_balance_distributed_batches_needs_instances_in_memory():
+    with pytest.raises(ValueError, match="balance_distributed_batches"):
+        MultiProcessDataLoader(
+            NumbersDatasetReader(),
+            "9",
+            batch_size=2,
+            max_instances_in_memory=4,
+            balance_distributed_batches=True,
+        )
+    loader = MultiProcessDataLoader(
+        NumbersDatasetReader(),
+        "9",
+        batch_size=2,
+        max_instances_in_memory=4,
+        batches_per_epoch=3,
+        balance_distributed_batches=True,
+    )
+    assert loader.has_equal_batch_counts()
+
+
+class WordsDatasetReader(DatasetReader):
+    def _read(self, file_path: str):
+        for i in range(int(file_path)):
+            # Word "j" is in the instances of all of the numbers that it divides.
+            words = [str(j) for j in range(1, i + 1) if i % j == 0]
+            yield Instance(
+                {
+                    "text": TextField([Token(word) for word in words]),
+                    "label": LabelField(str(i % 2)),
+                }
+            )
+
+    def apply_token_indexers(self, instance: Instance) -> None:
+        instance["text"].token_indexers = {"tokens": SingleIdTokenIndexer()}  # type: ignore
+
+
+@pytest.mark.parametrize("max_instances_in_memory", [None, 3])
+@pytest.mark.parametrize("worker_type", ["process", "thread"])
+def test_count_vocab_items(max_instances_in_memory, worker_type):
+    expected: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for instance in WordsDatasetReader().read("50"):
+        WordsDatasetReader().apply_token_indexers(instance)
+        instance.count_vocab_items(expected)
+
+    loader = MultiProcessDataLoader(
+        WordsDatasetReader(),
+        "50",
+        batch_size=2,
+        num_workers=2,
+        max_instances_in_memory=max_instances_in_memory,
+        worker_type=worker_type,
+    )
+    counter: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    loader.count_vocab_items(counter)
+    assert counter == expected
+
+
+def test_count_vocab_items_prunes_counts():
+    loader = MultiProcessDataLoader(
+        WordsDatasetReader(), "4000", batch_size=2, num_workers=2, max_instances_in_memory=100
+    )
+    counter: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    loader.count_vocab_items(counter, max_items_per_namespace=3)
+    # The counts are pruned in each worker after 1000 and 2000 instances, and once more after
+    # they are merged, so they are approximate: "3" divides more of the numbers than "4" does,
+    # but the first worker only reads the even numbers, where "4" is more frequent, so it never
+    # sends its counts of "3".
+    assert counter["tokens"] == {"1": 3999, "2": 1999, "4": 999}
+    assert counter["labels"] == {"0": 2000, "1": 2000}
+
+
+class FailingDatasetReader(WordsDatasetReader):
+    def _read(self, file_path: str):
+        yield from super()._read(file_path)
+        raise RuntimeError("no more words")
+
+
+def test_thread_workers():
+    loader = MultiProcessDataLoader(
+        WordsDatasetReader(),
+        "100",
+        batch_size=2,
+        num_workers=3,
+        max_instances_in_memory=4,
+        worker_type="thread",
+    )
+    loader.index_with(Vocabulary.from_instances(loader.iter_instances()))
+    assert sum(len(batch["label"]) for batch in loader) == 100
+
+    # Stopping early stops the threads.
+    threads = threading.active_count()
+    for i, batch in enumerate(loader):
+        if i == 3:
+            break
+    assert threading.active_count() == threads
+
+    with pytest.raises(WorkerError, match="no more words"):
+        # This reads all instances right away.
+        MultiProcessDataLoader(
+            FailingDatasetReader(), "10", batch_size=2, num_workers=2, worker_type="thread"
+        )
+    assert threading.active_count() == threads
+
+
+def test_thread_workers_have_their_own_reader():
+    loader = MultiProcessDataLoader(
+        WordsDatasetReader(), "10", batch_size=2, num_workers=2, worker_type="thread"
+    )
+    assert loader.reader._worker_info is None
+
+
+def test_thread_workers_reuse_their_readers():
+    readers: List[DatasetReader] = []
+
+    class RecordingReader(WordsDatasetReader):
+        def _read(self, file_path: str):
+            readers.append(self)
+            yield from super()._read(file_path)
+
+    loader = MultiProcessDataLoader(
+        RecordingReader(),
+        "10",
+        batch_size=2,
+        num_workers=2,
+        max_instances_in_memory=4,
+        worker_type="thread",
+    )
+    loader.index_with(Vocabulary.from_instances(WordsDatasetReader().read("10")))
+    for _ in range(3):
+        assert sum(len(batch["label"]) for batch in loader) == 10
+    assert len(readers) == 6
+    assert len({id(reader) for reader in readers}) == 2
+    assert loader.reader not in readers
+
+
+def test_thread_workers_with_shared_memory_buffers():
+    with pytest.raises(ValueError, match="thread workers"):
+        MultiProcessDataLoader(
+            WordsDatasetReader(),
+            "10",
+            batch_size=2,
+            num_workers=2,
+            max_instances_in_memory=4,
+            worker_type="thread",
+            shared_memory_buffer_size=2 ** 16,
+        )
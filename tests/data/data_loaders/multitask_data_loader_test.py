@@ -79,3 +79,39 @@ class MultiTaskDataLoaderTest:
         assert torch.all(batch["label"] == torch.IntTensor([1]))
         with pytest.raises(StopIteration):
             next(iterator)
+
+    def test_loading_with_shared_workers(self):
+        reader = MultiTaskDatasetReader(
+            readers={"a": FakeDatasetReaderA(), "b": FakeDatasetReaderB()}
+        )
+        data_path = {"a": "ignored", "b": "ignored"}
+        scheduler = RoundRobinScheduler(batch_size=4)
+        sampler = WeightedSampler({"a": 1, "b": 2})
+        loader = MultiTaskDataLoader(
+            reader=reader,
+            data_path=data_path,
+            scheduler=scheduler,
+            sampler=sampler,
+            instances_per_epoch=9,
+            max_instances_in_memory={"a": 10, "b": 10},
+            shared_workers=2,
+            shared_workers_chunk_size=3,
+        )
+        vocab = Vocabulary()
+        vocab.add_tokens_to_namespace(["A", "B"], "labels")
+        loader.index_with(vocab)
+        for _ in range(30):
+            labels = torch.cat([batch["label"] for batch in loader])
+            assert labels.tolist() == [0, 1, 0, 1, 0, 1, 1, 1, 1]
+
+        # Each worker reads half of each dataset.
+        assert sum(1 for _ in loader.iter_instances()) == 200
+
+        with pytest.raises(ValueError, match="shared"):
+            MultiTaskDataLoader(
+                reader=reader,
+                data_path=data_path,
+                scheduler=scheduler,
+                num_workers={"a": 2},
+                shared_workers=2,
+            )
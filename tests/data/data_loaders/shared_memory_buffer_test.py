@@ -0,0 +1,64 @@
+import torch
+import torch.multiprocessing as mp
+
+from allennlp.common.testing import AllenNlpTestCase, assert_equal_tensor_dicts
+from allennlp.data.data_loaders.shared_memory_buffer import (
+    SharedMemoryBatch,
+    SharedMemoryRingBuffer,
+)
+
+
+def _make_batch(batch_size: int, length: int):
+    return {
+        "tokens": {
+            "token_ids": torch.randint(100, (batch_size, length)),
+            "mask": torch.rand(batch_size, length) > 0.5,
+        },
+        "label": torch.randint(2, (batch_size,), dtype=torch.int32),
+        "scores": torch.rand(batch_size, dtype=torch.float16),
+        "metadata": [{"index": i} for i in range(batch_size)],
+    }
+
+
+def _write_batches(buffer, queue, batches):
+    for batch in batches:
+        queue.put(buffer.write(batch))
+
+
+class TestSharedMemoryRingBuffer(AllenNlpTestCase):
+    def test_round_trip(self):
+        buffer = SharedMemoryRingBuffer(0, 2 ** 16, mp.get_context())
+        batch = _make_batch(4, 10)
+        written = buffer.write(batch)
+        assert isinstance(written, SharedMemoryBatch)
+        assert_equal_tensor_dicts(buffer.read(written), batch)
+
+    def test_wraps_around(self):
+        buffer = SharedMemoryRingBuffer(0, 2 ** 12, mp.get_context())
+        for length in range(1, 120, 3):
+            batch = _make_batch(2, length)
+            written = buffer.write(batch)
+            assert isinstance(written, SharedMemoryBatch)
+            assert_equal_tensor_dicts(buffer.read(written), batch)
+
+    def test_batches_that_dont_fit_are_returned_unchanged(self):
+        buffer = SharedMemoryRingBuffer(0, 256, mp.get_context())
+        batch = _make_batch(8, 100)
+        assert buffer.write(batch) is batch
+
+        buffer = SharedMemoryRingBuffer(0, 2 ** 16, mp.get_context())
+        batch = {"embeddings": torch.rand(2, 3, dtype=torch.bfloat16)}
+        assert buffer.write(batch) is batch
+
+    def test_batches_from_another_process(self):
+        ctx = mp.get_context("spawn")
+        # Small enough that the worker has to wait for batches to be read, and that
+        # batches often have to wrap around.
+        buffer = SharedMemoryRingBuffer(0, 2 ** 12, ctx)
+        queue = ctx.Queue()
+        batches = [_make_batch(2, length) for length in [*range(1, 120, 3), *range(120, 1, -7)]]
+        worker = ctx.Process(target=_write_batches, args=(buffer, queue, batches), daemon=True)
+        worker.start()
+        for batch in batches:
+            assert_equal_tensor_dicts(buffer.read(queue.get()), batch)
+        worker.join()
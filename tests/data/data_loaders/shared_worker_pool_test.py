@@ -0,0 +1,69 @@
+import itertools
+from typing import List
+
+import pytest
+
+from allennlp.data import DatasetReader, Instance
+from allennlp.data.data_loaders import WorkerError
+from allennlp.data.data_loaders.shared_worker_pool import SharedWorkerPool
+from allennlp.data.fields import LabelField
+
+
+class NumbersReader(DatasetReader):
+    def _read(self, file_path: str):
+        for i in range(int(file_path)):
+            yield Instance({"label": LabelField(i, skip_indexing=True)})
+
+
+class FailingReader(DatasetReader):
+    def _read(self, file_path: str):
+        yield Instance({"label": LabelField(0, skip_indexing=True)})
+        raise ValueError("oops")
+
+
+def labels(instances) -> List[int]:
+    return [instance["label"].label for instance in instances]
+
+
+@pytest.mark.parametrize("num_workers", [1, 3])
+@pytest.mark.parametrize("chunk_size", [1, 4, 100])
+def test_read_every_instance_once(num_workers: int, chunk_size: int):
+    pool = SharedWorkerPool(
+        {"a": NumbersReader(), "b": NumbersReader()},
+        {"a": "50", "b": "10"},
+        num_workers,
+        chunk_size=chunk_size,
+    )
+    try:
+        for _ in range(3):
+            assert sorted(labels(pool.read("a"))) == list(range(50))
+        # Passes over different datasets can go on at the same time.
+        a = pool.read("a")
+        b = pool.read("b")
+        both = [next(a), next(b), next(a)] + list(b) + list(a)
+        assert sorted(labels(both)) == sorted(list(range(50)) + list(range(10)))
+    finally:
+        pool.close()
+
+
+def test_stopping_early():
+    pool = SharedWorkerPool({"a": NumbersReader()}, {"a": "1000"}, 2, chunk_size=5)
+    try:
+        first = pool.read("a")
+        assert len(labels(itertools.islice(first, 12))) == 12
+        first.close()
+        assert sorted(labels(pool.read("a"))) == list(range(1000))
+        assert not pool._chunks
+    finally:
+        pool.close()
+
+
+def test_worker_errors_are_raised():
+    pool = SharedWorkerPool({"a": FailingReader(), "b": NumbersReader()}, {"a": "", "b": "5"}, 2)
+    try:
+        with pytest.raises(WorkerError, match="oops"):
+            list(pool.read("a"))
+        # The pool still works afterwards.
+        assert sorted(labels(pool.read("b"))) == list(range(5))
+    finally:
+        pool.close()
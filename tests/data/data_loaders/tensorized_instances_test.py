@@ -0,0 +1,87 @@
+from typing import List
+
+import torch
+
+from allennlp.common.testing import AllenNlpTestCase, assert_equal_tensor_dicts
+from allennlp.data import Instance, Token, Vocabulary
+from allennlp.data.data_loaders.data_collator import allennlp_collate
+from allennlp.data.data_loaders.tensorized_instances import TensorizedInstances
+from allennlp.data.fields import (
+    Field,
+    LabelField,
+    ListField,
+    MetadataField,
+    SequenceLabelField,
+    SpanField,
+    TensorField,
+    TextField,
+)
+from allennlp.data.token_indexers import SingleIdTokenIndexer, TokenCharactersIndexer
+
+
+class TestTensorizedInstances(AllenNlpTestCase):
+    def setup_method(self):
+        super().setup_method()
+        self.token_indexers = {
+            "tokens": SingleIdTokenIndexer(),
+            "characters": TokenCharactersIndexer(min_padding_length=2),
+        }
+        sentences = [
+            "this is a sentence",
+            "a",
+            "another much longer sentence than the others",
+            "this is unknown",
+        ]
+        self.instances = [self._make_instance(i, sentence) for i, sentence in enumerate(sentences)]
+        self.vocab = Vocabulary.from_instances(self.instances[:-1])
+        for instance in self.instances:
+            instance.index_fields(self.vocab)
+
+    def _make_instance(self, index: int, sentence: str) -> Instance:
+        tokens = [Token(word) for word in sentence.split()]
+        text = TextField(tokens, self.token_indexers)
+        fields: List[Field] = [
+            text,
+            LabelField(str(len(tokens) % 2)),
+            SequenceLabelField([str(len(token.text)) for token in tokens], text),
+            SpanField(0, len(tokens) - 1, text),
+            ListField(
+                [TextField(tokens[:i], self.token_indexers) for i in range(1, len(tokens) + 1)]
+            ),
+            TensorField(torch.full((len(tokens), 2), index, dtype=torch.float), padding_value=-1),
+            MetadataField({"index": index}),
+        ]
+        names = ["text", "label", "tags", "span", "prefixes", "tensor", "metadata"]
+        return Instance(dict(zip(names, fields)))
+
+    def test_collate_matches_allennlp_collate(self):
+        tensorized = TensorizedInstances(self.instances)
+        for indices in ([0], [0, 1], [2, 0, 1], [3, 2, 1, 0], [1, 3]):
+            # The second time, the tensors come from the cache.
+            for _ in range(2):
+                assert_equal_tensor_dicts(
+                    tensorized.collate(indices),
+                    allennlp_collate([self.instances[i] for i in indices]),
+                )
+        assert all(tensors is not None for tensors in tensorized._tensors)
+
+    def test_collate_falls_back_to_allennlp_collate(self):
+        # The padding of this field isn't a single value, so it can't be redone from the
+        # tensors of each instance.
+        class PositionsField(Field[torch.Tensor]):
+            def __init__(self, length: int) -> None:
+                self.length = length
+
+            def get_padding_lengths(self):
+                return {"num_positions": self.length}
+
+            def as_tensor(self, padding_lengths):
+                return torch.arange(padding_lengths["num_positions"])
+
+            def empty_field(self):
+                return PositionsField(0)
+
+        instances = [Instance({"positions": PositionsField(length)}) for length in (1, 3)]
+        tensorized = TensorizedInstances(instances)
+        assert_equal_tensor_dicts(tensorized.collate([0, 1]), allennlp_collate(instances))
+        assert tensorized._tensors == [None, None]
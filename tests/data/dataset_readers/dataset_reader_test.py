@@ -178,3 +178,42 @@ def test_instance_slicing(
         assert len(result) <= maximum_expected_result_size
 
     assert len(union) == total == (max_instances or TOTAL_INSTANCES)
+
+
+class MockLinesDatasetReader(DatasetReader):
+    def __init__(self, **kwargs):
+        super().__init__(
+            manual_distributed_sharding=True, manual_multiprocess_sharding=True, **kwargs
+        )
+
+    def _read(self, file_path):
+        for line in self.shard_text_lines(file_path):
+            yield self.text_to_instance(int(line))
+
+    def text_to_instance(self, index: int):  # type: ignore
+        return Instance({"index": LabelField(index, skip_indexing=True)})
+
+
+@pytest.mark.parametrize("max_instances", [None, 17])
+def test_shard_text_lines(monkeypatch, tmp_path, max_instances: Optional[int]):
+    file_path = tmp_path / "lines.txt"
+    file_path.write_text("".join(f"{i}\n" for i in range(TOTAL_INSTANCES)))
+
+    world_size = 2
+    num_workers = 3
+    results: List[List[int]] = []
+    monkeypatch.setattr(common_util, "is_distributed", lambda: True)
+    monkeypatch.setattr(dist, "get_world_size", lambda: world_size)
+    for global_rank in range(world_size):
+        monkeypatch.setattr(dist, "get_rank", lambda: global_rank)
+        for worker_id in range(num_workers):
+            reader = MockLinesDatasetReader(max_instances=max_instances)
+            reader._set_worker_info(WorkerInfo(num_workers, worker_id))
+            results.append([x["index"].label for x in reader.read(file_path)])  # type: ignore
+
+    all_indices = [index for result in results for index in result]
+    assert sorted(all_indices) == list(range(max_instances or TOTAL_INSTANCES))
+    if max_instances is None:
+        # Each worker reads its own block of lines.
+        assert all_indices == list(range(TOTAL_INSTANCES))
+        assert all(len(result) >= TOTAL_INSTANCES // 6 - 1 for result in results)
@@ -1,14 +1,18 @@
 import glob
+import itertools
 import os
 import tarfile
 from collections import Counter
 from typing import Tuple
 
+import pytest
+
 from allennlp.common.testing import AllenNlpTestCase
 from allennlp.data.data_loaders import MultiProcessDataLoader
 from allennlp.data.dataset_readers import (
     SequenceTaggingDatasetReader,
     ShardedDatasetReader,
+    WorkerInfo,
 )
 from allennlp.data.instance import Instance
 
@@ -80,3 +84,51 @@ class TestShardedDatasetReader(AllenNlpTestCase):
 
     def test_sharded_read_archive(self):
         self.read_and_check_instances(str(self.archive_filename))
+
+    def test_sharded_read_with_prefetching(self):
+        self.reader = ShardedDatasetReader(
+            base_reader=self.base_reader, prefetch_shards=3, prefetch_buffer_size=2
+        )
+        self.read_and_check_instances(self.identical_files_glob)
+
+    def test_prefetching_keeps_order_and_raises_errors(self):
+        file_paths = sorted(glob.glob(self.identical_files_glob))
+        expected = [
+            fingerprint(instance)
+            for file_path in file_paths[:50]
+            for instance in self.base_reader._read(file_path)
+        ]
+        with open(file_paths[50], "w") as f:
+            f.write("no tags here\n")
+
+        reader = ShardedDatasetReader(base_reader=self.base_reader, prefetch_shards=4)
+        instances = reader._read(self.identical_files_glob)
+        first = [fingerprint(instance) for instance in itertools.islice(instances, len(expected))]
+        assert first == expected
+        with pytest.raises(ValueError):
+            list(instances)
+
+    def test_balance_shards_by_size(self):
+        for i, file_path in enumerate(sorted(glob.glob(self.identical_files_glob))):
+            if i % 10 == 0:
+                # A few files that are a lot bigger than the others.
+                with open(file_path, "a") as f:
+                    f.write(open(file_path).read() * 20)
+
+        num_workers = 4
+        worker_shards = []
+        for worker_id in range(num_workers):
+            reader = ShardedDatasetReader(base_reader=self.base_reader, balance_shards_by_size=True)
+            reader._set_worker_info(WorkerInfo(num_workers, worker_id))
+            worker_shards.append(reader._balanced_shards(glob.glob(self.identical_files_glob)))
+
+        all_shards = [shard for shards in worker_shards for shard in shards]
+        assert sorted(all_shards) == sorted(glob.glob(self.identical_files_glob))
+        sizes = [sum(os.path.getsize(shard) for shard in shards) for shards in worker_shards]
+        assert max(sizes) - min(sizes) <= max(os.path.getsize(shard) for shard in all_shards)
+        round_robin_sizes = [
+            sum(os.path.getsize(shard) for shard in all_shards_sorted[worker_id::num_workers])
+            for worker_id in range(num_workers)
+            for all_shards_sorted in [sorted(all_shards)]
+        ]
+        assert max(sizes) < max(round_robin_sizes)
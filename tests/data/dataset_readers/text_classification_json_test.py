@@ -5,6 +5,7 @@ import spacy
 
 from allennlp.data.dataset_readers import TextClassificationJsonReader
 from allennlp.common.testing import AllenNlpTestCase
+from allennlp.data.tokenizers import Token, WhitespaceTokenizer
 from allennlp.data.tokenizers.sentence_splitter import SpacySentenceSplitter
 from allennlp.common.util import get_spacy_model
 
@@ -324,3 +325,38 @@ class TestTextClassificationJsonReader:
         text = [[token.text for token in sentence.tokens] for sentence in fields["tokens"]]
         assert text == instance3["tokens"]
         assert fields["label"].label == instance3["label"]
+
+    @pytest.mark.parametrize("tokenizer_batch_size", [2, 100])
+    def test_tokenizer_batch_size(self, tokenizer_batch_size: int):
+        class CountingTokenizer(WhitespaceTokenizer):
+            num_batches = 0
+
+            def batch_tokenize(self, texts: List[str]) -> List[List[Token]]:
+                CountingTokenizer.num_batches += 1
+                return super().batch_tokenize(texts)
+
+        ag_path = (
+            AllenNlpTestCase.FIXTURES_ROOT
+            / "data"
+            / "text_classification_json"
+            / "ag_news_corpus.jsonl"
+        )
+        expected = list(
+            TextClassificationJsonReader(
+                tokenizer=WhitespaceTokenizer(), max_sequence_length=5
+            ).read(ag_path)
+        )
+        reader = TextClassificationJsonReader(
+            tokenizer=CountingTokenizer(),
+            max_sequence_length=5,
+            tokenizer_batch_size=tokenizer_batch_size,
+        )
+        instances = list(reader.read(ag_path))
+        assert [instance.fields["tokens"].tokens for instance in instances] == [
+            instance.fields["tokens"].tokens for instance in expected
+        ]
+        assert [instance.fields["label"].label for instance in instances] == [
+            instance.fields["label"].label for instance in expected
+        ]
+        # There are three instances.
+        assert CountingTokenizer.num_batches == (2 if tokenizer_batch_size == 2 else 1)
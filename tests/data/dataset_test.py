@@ -2,11 +2,18 @@ import pytest
 import numpy
 
 from allennlp.common.checks import ConfigurationError
-from allennlp.common.testing import AllenNlpTestCase
+from allennlp.common.testing import AllenNlpTestCase, assert_equal_tensor_dicts
 from allennlp.data import Instance, Token, Vocabulary
 from allennlp.data.batch import Batch
-from allennlp.data.fields import TextField, LabelField
-from allennlp.data.token_indexers import SingleIdTokenIndexer
+from allennlp.data.fields import (
+    LabelField,
+    ListField,
+    MetadataField,
+    SequenceLabelField,
+    SpanField,
+    TextField,
+)
+from allennlp.data.token_indexers import SingleIdTokenIndexer, TokenCharactersIndexer
 
 
 class TestDataset(AllenNlpTestCase):
@@ -48,6 +55,48 @@ class TestDataset(AllenNlpTestCase):
             text2, numpy.array([[2, 3, 4, 1, 5, 6], [2, 3, 1, 0, 0, 0]])
         )
 
+    def test_as_tensor_dict_matches_padding_instances_one_by_one(self):
+        token_indexers = {
+            "tokens": SingleIdTokenIndexer(),
+            "characters": TokenCharactersIndexer(min_padding_length=3),
+        }
+        instances = []
+        for sentence in ["this is a sentence .", "a", "here is a different sentence ."]:
+            tokens = [Token(t) for t in sentence.split()]
+            text = TextField(tokens, token_indexers)
+            fields = {
+                "text": text,
+                "label": LabelField(len(tokens), skip_indexing=True),
+                "tags": SequenceLabelField([t.text for t in tokens], text),
+                "span": SpanField(0, len(tokens) - 1, text),
+                "prefixes": ListField([TextField(tokens[:i], token_indexers) for i in [1, 2]]),
+                "spans": ListField(
+                    [
+                        ListField([SpanField(i, j, text) for j in range(i, len(tokens))])
+                        for i in range(len(tokens))
+                    ]
+                ),
+                "labels": ListField([LabelField(t.text) for t in tokens]),
+                "metadata": MetadataField({"sentence": sentence}),
+            }
+            instances.append(Instance(fields))
+        vocab = Vocabulary.from_instances(instances)
+        dataset = Batch(instances)
+        dataset.index_instances(vocab)
+
+        padding_lengths = dataset.get_padding_lengths()
+        # Some lengths are shorter than the longest instance, to check that we truncate the same way.
+        padding_lengths["text"]["tokens___tokens"] = 4
+        padding_lengths["text"]["characters___num_token_characters"] = 2
+        for lengths in (dataset.get_padding_lengths(), padding_lengths):
+            expected = {
+                name: field.batch_tensors(
+                    [instance[name].as_tensor(lengths.get(name, {})) for instance in instances]
+                )
+                for name, field in instances[0].fields.items()
+            }
+            assert_equal_tensor_dicts(dataset.as_tensor_dict(lengths), expected)
+
     def get_instances(self):
         field1 = TextField(
             [Token(t) for t in ["this", "is", "a", "sentence", "."]], self.token_indexer
@@ -1,4 +1,6 @@
+from array import array
 from collections import defaultdict
+import pickle
 from typing import Dict, List
 
 import numpy
@@ -363,3 +365,33 @@ class TestTextField(AllenNlpTestCase):
         field = TextField([Token(t) for t in ["This", "is", "a", "sentence", "."]], {})
 
         assert field.human_readable_repr() == ["This", "is", "a", "sentence", "."]
+
+    def test_drop_tokens(self):
+        field = TextField(
+            [Token(t) for t in ["A", "sentence"]],
+            token_indexers={
+                "words": SingleIdTokenIndexer("words"),
+                "characters": TokenCharactersIndexer("characters", min_padding_length=1),
+            },
+        )
+        with pytest.raises(ConfigurationError, match="index"):
+            field.drop_tokens()
+
+        field.index(self.vocab)
+        padding_lengths = field.get_padding_lengths()
+        padding_lengths["words___tokens"] = 4
+        expected_tensors = field.as_tensor(padding_lengths)
+
+        field.drop_tokens()
+        assert isinstance(field._indexed_tokens["words"]["tokens"], array)
+        for f in (field, pickle.loads(pickle.dumps(field)), field.duplicate()):
+            assert len(f) == f.sequence_length() == 2
+            tensors = f.as_tensor(padding_lengths)
+            for indexer_name, indexer_tensors in expected_tensors.items():
+                for key, tensor in indexer_tensors.items():
+                    assert tensors[indexer_name][key].tolist() == tensor.tolist()
+
+        with pytest.raises(ValueError, match="dropped"):
+            field[0]
+        with pytest.raises(ConfigurationError, match="dropped"):
+            field.index(self.vocab)
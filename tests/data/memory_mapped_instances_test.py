@@ -0,0 +1,72 @@
+import pickle
+
+import numpy
+import pytest
+
+from allennlp.common.testing import AllenNlpTestCase
+from allennlp.data import Instance, Token
+from allennlp.data.fields import LabelField, MetadataField, TextField
+from allennlp.data.memory_mapped_instances import (
+    MemoryMappedInstances,
+    write_memory_mapped_instances,
+)
+from allennlp.data.token_indexers import SingleIdTokenIndexer
+
+
+class TestMemoryMappedInstances(AllenNlpTestCase):
+    def setup_method(self):
+        super().setup_method()
+        self.token_indexers = {"tokens": SingleIdTokenIndexer()}
+        self.instances = [
+            Instance(
+                {
+                    "text": TextField([Token(t) for t in ["a"] * (i + 1)], self.token_indexers),
+                    "label": LabelField(str(i % 2)),
+                    "metadata": MetadataField({"index": i}),
+                }
+            )
+            for i in range(10)
+        ]
+        self.filename = self.TEST_DIR / "instances"
+        with write_memory_mapped_instances(self.filename) as write:
+            for instance in self.instances:
+                write(instance)
+
+    def test_random_access(self):
+        instances = MemoryMappedInstances(self.filename)
+        assert len(instances) == 10
+        for i in [3, 0, 9, 5]:
+            assert instances[i]["metadata"]["index"] == i
+            assert len(instances[i]["text"]) == i + 1
+        assert instances[-1]["metadata"]["index"] == 9
+        assert [instance["metadata"]["index"] for instance in instances[2:8:3]] == [2, 5]
+        assert [instance["metadata"]["index"] for instance in instances] == list(range(10))
+        with pytest.raises(IndexError):
+            instances[10]
+
+    def test_token_indexers_are_stored_once(self):
+        instances = MemoryMappedInstances(self.filename)
+        first, second = instances[0], instances[1]
+        token_indexer = first["text"].token_indexers["tokens"]
+        assert isinstance(token_indexer, SingleIdTokenIndexer)
+        assert second["text"].token_indexers["tokens"] is token_indexer
+
+    def test_field_lengths(self):
+        instances = MemoryMappedInstances(self.filename)
+        assert instances.field_names == ["text", "label", "metadata"]
+        numpy.testing.assert_array_equal(instances.field_lengths("text"), numpy.arange(1, 11))
+        with pytest.raises(KeyError):
+            instances.field_lengths("not a field")
+
+    def test_can_be_pickled(self):
+        instances = pickle.loads(pickle.dumps(MemoryMappedInstances(self.filename)))
+        assert len(instances) == 10
+        assert instances[7]["metadata"]["index"] == 7
+
+    def test_failed_write_leaves_no_file(self):
+        filename = self.TEST_DIR / "failed"
+        with pytest.raises(ValueError):
+            with write_memory_mapped_instances(filename) as write:
+                write(self.instances[0])
+                raise ValueError()
+        assert not filename.exists()
@@ -0,0 +1,79 @@
+import pickle
+
+import numpy
+import pytest
+
+from allennlp.common.testing import AllenNlpTestCase
+from allennlp.data.memory_mapped_vocabulary import (
+    MemoryMappedNamespace,
+    write_memory_mapped_namespace,
+)
+
+
+class TestMemoryMappedNamespace(AllenNlpTestCase):
+    def setup_method(self):
+        super().setup_method()
+        self.tokens = ["@@UNKNOWN@@", "a", "naïve", "two\nlines", ""] + [
+            f"token{i}" for i in range(100)
+        ]
+        self.filename = self.TEST_DIR / "tokens.bin"
+        write_memory_mapped_namespace(self.filename, self.tokens)
+
+    def test_lookups(self):
+        namespace = MemoryMappedNamespace(self.filename)
+        assert len(namespace) == len(self.tokens)
+        for index, token in enumerate(self.tokens):
+            assert namespace.get_index(token) == index
+            assert namespace.get_token(index) == token
+        assert namespace.get_index("b") is None
+        assert namespace.get_token(len(self.tokens)) is None
+        assert namespace.get_token(-1) is None
+
+    def test_mappings_act_like_dictionaries(self):
+        namespace = MemoryMappedNamespace(self.filename, padding_token="@@PADDING@@")
+        token_to_index = {token: index for index, token in enumerate(["@@PADDING@@"] + self.tokens)}
+        index_to_token = {index: token for token, index in token_to_index.items()}
+        assert namespace.token_to_index == token_to_index
+        assert namespace.index_to_token == index_to_token
+        assert list(namespace.token_to_index) == list(token_to_index)
+        assert namespace.token_to_index["@@PADDING@@"] == 0
+        assert namespace.token_to_index["a"] == 2
+        assert namespace.index_to_token[numpy.int64(2)] == "a"
+        assert "a" in namespace.token_to_index
+        assert "b" not in namespace.token_to_index
+        assert namespace.token_to_index.get("b") is None
+        with pytest.raises(KeyError):
+            namespace.index_to_token[len(namespace)]
+        with pytest.raises(KeyError):
+            namespace.index_to_token["a"]  # type: ignore
+
+    def test_duplicate_tokens_get_their_last_index(self):
+        write_memory_mapped_namespace(self.filename, ["a", "b", "a"])
+        namespace = MemoryMappedNamespace(self.filename)
+        assert namespace.get_index("a") == 2
+        assert namespace.get_token(0) == "a"
+
+    def test_empty_namespace(self):
+        write_memory_mapped_namespace(self.filename, [])
+        namespace = MemoryMappedNamespace(self.filename)
+        assert len(namespace) == 0
+        assert namespace.get_index("a") is None
+        assert dict(namespace.token_to_index) == {}
+
+    def test_pickling(self):
+        namespace = MemoryMappedNamespace(self.filename, padding_token="@@PADDING@@")
+        unpickled = pickle.loads(pickle.dumps(namespace))
+        assert unpickled.token_to_index == namespace.token_to_index
+
+        # If the file is gone, its contents are sent instead.
+        pickled = pickle.dumps(namespace)
+        self.filename.unlink()
+        with pytest.raises(FileNotFoundError):
+            pickle.loads(pickled)
+        unpickled = pickle.loads(pickle.dumps(namespace))
+        assert unpickled.get_index("naïve") == 3
+
+    def test_other_files_are_rejected(self):
+        self.filename.write_text("a\nb\n")
+        with pytest.raises(ValueError, match="not a memory-mapped vocabulary"):
+            MemoryMappedNamespace(self.filename)
@@ -0,0 +1,64 @@
+import random
+
+from allennlp.data import Instance, Token
+from allennlp.data.fields import TextField
+from allennlp.data.samplers import BinPackingBatchSampler, MaxTokensBatchSampler
+from allennlp.data.data_loaders import MultiProcessDataLoader
+
+from .sampler_test import SamplerTest
+
+
+class TestBinPackingSampler(SamplerTest):
+    def test_create_batches_groups_correctly(self):
+        sampler = BinPackingBatchSampler(max_tokens=8, sorting_keys=["text"])
+
+        batches = list(sampler.get_batch_indices(self.instances))
+        # Ties between instances of the same size are broken randomly, so the order within a
+        # batch isn't fixed.
+        assert sorted(map(sorted, batches)) == [[0, 1], [2, 4], [3]]
+        assert sampler.padding_efficiency == 21 / 23
+
+    def test_batches_respect_max_tokens_and_cover_all_instances(self):
+        rng = random.Random(0)
+        instances = [
+            Instance({"text": TextField([Token("a")] * rng.randint(1, 30), self.token_indexers)})
+            for _ in range(200)
+        ]
+        sampler = BinPackingBatchSampler(max_tokens=64, sorting_keys=["text"], padding_noise=0.3)
+        batches = list(sampler.get_batch_indices(instances))
+        assert sorted(index for batch in batches for index in batch) == list(range(200))
+        for batch in batches:
+            assert max(len(instances[index]["text"]) for index in batch) * len(batch) <= 64
+
+    def test_pack_fills_up_batches_left_with_room(self):
+        sampler = BinPackingBatchSampler(max_tokens=12)
+        # The second batch is started by the instance of size 5, which doesn't fit into the first
+        # one. The first one still has room for the last instance, and that needs no padding.
+        assert sampler._pack([0, 1, 2, 3], [4, 4, 5, 4]) == [[0, 1, 3], [2]]
+        # An instance bigger than `max_tokens` gets a batch of its own.
+        assert sampler._pack([0, 1, 2], [13, 3, 3]) == [[0], [1, 2]]
+
+    def test_packs_with_less_padding_than_max_tokens_sampler(self):
+        rng = random.Random(0)
+        instances = [
+            Instance(
+                {
+                    "text": TextField(
+                        [Token("a")] * int(rng.lognormvariate(3, 0.7) + 1), self.token_indexers
+                    )
+                }
+            )
+            for _ in range(1000)
+        ]
+        bin_packing = BinPackingBatchSampler(max_tokens=512, sorting_keys=["text"])
+        max_tokens = MaxTokensBatchSampler(max_tokens=512, sorting_keys=["text"])
+        num_batches = len(list(bin_packing.get_batch_indices(instances)))
+        assert num_batches <= len(list(max_tokens.get_batch_indices(instances)))
+        assert bin_packing.padding_efficiency > max_tokens.padding_efficiency > 0.5
+
+    def test_batch_count(self):
+        sampler = BinPackingBatchSampler(max_tokens=8, sorting_keys=["text"])
+        data_loader = MultiProcessDataLoader(
+            self.get_mock_reader(), "fake_path", batch_sampler=sampler
+        )
+        assert len(data_loader) == 3
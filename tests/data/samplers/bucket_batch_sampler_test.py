@@ -1,6 +1,10 @@
 from allennlp.common import Params
 from allennlp.data import Instance, Token, Batch
 from allennlp.data.fields import TextField
+from allennlp.data.memory_mapped_instances import (
+    MemoryMappedInstances,
+    write_memory_mapped_instances,
+)
 from allennlp.data.samplers import BucketBatchSampler
 from allennlp.data.data_loaders import MultiProcessDataLoader
 
@@ -71,6 +75,19 @@ class TestBucketSampler(SamplerTest):
         sampler._guess_sorting_keys(instances)
         assert sampler.sorting_keys == ["passage"]
 
+    def test_memory_mapped_instances_are_sorted_without_decoding(self):
+        filename = self.TEST_DIR / "instances"
+        with write_memory_mapped_instances(filename) as write:
+            for instance in self.instances:
+                write(instance)
+        instances = MemoryMappedInstances(filename)
+
+        sampler = BucketBatchSampler(batch_size=2, padding_noise=0, shuffle=False)
+        batches = list(sampler.get_batch_indices(instances))
+        assert sampler.sorting_keys == ["text"]
+        assert batches == list(sampler.get_batch_indices(self.instances))
+        assert batches == [[4, 2], [0, 1], [3]]
+
     def test_from_params(self):
         params = Params({})
 
@@ -179,6 +179,25 @@ class TestPretrainedTransformerIndexer(AllenNlpTestCase):
         assert min(indexed["type_ids"]) == 0
         assert max(indexed["type_ids"]) == 1
 
+    def test_batch_as_padded_tensor_dict(self):
+        allennlp_tokenizer = PretrainedTransformerTokenizer("bert-base-uncased")
+        indexer = PretrainedTransformerIndexer(model_name="bert-base-uncased", max_length=4)
+        vocab = Vocabulary()
+        tokens_list = [
+            indexer.tokens_to_indices(allennlp_tokenizer.tokenize(text), vocab)
+            for text in ["AllenNLP is great", "Short", "How do trees get online?"]
+        ]
+        padding_lengths = {
+            key: max(len(tokens[key]) for tokens in tokens_list) for key in tokens_list[0]
+        }
+        batched = indexer.batch_as_padded_tensor_dict(tokens_list, padding_lengths)
+        for i, tokens in enumerate(tokens_list):
+            padded = indexer.as_padded_tensor_dict(tokens, padding_lengths)
+            assert padded.keys() == batched.keys()
+            for key, tensor in padded.items():
+                assert batched[key].dtype == tensor.dtype
+                assert batched[key][i].tolist() == tensor.tolist()
+
     @staticmethod
     def _assert_tokens_equal(expected_tokens, actual_tokens):
         for expected, actual in zip(expected_tokens, actual_tokens):
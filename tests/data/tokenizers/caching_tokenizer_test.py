@@ -0,0 +1,131 @@
+import pickle
+from typing import List
+
+from allennlp.common import Params
+from allennlp.common.testing import AllenNlpTestCase
+from allennlp.data.tokenizers import (
+    CachingSentenceSplitter,
+    CachingTokenizer,
+    CharacterTokenizer,
+    LettersDigitsTokenizer,
+    SentenceSplitter,
+    Token,
+    Tokenizer,
+)
+
+
+class CountingTokenizer(LettersDigitsTokenizer):
+    def __init__(self):
+        self.calls = 0
+
+    def tokenize(self, text: str) -> List[Token]:
+        self.calls += 1
+        return super().tokenize(text)
+
+
+class PeriodSentenceSplitter(SentenceSplitter):
+    def __init__(self):
+        self.calls = 0
+
+    def split_sentences(self, text: str) -> List[str]:
+        self.calls += 1
+        return [sentence.strip() + "." for sentence in text.split(".") if sentence.strip()]
+
+
+class TestCachingTokenizer(AllenNlpTestCase):
+    def test_tokenize_uses_cache(self):
+        inner = CountingTokenizer()
+        tokenizer = CachingTokenizer(inner)
+        text = "It costs $42, or 13 euros."
+        first = tokenizer.tokenize(text)
+        second = tokenizer.tokenize(text)
+        assert inner.calls == 1
+        assert [(t.text, t.idx, t.idx_end) for t in first] == [
+            (t.text, t.idx, t.idx_end) for t in second
+        ]
+        assert tokenizer.hits == 1
+        assert tokenizer.misses == 1
+        assert tokenizer.hit_rate == 0.5
+
+    def test_tokens_are_copies(self):
+        tokenizer = CachingTokenizer(CountingTokenizer())
+        tokenizer.tokenize("a b")[0].text = "changed"
+        tokens = tokenizer.tokenize("a b")
+        tokens[1].text = "changed"
+        assert [t.text for t in tokenizer.tokenize("a b")] == ["a", "b"]
+
+    def test_evicts_least_recently_used(self):
+        inner = CountingTokenizer()
+        tokenizer = CachingTokenizer(inner, max_size=2)
+        tokenizer.tokenize("a")
+        tokenizer.tokenize("b")
+        tokenizer.tokenize("a")
+        tokenizer.tokenize("c")
+        assert inner.calls == 3
+        tokenizer.tokenize("a")
+        assert inner.calls == 3
+        tokenizer.tokenize("b")
+        assert inner.calls == 4
+        assert len(tokenizer.cache) == 2
+
+    def test_batch_tokenize(self):
+        inner = CountingTokenizer()
+        tokenizer = CachingTokenizer(inner)
+        tokenizer.tokenize("a b")
+        texts = ["a b", "c d", "c d", "e"]
+        batch = tokenizer.batch_tokenize(texts)
+        assert [[t.text for t in tokens] for tokens in batch] == [
+            ["a", "b"],
+            ["c", "d"],
+            ["c", "d"],
+            ["e"],
+        ]
+        # The duplicate in the batch is only tokenized once.
+        assert inner.calls == 3
+        assert batch[1] is not batch[2]
+        assert batch[1][0] is not batch[2][0]
+        tokenizer.batch_tokenize(texts)
+        assert inner.calls == 3
+
+    def test_delegates_special_tokens(self):
+        tokenizer = CachingTokenizer(CharacterTokenizer(start_tokens=["<S>"], end_tokens=["</S>"]))
+        assert [t.text for t in tokenizer.tokenize("ab")] == ["<S>", "a", "b", "</S>"]
+        assert tokenizer.num_special_tokens_for_sequence() == 0
+
+    def test_pickling_gives_empty_cache(self):
+        tokenizer = CachingTokenizer(CountingTokenizer(), max_size=3)
+        tokenizer.tokenize("a b")
+        copy = pickle.loads(pickle.dumps(tokenizer))
+        assert len(copy.cache) == 0
+        assert copy.cache.max_size == 3
+        assert [t.text for t in copy.tokenize("a b")] == ["a", "b"]
+
+    def test_from_params(self):
+        tokenizer = Tokenizer.from_params(
+            Params({"type": "caching", "tokenizer": {"type": "whitespace"}, "max_size": 5})
+        )
+        assert isinstance(tokenizer, CachingTokenizer)
+        assert tokenizer.cache.max_size == 5
+
+
+class TestCachingSentenceSplitter(AllenNlpTestCase):
+    def test_split_sentences_uses_cache(self):
+        inner = PeriodSentenceSplitter()
+        splitter = CachingSentenceSplitter(inner)
+        text = "One. Two."
+        assert splitter.split_sentences(text) == ["One.", "Two."]
+        splitter.split_sentences(text).append("Three.")
+        assert splitter.split_sentences(text) == ["One.", "Two."]
+        assert inner.calls == 1
+        assert splitter.hit_rate == 2 / 3
+
+    def test_batch_split_sentences(self):
+        inner = PeriodSentenceSplitter()
+        splitter = CachingSentenceSplitter(inner)
+        splitter.split_sentences("One.")
+        assert splitter.batch_split_sentences(["One.", "Two. Three.", "Two. Three."]) == [
+            ["One."],
+            ["Two.", "Three."],
+            ["Two.", "Three."],
+        ]
+        assert inner.calls == 2
@@ -1,5 +1,7 @@
 from typing import Iterable, List
 
+import pytest
+
 from allennlp.common import Params
 from allennlp.common.testing import AllenNlpTestCase
 from allennlp.data import Token
@@ -264,6 +266,34 @@ class TestPretrainedTransformerTokenizer(AllenNlpTestCase):
         assert tokens == expected_tokens
         assert offsets == expected_offsets
 
+    @pytest.mark.parametrize("model_name", ["bert-base-cased", "roberta-base"])
+    @pytest.mark.parametrize("use_fast", [True, False])
+    def test_batch_tokenize(self, model_name: str, use_fast: bool):
+        tokenizer = PretrainedTransformerTokenizer(
+            model_name, max_length=8, tokenizer_kwargs={"use_fast": use_fast}
+        )
+        texts = [
+            "A, [MASK] AllenNLP sentence.",
+            "",
+            "This is a longer sentence, which gets truncated.",
+        ]
+        assert tokenizer.batch_tokenize(texts) == [tokenizer.tokenize(text) for text in texts]
+        assert tokenizer.batch_tokenize([]) == []
+
+    def test_batch_intra_word_tokenize(self):
+        tokenizer = PretrainedTransformerTokenizer("bert-base-cased")
+        sentences = [
+            "A, [MASK] AllenNLP sentence.".split(" "),
+            [],
+            ["A,", " ", "[MASK]", "AllenNLP", "\u007f", "sentence."],
+        ]
+        assert tokenizer.batch_intra_word_tokenize(sentences) == [
+            tokenizer.intra_word_tokenize(sentence) for sentence in sentences
+        ]
+        tokens, offsets = tokenizer.batch_intra_word_tokenize(sentences)[1]
+        assert [t.text for t in tokens] == ["[CLS]", "[SEP]"]
+        assert offsets == []
+
     def test_special_tokens_added(self):
         def get_token_ids(tokens: Iterable[Token]) -> List[int]:
             return [t.text_id for t in tokens]
@@ -72,6 +72,19 @@ class TestVocabulary(AllenNlpTestCase):
         assert "b" in words
         assert "c" in words
 
+    def test_from_instances_adds_counter(self):
+        vocab = Vocabulary.from_instances(
+            self.dataset, min_count={"tokens": 4}, counter={"tokens": {"b": 2, "d": 4}}
+        )
+        words = vocab.get_index_to_token_vocabulary().values()
+        assert "a" in words
+        assert "b" in words
+        assert "c" not in words
+        assert "d" in words
+
+        vocab = Vocabulary.from_instances([], counter={"tokens": {"d": 1}})
+        assert vocab.get_token_index("d") == 2
+
     def test_from_dataset_respects_exclusive_embedding_file(self):
         embeddings_filename = str(self.TEST_DIR / "embeddings.gz")
         with gzip.open(embeddings_filename, "wb") as embeddings_file:
@@ -219,6 +232,18 @@ class TestVocabulary(AllenNlpTestCase):
         assert vocab._token_to_index["tokens"] == expected_token_to_index_dicts["tokens"]
         assert vocab._token_to_index["labels"] == expected_token_to_index_dicts["labels"]
 
+    def test_get_token_indices(self):
+        vocab = Vocabulary(non_padded_namespaces=["labels"])
+        vocab.add_tokens_to_namespace(["a", "b"])
+        vocab.add_tokens_to_namespace(["x", "y"], namespace="labels")
+        tokens = ["b", "c", "a", "b"]
+        assert vocab.get_token_indices(tokens) == [3, 1, 2, 3]
+        assert vocab.get_token_indices(iter(tokens)) == [3, 1, 2, 3]
+        assert vocab.get_token_indices([]) == []
+        assert vocab.get_token_indices(["y", "x"], namespace="labels") == [1, 0]
+        with pytest.raises(KeyError, match="'z' not found"):
+            vocab.get_token_indices(["x", "z"], namespace="labels")
+
     def test_set_from_file_reads_padded_files(self):
 
         vocab_filename = self.TEST_DIR / "vocab_file"
@@ -314,6 +339,40 @@ class TestVocabulary(AllenNlpTestCase):
         assert vocab.get_index_to_token_vocabulary("a") == vocab2.get_index_to_token_vocabulary("a")
         assert vocab.get_index_to_token_vocabulary("b") == vocab2.get_index_to_token_vocabulary("b")
 
+    def test_saving_and_loading_binary_files(self):
+        vocab_dir = self.TEST_DIR / "vocab_save"
+
+        vocab = Vocabulary(non_padded_namespaces=["a"])
+        vocab.add_tokens_to_namespace(["a0", "a1", "a2"], namespace="a")
+        vocab.add_tokens_to_namespace(["b2", "b3\nb3"], namespace="b")
+
+        vocab.save_to_files(vocab_dir, binary=True)
+        assert (vocab_dir / "a.bin").exists()
+        assert not (vocab_dir / "a.txt").exists()
+        vocab2 = Vocabulary.from_files(vocab_dir)
+        assert vocab2 == vocab
+        assert vocab2.is_padded("b")
+        assert not vocab2.is_padded("a")
+        assert vocab2.get_token_index("b3\nb3", namespace="b") == 3
+        assert vocab2.get_token_index("b4", namespace="b") == 1
+        assert vocab2.get_token_from_index(2, namespace="a") == "a2"
+        assert vocab2.get_vocab_size("b") == 4
+
+        # The namespaces of a vocabulary loaded from binary files are saved as binary files again.
+        vocab2.save_to_files(self.TEST_DIR / "vocab_save2")
+        assert (self.TEST_DIR / "vocab_save2" / "b.bin").exists()
+        vocab2.save_to_files(self.TEST_DIR / "vocab_save3", binary=False)
+        assert Vocabulary.from_files(self.TEST_DIR / "vocab_save3") == vocab
+
+        # Memory-mapped namespaces are copied into memory when they change.
+        assert vocab2.add_token_to_namespace("b4", namespace="b") == 4
+        assert vocab2.get_token_index("b2", namespace="b") == 2
+        assert vocab2.get_token_index("b4", namespace="b") == 4
+        assert Vocabulary.from_files(vocab_dir).get_vocab_size("b") == 4
+
+        unpickled = pickle.loads(pickle.dumps(Vocabulary.from_files(vocab_dir)))
+        assert unpickled == vocab
+
     def test_saving_and_loading_works_with_byte_encoding(self):
         # We're going to set a vocabulary from a TextField using byte encoding, index it, save the
         # vocab, load the vocab, then index the text field again, and make sure we get the same
@@ -1,5 +1,7 @@
 import copy
+import glob
 import os
+import pathlib
 import tempfile
 import tarfile
 
@@ -10,9 +12,11 @@ from allennlp.version import _MAJOR, _MINOR
 from allennlp.commands.train import train_model
 from allennlp.common import Params
 from allennlp.common.meta import Meta
+from allennlp.common import file_utils
 from allennlp.common.checks import ConfigurationError
 from allennlp.common.testing import AllenNlpTestCase
 from allennlp.data.dataset_readers import DatasetReader
+from allennlp.models import archival
 from allennlp.models.archival import (
     archive_model,
     load_archive,
@@ -149,6 +153,38 @@ class ArchivalTest(AllenNlpTestCase):
                 # check.
                 pass
 
+    def test_load_archive_caches_extraction(self, monkeypatch):
+        cache_dir = pathlib.Path(file_utils.CACHE_DIRECTORY)
+        serialization_dir = self.TEST_DIR / "serialization"
+        train_model(self.params, serialization_dir=serialization_dir)
+        archive_path = serialization_dir / "model.tar.gz"
+
+        model = load_archive(archive_path).model
+        extraction_dirs = glob.glob(str(cache_dir / "*-extracted"))
+        assert len(extraction_dirs) == 1
+        assert os.path.isfile(os.path.join(extraction_dirs[0], CONFIG_NAME))
+
+        # Loading the archive again uses the extracted files.
+        marker = os.path.join(extraction_dirs[0], "marker")
+        open(marker, "w").close()
+        with monkeypatch.context() as m:
+            m.setattr(archival, "extracted_archive", None)
+            assert_models_equal(model, load_archive(archive_path).model)
+        assert os.path.exists(marker)
+
+        # A changed archive is extracted again.
+        os.utime(archive_path, (0, 0))
+        load_archive(archive_path)
+        assert len(glob.glob(str(cache_dir / "*-extracted"))) == 2
+
+    def test_load_archive_without_caching_extraction(self):
+        cache_dir = pathlib.Path(file_utils.CACHE_DIRECTORY)
+        serialization_dir = self.TEST_DIR / "serialization"
+        model = train_model(self.params, serialization_dir=serialization_dir)
+        archive = load_archive(serialization_dir / "model.tar.gz", cache_extraction=False)
+        assert_models_equal(model, archive.model)
+        assert not glob.glob(str(cache_dir / "*-extracted"))
+
     def test_include_in_archive(self):
         self.params["include_in_archive"] = ["metrics_epoch_*.json"]
 
@@ -6,6 +6,7 @@ from allennlp.common import Params
 from allennlp.common.testing import AllenNlpTestCase, requires_gpu
 from allennlp.data import Vocabulary
 from allennlp.data.batch import Batch
+from allennlp.data.data_loaders.data_collator import SequencePackingDataCollator
 from allennlp.data.fields import TextField
 from allennlp.data.instance import Instance
 from allennlp.data.token_indexers import PretrainedTransformerIndexer
@@ -355,3 +356,31 @@ class TestPretrainedTransformerEmbedder(AllenNlpTestCase):
 
         trainable.train()
         assert not trainable.fixed_module.transformer_model.training
+
+    @pytest.mark.parametrize("model_name", ["bert-base-uncased", "roberta-base"])
+    def test_packed_sequences_match_unpacked_sequences(self, model_name: str):
+        tokenizer = PretrainedTransformerTokenizer(model_name=model_name)
+        token_indexer = PretrainedTransformerIndexer(model_name=model_name)
+        sentences = [
+            "A, AllenNLP sentence.",
+            "AllenNLP is great",
+            "Packing",
+            "Short texts need a lot of padding.",
+        ]
+        instances = [
+            Instance({"tokens": TextField(tokenizer.tokenize(sentence), {"tokens": token_indexer})})
+            for sentence in sentences
+        ]
+        vocab = Vocabulary()
+        for instance in instances:
+            instance.index_fields(vocab)
+        tokens = SequencePackingDataCollator(max_length=16)(instances)["tokens"]["tokens"]
+        assert tokens["packed_token_ids"].size(0) < len(sentences)
+
+        embedder = PretrainedTransformerEmbedder(model_name).eval()
+        with torch.no_grad():
+            packed = embedder(**tokens)
+            unpacked = embedder(tokens["token_ids"], tokens["mask"], tokens.get("type_ids"))
+        mask = tokens["mask"]
+        assert packed.shape == unpacked.shape
+        assert torch.allclose(packed[mask], unpacked[mask], atol=1e-5)
@@ -2,6 +2,8 @@ import copy
 import glob
 import json
 import os
+import random
+import sys
 import time
 from typing import Any, Dict, List, Optional
 
@@ -11,11 +13,23 @@ import pytest
 import torch
 from torch.nn.utils import clip_grad_norm_
 
+from allennlp.common import Tqdm
 from allennlp.common.checks import ConfigurationError
 from allennlp.common.params import Params
-from allennlp.common.testing import AllenNlpTestCase, requires_gpu, requires_multi_gpu
+from allennlp.common.testing import (
+    AllenNlpTestCase,
+    requires_gpu,
+    requires_multi_gpu,
+    run_distributed_test,
+)
 from allennlp.data import Vocabulary, Instance, Token
-from allennlp.data.data_loaders import MultiProcessDataLoader, SimpleDataLoader, TensorDict
+from allennlp.data.data_loaders import (
+    DataLoader,
+    MultiProcessDataLoader,
+    SimpleDataLoader,
+    TensorDict,
+)
+from allennlp.data.data_loaders.data_collator import DataCollator, DefaultDataCollator
 from allennlp.data.dataset_readers import SequenceTaggingDatasetReader, DatasetReader
 from allennlp.data.token_indexers import SingleIdTokenIndexer
 from allennlp.models.model import Model
@@ -51,6 +65,7 @@ from allennlp.training.optimizers import Optimizer
 from allennlp.common.testing.confidence_check_test import (
     FakeModelForTestingNormalizationBiasVerification,
 )
+from allennlp.common.testing.data_collator_test import CountingDataCollator
 
 
 class FakeDatasetReader(DatasetReader):
@@ -168,6 +183,20 @@ class TestTrainer(TrainerTestBase):
         assert isinstance(metrics["peak_worker_0_memory_MB"], float)
         assert metrics["peak_worker_0_memory_MB"] > 0
 
+    def test_trainer_can_prefetch_batches(self):
+        trainer = GradientDescentTrainer(
+            model=self.model,
+            optimizer=self.optimizer,
+            data_loader=self.data_loader,
+            validation_data_loader=self.validation_data_loader,
+            num_epochs=2,
+            prefetch_batches=2,
+        )
+        metrics = trainer.train()
+        assert metrics["training_loss"] > 0
+        assert isinstance(metrics["training_data_wait_seconds"], float)
+        assert metrics["training_data_wait_seconds"] >= 0
+
     def test_trainer_can_run_exponential_moving_average(self):
         moving_average = ExponentialMovingAverage(self.model.named_parameters(), decay=0.9999)
         trainer = GradientDescentTrainer(
@@ -915,6 +944,87 @@ class TestTrainer(TrainerTestBase):
 
         assert original_metrics["best_validation_loss"] == restored_metrics["best_validation_loss"]
 
+    # With enough prefetched batches, the data loader finishes each epoch before the checkpoints
+    # of its last batches are saved.
+    @pytest.mark.parametrize("prefetch_batches", [0, 4])
+    def test_trainer_resumes_mid_epoch_without_making_skipped_batches(
+        self, prefetch_batches, monkeypatch
+    ):
+        class RecordBatchesCallback(TrainerCallback):
+            def __init__(self, serialization_dir: str) -> None:
+                super().__init__(serialization_dir)
+                self.batches: List[Any] = []
+
+            def on_batch(
+                self,
+                trainer: "GradientDescentTrainer",
+                batch_inputs: List[TensorDict],
+                batch_outputs: List[Dict[str, Any]],
+                batch_metrics: Dict[str, Any],
+                epoch: int,
+                batch_number: int,
+                is_training: bool,
+                is_primary: bool = True,
+                batch_grad_norm: Optional[float] = None,
+                **kwargs,
+            ) -> None:
+                token_ids = [batch["tokens"]["tokens"]["tokens"].tolist() for batch in batch_inputs]
+                self.batches.append((epoch, batch_number, token_ids))
+
+        def make_trainer(callback: TrainerCallback, collator: DataCollator):
+            data_loader = MultiProcessDataLoader(
+                self.reader, self.data_path, batch_size=1, shuffle=True, collate_fn=collator
+            )
+            data_loader.index_with(self.vocab)
+            return GradientDescentTrainer(
+                self.model,
+                self.optimizer,
+                data_loader,
+                num_epochs=3,
+                serialization_dir=self.TEST_DIR,
+                checkpointer=Checkpointer(
+                    serialization_dir=self.TEST_DIR,
+                    save_every_num_batches=1,
+                    keep_most_recent_by_count=None,
+                ),
+                callbacks=[callback],
+                prefetch_batches=prefetch_batches,
+            )
+
+        original_callback = RecordBatchesCallback(self.TEST_DIR)
+        trainer = make_trainer(original_callback, DefaultDataCollator())
+        trainer.train()
+        # 4 instances in batches of 1, for 3 epochs.
+        assert len(original_callback.batches) == 12
+
+        # Restore from the checkpoint after two batches of the second epoch.
+        for path in glob.glob(os.path.join(self.TEST_DIR, "model_state_e*_b*")):
+            checkpoint = Checkpointer._parse_model_state_path(path)
+            if checkpoint > (1, 2):
+                os.remove(trainer._checkpointer._model_state_path(*checkpoint))
+                os.remove(trainer._checkpointer._training_state_path(*checkpoint))
+
+        progress_bars = []
+        original_tqdm = Tqdm.tqdm
+
+        def recording_tqdm(*args, **kwargs):
+            progress_bar = original_tqdm(*args, **kwargs)
+            progress_bars.append(progress_bar)
+            return progress_bar
+
+        monkeypatch.setattr(Tqdm, "tqdm", recording_tqdm)
+
+        callback = RecordBatchesCallback(self.TEST_DIR)
+        collator = CountingDataCollator()
+        random.seed(1234)
+        make_trainer(callback, collator).train()
+        assert callback.batches == original_callback.batches[6:]
+        assert collator.num_collated == 6
+        # The last two progress bars are the ones of the training epochs (the first one is shown
+        # while loading the instances). The one of the restored epoch starts after the skipped
+        # batches.
+        assert [(bar.n, bar.total) for bar in progress_bars[-2:]] == [(4, 4), (4, 4)]
+
     def test_trainer_saves_and_loads_best_validation_metrics_correctly_1(self):
         # Use -loss and run 1 epoch of original-training, and one of restored-training
         # Run 1 epoch of original training.
@@ -1282,3 +1392,76 @@ class TestSparseClipGrad(AllenNlpTestCase):
         # Final norm should be 1.5
         grad = embedding.weight.grad.coalesce()
         assert grad._values().norm(2.0).item() == pytest.approx(1.5, rel=1e-4)
+
+
+def _train_with_balanced_batches(
+    global_rank: int, world_size: int, gpu_id: int, balance: bool, iterable_only: bool = False
+):
+    trainer_all_reduces = 0
+    all_reduce = torch.distributed.all_reduce
+
+    def count_trainer_all_reduces(*args, **kwargs):
+        nonlocal trainer_all_reduces
+        if sys._getframe(1).f_code.co_filename.endswith("gradient_descent_trainer.py"):
+            trainer_all_reduces += 1
+        return all_reduce(*args, **kwargs)
+
+    torch.distributed.all_reduce = count_trainer_all_reduces
+    try:
+        # The workers get 5 and 4 instances, so 3 and 2 batches.
+        reader = FakeDatasetReader(9, 2)
+        data_loader = MultiProcessDataLoader(
+            reader, "", batch_size=2, balance_distributed_batches=balance
+        )
+        vocab = Vocabulary.from_instances(data_loader.iter_instances())
+        data_loader.index_with(vocab)
+        if iterable_only:
+            data_loader = _IterableOnlyDataLoader(data_loader)
+        model = FakeModel(vocab)
+        trainer = GradientDescentTrainer(
+            model,
+            torch.optim.SGD(model.parameters(), 0.01),
+            data_loader,
+            num_epochs=2,
+            distributed=True,
+            local_rank=global_rank,
+            world_size=world_size,
+        )
+        trainer.train()
+    finally:
+        torch.distributed.all_reduce = all_reduce
+
+    assert trainer._total_batches_completed == 4
+    if balance and not iterable_only:
+        assert trainer_all_reduces == 0
+    else:
+        # One before each batch and one at the end of each epoch.
+        assert trainer_all_reduces == (2 + 1) * 2
+
+
+@pytest.mark.parametrize("balance", [True, False])
+def test_distributed_trainer_skips_done_check_with_balanced_batches(balance: bool):
+    run_distributed_test([-1, -1], _train_with_balanced_batches, balance)
+
+
+class _IterableOnlyDataLoader:
+    """
+    A data loader that doesn't subclass `DataLoader`.
+    """
+
+    def __init__(self, data_loader: DataLoader) -> None:
+        self.data_loader = data_loader
+
+    def __iter__(self):
+        return iter(self.data_loader)
+
+    def __len__(self):
+        return len(self.data_loader)
+
+    def set_target_device(self, device):
+        self.data_loader.set_target_device(device)
+
+
+def test_distributed_trainer_checks_done_with_data_loaders_that_only_iterate():
+    # Whether its batches are balanced or not, we can't tell.
+    run_distributed_test([-1, -1], _train_with_balanced_batches, True, True)
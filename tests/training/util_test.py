@@ -9,6 +9,7 @@ from allennlp.common.testing import AllenNlpTestCase
 from allennlp.data.instance import Instance
 from allennlp.data.dataset_readers import DatasetReader
 from allennlp.data.fields import LabelField
+from allennlp.data.vocabulary import DEFAULT_OOV_TOKEN, DEFAULT_PADDING_TOKEN
 from allennlp.models import Model
 from allennlp.training.util import make_vocab_from_params, get_metrics
 
@@ -173,6 +174,27 @@ class TestMakeVocabFromParams(AllenNlpTestCase):
         with pytest.raises(ConfigurationError, match="The 'vocabulary' directory in the provided"):
             make_vocab_from_params(params, str(self.TEST_DIR))
 
+    @pytest.mark.parametrize("num_workers", [0, 2])
+    def test_vocab_counted_by_data_loader(self, num_workers: int):
+        params = Params(
+            {
+                "dataset_reader": {"type": "sequence_tagging"},
+                "train_data_path": str(self.FIXTURES_ROOT / "data" / "sequence_tagging.tsv"),
+                "data_loader": {"batch_size": 2, "num_workers": num_workers},
+                "vocabulary": {"min_count": {"tokens": 5}},
+            }
+        )
+        vocab = make_vocab_from_params(params, str(self.TEST_DIR))
+        assert vocab.get_token_to_index_vocabulary("labels") == {"N": 0, "V": 1}
+        # Only "are", "animals" and "." are in all five sentences.
+        assert set(vocab.get_token_to_index_vocabulary("tokens")) == {
+            DEFAULT_PADDING_TOKEN,
+            DEFAULT_OOV_TOKEN,
+            "are",
+            "animals",
+            ".",
+        }
+
     def test_get_metrics(self):
         class FakeModel(Model):
             def forward(self, **kwargs):